@@ -1,10 +1,258 @@
-from typing import Any
+from __future__ import annotations
+
+import atexit
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import UTC, datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import IO, Any, Protocol
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
 
+from app.config import get_settings
 from app.models import AuditLog
 
+logger = logging.getLogger("b2bak.audit")
+
+
+class AuditSink(Protocol):
+    def record(self, db: Session, entry: dict[str, Any]) -> None: ...
+
+    def start(self) -> None: ...
+
+    def stop(self) -> None: ...
+
+
+class InlineAuditSink:
+    # The audit row commits (or rolls back) atomically with the change it describes.
+    def record(self, db: Session, entry: dict[str, Any]) -> None:
+        db.add(AuditLog(**entry))
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+def _encode(entry: dict[str, Any]) -> str:
+    return json.dumps(entry, default=str, separators=(",", ":"))
+
+
+def _decode(line: str) -> dict[str, Any]:
+    row = json.loads(line)
+    row["id"] = UUID(row["id"])
+    row["org_id"] = UUID(row["org_id"])
+    row["actor_user_id"] = UUID(row["actor_user_id"]) if row["actor_user_id"] else None
+    row["created_at"] = datetime.fromisoformat(row["created_at"])
+    return row
+
+
+class _Segment:
+    # One spool file, flock-ed for as long as this process owns its rows.
+    def __init__(self, path: Path, handle: IO[str], rows: list[dict[str, Any]]) -> None:
+        self.path = path
+        self.handle = handle
+        self.rows = rows
+
+    @classmethod
+    def create(cls, directory: Path) -> _Segment:
+        path = directory / f"audit-{os.getpid()}-{uuid.uuid4().hex[:12]}.ndjson"
+        # The handle outlives this call; the stack only closes it if locking fails.
+        with contextlib.ExitStack() as stack:
+            handle = stack.enter_context(open(path, "a", encoding="utf-8"))
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            stack.pop_all()
+        return cls(path, handle, [])
+
+    @classmethod
+    def claim(cls, path: Path) -> _Segment | None:
+        with contextlib.ExitStack() as stack:
+            try:
+                handle = stack.enter_context(open(path, "r+", encoding="utf-8"))
+            except FileNotFoundError:
+                # Discarded by its owner between the directory listing and here.
+                return None
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Still held by a live process.
+                return None
+            # Owners unlink before releasing the lock, so a lock won on a file that is no longer at this path
+            # means its rows were already inserted.
+            try:
+                if not os.path.samestat(os.fstat(handle.fileno()), path.stat()):
+                    return None
+            except FileNotFoundError:
+                return None
+            rows = []
+            for line in handle:
+                try:
+                    rows.append(_decode(line))
+                except (ValueError, KeyError, TypeError):
+                    # A torn last line from a crash mid-write; everything before it is intact.
+                    logger.warning("skipping unreadable audit spool line in %s", path)
+            stack.pop_all()
+        return cls(path, handle, rows)
+
+    def append(self, entries: list[dict[str, Any]], fsync: bool) -> None:
+        # flush() alone survives a process crash; fsync also covers power loss at the cost of a disk sync per commit.
+        self.handle.write("".join(_encode(entry) + "\n" for entry in entries))
+        self.handle.flush()
+        if fsync:
+            os.fsync(self.handle.fileno())
+        self.rows.extend(entries)
+
+    def discard(self) -> None:
+        self.path.unlink(missing_ok=True)
+        self.handle.close()
+
+
+class BufferedAuditSink:
+    # Entries are staged on the session, appended to a local spool file after commit, and inserted
+    # in bulk by a background thread, so the request transaction never pays for the audit INSERT.
+    def __init__(
+        self,
+        spool_dir: Path,
+        session_factory: sessionmaker[Session],
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        fsync: bool = False,
+    ) -> None:
+        self.spool_dir = spool_dir
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._flush_lock = threading.Lock()
+        self._active: _Segment | None = None
+        self._sealed: list[_Segment] = []
+
+    def record(self, db: Session, entry: dict[str, Any]) -> None:
+        db.info["audit_sink"] = self
+        db.info.setdefault("audit_pending", []).append(entry)
+
+    def submit(self, entries: list[dict[str, Any]]) -> None:
+        self.start()
+        with self._lock:
+            if self._active is None:
+                self._active = _Segment.create(self.spool_dir)
+            self._active.append(entries, self.fsync)
+            if len(self._active.rows) >= self.batch_size:
+                self._wake.set()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.spool_dir.mkdir(parents=True, exist_ok=True)
+            self._recover()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-flusher", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        thread.join(timeout=10)
+        self._thread = None
+
+    def _recover(self) -> None:
+        # Segments left behind by a crashed (or this, restarted) process are replayed; ids make replays idempotent.
+        for path in sorted(self.spool_dir.glob("audit-*.ndjson")):
+            segment = _Segment.claim(path)
+            if segment is not None:
+                self._sealed.append(segment)
+                logger.info("replaying %d audit entries from %s", len(segment.rows), path.name)
+
+    def _run(self) -> None:
+        backoff = self.flush_interval
+        while True:
+            self._wake.wait(backoff)
+            self._wake.clear()
+            stopping = self._stop.is_set()
+            try:
+                self.flush()
+                backoff = self.flush_interval
+            except Exception:
+                logger.exception("audit flush failed; entries stay spooled")
+                backoff = min(backoff * 2, 30.0)
+                if stopping:
+                    return
+            if stopping:
+                return
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                if self._active is not None and self._active.rows:
+                    self._sealed.append(self._active)
+                    self._active = None
+                sealed = list(self._sealed)
+            written = 0
+            for segment in sealed:
+                with self.session_factory() as db:
+                    for start in range(0, len(segment.rows), self.batch_size):
+                        db.execute(_insert_ignoring_duplicates(db), segment.rows[start : start + self.batch_size])
+                    db.commit()
+                written += len(segment.rows)
+                with self._lock:
+                    self._sealed.remove(segment)
+                segment.discard()
+            return written
+
+    def insert_now(self, entries: list[dict[str, Any]]) -> None:
+        # Bypasses the spool; used when it cannot be written.
+        with self.session_factory() as db:
+            db.execute(_insert_ignoring_duplicates(db), entries)
+            db.commit()
+
+
+def _insert_ignoring_duplicates(db: Session) -> Any:
+    # executemany of a plain INSERT is sent as multi-row VALUES batches (insertmanyvalues).
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(AuditLog).on_conflict_do_nothing(index_elements=["id", "created_at"])
+    if dialect == "sqlite":
+        return sqlite.insert(AuditLog).on_conflict_do_nothing(index_elements=["id", "created_at"])
+    return AuditLog.__table__.insert()
+
+
+@lru_cache
+def get_audit_sink() -> AuditSink:
+    settings = get_settings()
+    if settings.audit_mode == "buffered":
+        from app.db import SessionLocal
+
+        return BufferedAuditSink(
+            Path(settings.audit_spool_dir),
+            SessionLocal,
+            batch_size=settings.audit_batch_size,
+            flush_interval=settings.audit_flush_interval_seconds,
+            fsync=settings.audit_spool_fsync,
+        )
+    return InlineAuditSink()
+
 
 def write_audit(
     db: Session,
@@ -16,12 +264,39 @@ def write_audit(
     entity_id: str,
     payload: dict[str, Any] | None = None,
 ) -> None:
-    entry = AuditLog(
-        org_id=org_id,
-        actor_user_id=actor_user_id,
-        action=action,
-        entity=entity,
-        entity_id=entity_id,
-        payload=payload or {},
+    get_audit_sink().record(
+        db,
+        {
+            "id": uuid.uuid4(),
+            "org_id": org_id,
+            "actor_user_id": actor_user_id,
+            "action": action,
+            "entity": entity,
+            "entity_id": entity_id,
+            "payload": payload or {},
+            "created_at": datetime.now(UTC),
+        },
     )
-    db.add(entry)
+
+
+@event.listens_for(Session, "after_commit")
+def _submit_on_commit(session: Session) -> None:
+    pending = session.info.pop("audit_pending", None)
+    sink = session.info.pop("audit_sink", None)
+    if not pending or sink is None:
+        return
+    # The caller's transaction has committed; a spool failure must not surface as a failed write.
+    try:
+        sink.submit(pending)
+    except OSError:
+        logger.exception("audit spool append failed; inserting %d entries directly", len(pending))
+        try:
+            sink.insert_now(pending)
+        except SQLAlchemyError:
+            logger.exception("audit entries lost: %s", [entry["id"] for entry in pending])
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_on_rollback(session: Session, _previous_transaction: Any) -> None:
+    session.info.pop("audit_pending", None)
+    session.info.pop("audit_sink", None)
@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import tempfile
+import threading
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from app.config import get_settings
+from app.pagination import decode_cursor, encode_cursor
+from app.schemas import AuditOut, Paginated
+
+# audit_log is range-partitioned by month (migration 20260221_0006). Partitions past the retention age
+# are detached, written to files of gzip'd column-major blocks under the archive dir and dropped; MANIFEST
+# indexes the archived ranges and, per org, the blocks holding its rows.
+MANIFEST = "manifest.json"
+COLUMNS = ("id", "org_id", "actor_user_id", "action", "entity", "entity_id", "payload", "created_at")
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(start: date) -> str:
+    return f"audit_log_p{start:%Y_%m}"
+
+
+def partition_ddl(start: date) -> str:
+    end = add_months(start, 1)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(start)} PARTITION OF audit_log "
+        f"FOR VALUES FROM ('{start.isoformat()} 00:00:00+00') TO ('{end.isoformat()} 00:00:00+00')"
+    )
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite hands back naive timestamps; everything audit-related is UTC.
+    return value if value.tzinfo else value.replace(tzinfo=UTC)
+
+
+# Rows per independently gzip'd block; a page or an export step never decompresses more than one block.
+BLOCK_ROWS = 5_000
+
+# (created_at, id) of an archived row, the order pages and exports walk in.
+Key = tuple[datetime, str]
+
+
+@dataclass(frozen=True)
+class Block:
+    offset: int
+    length: int
+    rows: int
+    newest: Key
+    oldest: Key
+
+
+@dataclass(frozen=True)
+class ArchivedPartition:
+    name: str
+    range_start: datetime
+    range_end: datetime
+    chunk: int
+    rows: int
+    file: str
+    # Per org, newest block first. Orgs without rows in the file are absent, so their reads never open it.
+    orgs: dict[str, tuple[Block, ...]] = field(default_factory=dict)
+
+
+def _column_value(column: str, value: Any) -> Any:
+    if column == "created_at":
+        return _aware(value).isoformat()
+    if column.endswith("id") and value is not None:
+        return str(value)
+    return value
+
+
+def _key(value: tuple[str, str]) -> Key:
+    return datetime.fromisoformat(value[0]), value[1]
+
+
+def _block_entry(block: Block) -> list[Any]:
+    newest, oldest = block.newest, block.oldest
+    return [block.offset, block.length, block.rows, newest[0].isoformat(), newest[1], oldest[0].isoformat(), oldest[1]]
+
+
+def _block(entry: list[Any]) -> Block:
+    offset, length, rows, newest_at, newest_id, oldest_at, oldest_id = entry
+    return Block(offset, length, rows, _key((newest_at, newest_id)), _key((oldest_at, oldest_id)))
+
+
+@lru_cache(maxsize=32)
+def _load_block(path: Path, _mtime: float, offset: int, length: int) -> dict[str, list[Any]]:
+    with path.open("rb") as handle:
+        handle.seek(offset)
+        return json.loads(gzip.decompress(handle.read(length)))
+
+
+class AuditArchive:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._lock = threading.Lock()
+        self._manifest_mtime: float | None = None
+        self._partitions: list[ArchivedPartition] = []
+
+    def partitions(self) -> list[ArchivedPartition]:
+        path = self.root / MANIFEST
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return []
+        with self._lock:
+            if mtime != self._manifest_mtime:
+                entries = json.loads(path.read_text())
+                partitions = [
+                    ArchivedPartition(
+                        entry["name"],
+                        datetime.fromisoformat(entry["range_start"]),
+                        datetime.fromisoformat(entry["range_end"]),
+                        entry["chunk"],
+                        entry["rows"],
+                        entry["file"],
+                        {org_id: tuple(map(_block, blocks)) for org_id, blocks in entry["orgs"].items()},
+                    )
+                    for entry in entries
+                ]
+                # Newest range first; a large partition is split into chunks that continue one another.
+                self._partitions = sorted(partitions, key=lambda p: (-p.range_start.timestamp(), p.chunk))
+                self._manifest_mtime = mtime
+            return list(self._partitions)
+
+    def write_partition(
+        self,
+        name: str,
+        range_start: datetime,
+        range_end: datetime,
+        rows: list[dict[str, Any]],
+        chunk: int = 0,
+    ) -> ArchivedPartition:
+        # Grouped by org, newest first within each org, and cut into column-major gzip members of BLOCK_ROWS;
+        # the manifest keeps each member's offset and key range so a read seeks straight to it.
+        rows = sorted(rows, key=lambda r: (_aware(r["created_at"]), str(r["id"])), reverse=True)
+        rows.sort(key=lambda r: str(r["org_id"]))
+        by_org: dict[str, list[dict[str, Any]]] = {}
+        for row in rows:
+            by_org.setdefault(str(row["org_id"]), []).append(row)
+        self.root.mkdir(parents=True, exist_ok=True)
+        filename = f"{name}.{chunk:04d}.json.gz"
+        orgs: dict[str, tuple[Block, ...]] = {}
+        offset = 0
+        fd, tmp_name = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as raw:
+            for org_id, org_rows in by_org.items():
+                blocks = []
+                for start in range(0, len(org_rows), BLOCK_ROWS):
+                    block_rows = org_rows[start : start + BLOCK_ROWS]
+                    columns = {column: [_column_value(column, r[column]) for r in block_rows] for column in COLUMNS}
+                    body = json.dumps(columns, separators=(",", ":"), default=str).encode()
+                    data = gzip.compress(body, compresslevel=9)
+                    raw.write(data)
+                    newest, oldest = block_rows[0], block_rows[-1]
+                    blocks.append(
+                        Block(
+                            offset,
+                            len(data),
+                            len(block_rows),
+                            (_aware(newest["created_at"]), str(newest["id"])),
+                            (_aware(oldest["created_at"]), str(oldest["id"])),
+                        )
+                    )
+                    offset += len(data)
+                orgs[org_id] = tuple(blocks)
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_name, self.root / filename)
+        archived = ArchivedPartition(name, _aware(range_start), _aware(range_end), chunk, len(rows), filename, orgs)
+        self._register(archived)
+        return archived
+
+    def _register(self, archived: ArchivedPartition) -> None:
+        entries = [p for p in self.partitions() if p.file != archived.file] + [archived]
+        payload = [
+            {
+                "name": p.name,
+                "range_start": p.range_start.isoformat(),
+                "range_end": p.range_end.isoformat(),
+                "chunk": p.chunk,
+                "rows": p.rows,
+                "file": p.file,
+                "orgs": {org_id: [_block_entry(block) for block in blocks] for org_id, blocks in p.orgs.items()},
+            }
+            for p in sorted(entries, key=lambda p: (p.range_start, p.chunk))
+        ]
+        fd, tmp_name = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        with os.fdopen(fd, "w") as handle:
+            json.dump(payload, handle, separators=(",", ":"))
+        os.replace(tmp_name, self.root / MANIFEST)
+
+    def _columns(self, partition: ArchivedPartition, block: Block) -> dict[str, list[Any]]:
+        path = self.root / partition.file
+        return _load_block(path, path.stat().st_mtime, block.offset, block.length)
+
+    def scan(
+        self,
+        org_id: UUID,
+        *,
+        before: tuple[datetime, UUID] | None,
+        entity: str | None,
+        action: str | None,
+        limit: int,
+    ) -> list[AuditOut]:
+        found: list[AuditOut] = []
+        before_key = (_aware(before[0]), str(before[1])) if before else None
+        for partition in self.partitions():
+            for block in partition.orgs.get(str(org_id), ()):
+                if before_key and block.oldest >= before_key:
+                    continue
+                cols = self._columns(partition, block)
+                start = 0
+                if before_key and block.newest >= before_key:
+                    # Rows are newest first within the block: binary search past the cursor.
+                    lo, hi = 0, block.rows
+                    while lo < hi:
+                        mid = (lo + hi) // 2
+                        if (datetime.fromisoformat(cols["created_at"][mid]), cols["id"][mid]) >= before_key:
+                            lo = mid + 1
+                        else:
+                            hi = mid
+                    start = lo
+                for i in range(start, block.rows):
+                    if (entity and cols["entity"][i] != entity) or (action and cols["action"][i] != action):
+                        continue
+                    found.append(AuditOut.model_validate({column: cols[column][i] for column in COLUMNS}))
+                    if len(found) >= limit:
+                        return found
+        return found
+
+    def iter_ascending(
+        self,
+        org_id: UUID,
+        *,
+        since: datetime | None,
+        until: datetime | None,
+        after: tuple[datetime, UUID] | None,
+        entity: str | None,
+        action: str | None,
+    ) -> Iterator[dict[str, Any]]:
+        # Oldest first, for exports. Memory is bounded by one block, not the range or the archive file.
+        since, until = (_aware(since) if since else None), (_aware(until) if until else None)
+        after_key = (_aware(after[0]), str(after[1])) if after else None
+        for partition in reversed(self.partitions()):
+            for block in reversed(partition.orgs.get(str(org_id), ())):
+                if (until and block.oldest[0] >= until) or (since and block.newest[0] < since):
+                    continue
+                if after_key and block.newest <= after_key:
+                    continue
+                cols = self._columns(partition, block)
+                for i in range(block.rows - 1, -1, -1):
+                    created_at = datetime.fromisoformat(cols["created_at"][i])
+                    if (since and created_at < since) or (until and created_at >= until):
+                        continue
+                    if after_key and (created_at, cols["id"][i]) <= after_key:
+                        continue
+                    if (entity and cols["entity"][i] != entity) or (action and cols["action"][i] != action):
+                        continue
+                    yield {column: cols[column][i] for column in COLUMNS}
+
+    def extend_page(
+        self, result: Paginated, org_id: UUID, cursor: str, *, entity: str | None, action: str | None
+    ) -> Paginated:
+        # Called once the live table is exhausted for a keyset page; archived rows are all older than live ones.
+        items = list(result.items)
+        if items:
+            before: tuple[datetime, UUID] | None = (items[-1].created_at, items[-1].id)
+        else:
+            before = decode_cursor(cursor) if cursor else None
+        remaining = result.page_size - len(items)
+        archived = self.scan(org_id, before=before, entity=entity, action=action, limit=remaining + 1)
+        items.extend(archived[:remaining])
+        has_more = len(archived) > remaining
+        return Paginated(
+            items=items,
+            page_size=result.page_size,
+            next_cursor=encode_cursor(items[-1].created_at, items[-1].id) if has_more and items else None,
+        )
+
+
+@lru_cache
+def get_audit_archive() -> AuditArchive:
+    return AuditArchive(Path(get_settings().audit_archive_dir))
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import io
+import os
+import re
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+from PIL import Image, UnidentifiedImageError
+
+from app.config import get_settings
+
+AVATAR_PATH_PREFIX = "/avatars/"
+# Thumbnail edge length in pixels per variant; "orig" is the uploaded bytes untouched.
+VARIANTS = {"sm": 64, "md": 256}
+_FORMAT_MEDIA_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg", "GIF": "image/gif", "WEBP": "image/webp"}
+_DATA_URL_RE = re.compile(r"^data:image/[a-z0-9.+-]+;base64,(?P<data>.+)$", re.IGNORECASE | re.DOTALL)
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+Image.MAX_IMAGE_PIXELS = 40_000_000
+
+
+class AvatarError(ValueError):
+    pass
+
+
+class AvatarStore:
+    # Content-addressed: <root>/<digest[:2]>/<digest>/{orig.<ext>,sm.webp,md.webp}. Files are immutable once written.
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def _dir(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def put(self, data: bytes) -> str:
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image_format = image.format or ""
+                image.load()
+                if image_format not in _FORMAT_MEDIA_TYPES:
+                    raise AvatarError("Unsupported avatar image format")
+                thumbnails = {name: self._thumbnail(image, edge) for name, edge in VARIANTS.items()}
+        except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as exc:
+            raise AvatarError("Avatar is not a valid image") from exc
+        digest = hashlib.sha256(data).hexdigest()
+        target = self._dir(digest)
+        original = target / f"orig.{image_format.lower()}"
+        if not original.exists():
+            target.mkdir(parents=True, exist_ok=True)
+            for name, payload in thumbnails.items():
+                self._write(target / f"{name}.webp", payload)
+            # Written last: its presence marks a complete entry.
+            self._write(original, data)
+        return digest
+
+    def open(self, digest: str, variant: str = "orig") -> tuple[Path, str] | None:
+        if not _DIGEST_RE.match(digest) or (variant != "orig" and variant not in VARIANTS):
+            return None
+        directory = self._dir(digest)
+        if variant != "orig":
+            path = directory / f"{variant}.webp"
+            return (path, "image/webp") if path.is_file() else None
+        for image_format, media_type in _FORMAT_MEDIA_TYPES.items():
+            path = directory / f"orig.{image_format.lower()}"
+            if path.is_file():
+                return path, media_type
+        return None
+
+    @staticmethod
+    def _thumbnail(image: Image.Image, edge: int) -> bytes:
+        thumb = image.convert("RGBA")
+        thumb.thumbnail((edge, edge))
+        buffer = io.BytesIO()
+        thumb.save(buffer, format="WEBP", quality=85)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _write(path: Path, payload: bytes) -> None:
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(payload)
+        os.replace(tmp_name, path)
+
+
+@lru_cache
+def get_avatar_store() -> AvatarStore:
+    return AvatarStore(Path(get_settings().avatar_storage_dir))
+
+
+def is_avatar_ref(value: str) -> bool:
+    return value.startswith(AVATAR_PATH_PREFIX) and bool(_DIGEST_RE.match(value.removeprefix(AVATAR_PATH_PREFIX)))
+
+
+def store_data_url(store: AvatarStore, value: str) -> str:
+    match = _DATA_URL_RE.match(value)
+    if not match:
+        raise AvatarError("Avatar data URL must be base64 encoded")
+    try:
+        data = base64.b64decode(match.group("data"), validate=True)
+    except (binascii.Error, ValueError) as exc:
+        raise AvatarError("Avatar data URL must be base64 encoded") from exc
+    return f"{AVATAR_PATH_PREFIX}{store.put(data)}"
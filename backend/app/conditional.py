@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response
+
+from app.exceptions import NotModified
+
+
+def weak_etag(*parts: Any) -> str:
+    # Weak: equal tags mean the same representation, not byte-identical bodies.
+    digest = hashlib.blake2b("\x1f".join(map(str, parts)).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _opaque(tag: str) -> str:
+    return tag.strip().removeprefix("W/")
+
+
+class Conditional:
+    def __init__(self, request: Request, response: Response) -> None:
+        self.if_none_match = request.headers.get("if-none-match")
+        self.response = response
+
+    def check(self, *parts: Any) -> None:
+        # Call with whatever identifies the current representation (id + updated_at, or the fields themselves)
+        # before loading the rest of the row; a match short-circuits to 304 without building the response.
+        etag = weak_etag(*parts)
+        self.response.headers["ETag"] = etag
+        self.response.headers["Cache-Control"] = "private, no-cache"
+        if self.if_none_match is None:
+            return
+        # If-None-Match uses the weak comparison: W/"x" and "x" match.
+        candidates = {_opaque(tag) for tag in self.if_none_match.split(",")}
+        if "*" in candidates or _opaque(etag) in candidates:
+            raise NotModified(etag)
+
+
+def conditional(request: Request, response: Response) -> Conditional:
+    return Conditional(request, response)
@@ -1,9 +1,15 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
-from app.config import get_settings
+from app.config import Settings, get_settings
 
 
 class Base(DeclarativeBase):
@@ -13,6 +19,9 @@ class Base(DeclarativeBase):
 settings = get_settings()
 engine = create_engine(settings.database_url, pool_pre_ping=True)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, class_=Session)
+# Bound per call to the lazily created engine, so the sync-only deployment never builds an async pool.
+AsyncSessionLocal = async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
+_async_engine: AsyncEngine | None = None
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -21,3 +30,37 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+def async_database_url(settings: Settings) -> str:
+    if settings.async_database_url:
+        return settings.async_database_url
+    # psycopg 3 picks its async driver under create_async_engine; sqlite needs aiosqlite instead of pysqlite.
+    if settings.database_url.startswith("sqlite"):
+        return "sqlite+aiosqlite:" + settings.database_url.split(":", maxsplit=1)[1]
+    return settings.database_url
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        url = async_database_url(settings)
+        pool_kwargs = (
+            {}
+            if url.startswith("sqlite")
+            else {"pool_size": settings.db_async_pool_size, "max_overflow": settings.db_async_max_overflow}
+        )
+        _async_engine = create_async_engine(url, pool_pre_ping=True, **pool_kwargs)
+    return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine
+    if _async_engine is not None:
+        async_engine, _async_engine = _async_engine, None
+        await async_engine.dispose()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        yield db
@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+import time
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from uuid import UUID
+
+from fastapi import WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from redis.exceptions import RedisError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.audit import write_audit
+from app.config import get_settings
+from app.db import SessionLocal
+from app.models import Message
+from app.realtime import OVERFLOW, hub, message_event, publish_async, publish_many
+from app.redis_pool import get_async_redis_client, hdel_and_getall, hset_with_expire
+from app.schemas import MessageCreate
+
+logger = logging.getLogger("b2bak.deal_room")
+
+PRESENCE_PREFIX = "b2bak:presence:deal:"
+# Close codes: 1013 "try again later" for consumers that fell behind; 4xxx mirror the HTTP status of a rejected join.
+CLOSE_TOO_SLOW = 1013
+
+
+class WriterBusy(Exception):
+    pass
+
+
+@dataclass
+class _Pending:
+    deal_id: UUID
+    sender_user_id: UUID
+    sender_org_id: UUID
+    body: str
+    future: asyncio.Future[dict[str, Any]]
+
+
+class MessageWriter:
+    # Group commit for chat messages: whatever queued up while the previous batch was being written goes out
+    # as the next multi-row INSERT, so an idle room pays no added latency and a busy one one commit per batch.
+    def __init__(self, session_factory: Callable[[], Session], batch_size: int, queue_size: int) -> None:
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self._queue: asyncio.Queue[_Pending] | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._queue = asyncio.Queue(self.queue_size)
+            self._task = asyncio.create_task(self._run(), name="deal-room-writer")
+
+    async def stop(self) -> None:
+        if self._task is None or self._queue is None:
+            return
+        # Messages already acknowledged to the socket reader are written before shutdown.
+        await self._queue.join()
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def submit(self, deal_id: UUID, sender_user_id: UUID, sender_org_id: UUID, body: str) -> dict[str, Any]:
+        await self.start()
+        assert self._queue is not None
+        future: asyncio.Future[dict[str, Any]] = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait(_Pending(deal_id, sender_user_id, sender_org_id, body, future))
+        except asyncio.QueueFull as exc:
+            raise WriterBusy from exc
+        return await future
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                events = await run_in_threadpool(self._write, batch)
+            except Exception as exc:
+                # Handed to every waiting submit(), which decides what to log.
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(exc)
+            else:
+                for item, event in zip(batch, events, strict=True):
+                    if not item.future.done():
+                        item.future.set_result(event)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: list[_Pending]) -> list[dict[str, Any]]:
+        now = datetime.now(UTC)
+        # One microsecond apart so the batch keeps its arrival order under (created_at, id) paging.
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "deal_id": item.deal_id,
+                "sender_user_id": item.sender_user_id,
+                "body": item.body,
+                "created_at": now + timedelta(microseconds=index),
+            }
+            for index, item in enumerate(batch)
+        ]
+        with self.session_factory() as db:
+            db.execute(insert(Message), rows)
+            for item, row in zip(batch, rows, strict=True):
+                write_audit(
+                    db,
+                    org_id=item.sender_org_id,
+                    actor_user_id=item.sender_user_id,
+                    action="message.create",
+                    entity="message",
+                    entity_id=str(row["id"]),
+                )
+            db.commit()
+        events = [message_event(Message(**row)) for row in rows]
+        # Core inserts skip the ORM flush hook in app.realtime, so the room broadcast is published here.
+        publish_many([(f"deal:{row['deal_id']}", event) for row, event in zip(rows, events, strict=True)])
+        return events
+
+
+_writer: MessageWriter | None = None
+
+
+def get_message_writer() -> MessageWriter:
+    global _writer
+    if _writer is None:
+        settings = get_settings()
+        _writer = MessageWriter(SessionLocal, settings.deal_room_batch_size, settings.deal_room_queue_size)
+    return _writer
+
+
+class Presence:
+    # One hash per deal, field "<user_id>:<connection_id>" -> last heartbeat, shared by every worker, so a user
+    # with two tabs stays online until the last one leaves.
+    def __init__(self, deal_id: UUID, user_id: UUID, ttl_seconds: float) -> None:
+        self.key = f"{PRESENCE_PREFIX}{deal_id}"
+        self.user_id = str(user_id)
+        self.field = f"{user_id}:{uuid.uuid4().hex}"
+        self.ttl_seconds = ttl_seconds
+
+    def _online(self, entries: dict[str, str]) -> set[str]:
+        cutoff = time.time() - self.ttl_seconds
+        return {field.split(":", 1)[0] for field, seen in entries.items() if float(seen) >= cutoff}
+
+    async def join(self) -> set[str]:
+        try:
+            entries = await hset_with_expire(
+                get_async_redis_client(), self.key, {self.field: time.time()}, int(self.ttl_seconds * 2)
+            )
+            return self._online(entries) | {self.user_id}
+        except RedisError as exc:
+            logger.warning("presence unavailable: %s", exc)
+            return {self.user_id}
+
+    async def heartbeat(self) -> None:
+        try:
+            await hset_with_expire(
+                get_async_redis_client(), self.key, {self.field: time.time()}, int(self.ttl_seconds * 2)
+            )
+        except RedisError as exc:
+            logger.warning("presence heartbeat failed: %s", exc)
+
+    async def leave(self) -> bool:
+        # True when this was the user's last connection to the room.
+        try:
+            entries = await hdel_and_getall(get_async_redis_client(), self.key, self.field)
+            return self.user_id not in self._online(entries)
+        except RedisError as exc:
+            logger.warning("presence unavailable: %s", exc)
+            return True
+
+
+class _TooSlow(Exception):
+    pass
+
+
+class DealRoomConnection:
+    def __init__(self, websocket: WebSocket, deal_id: UUID, user_id: UUID, org_id: UUID) -> None:
+        settings = get_settings()
+        self.websocket = websocket
+        self.deal_id = deal_id
+        self.user_id = user_id
+        self.org_id = org_id
+        self.topic = f"deal:{deal_id}"
+        self.writer = get_message_writer()
+        self.presence = Presence(deal_id, user_id, settings.deal_room_presence_ttl_seconds)
+        self.send_timeout = settings.deal_room_send_timeout_seconds
+        self.ping_seconds = settings.deal_room_presence_ttl_seconds / 3
+        self.typing_interval = settings.deal_room_typing_interval_seconds
+        # Unacknowledged messages per connection; past this the reader stops reading and TCP pushes back.
+        self.in_flight = asyncio.Semaphore(settings.deal_room_max_in_flight)
+        self._send_lock = asyncio.Lock()
+        self._last_typing = 0.0
+        self._acks: set[asyncio.Task[None]] = set()
+
+    async def run(self) -> None:
+        # Subscribed before anything is announced, so the joiner sees every event from here on.
+        sub = hub.subscribe(self.topic)
+        try:
+            online = await self.presence.join()
+            await self._send({"type": "presence.snapshot", "data": {"user_ids": sorted(online)}})
+            await publish_async(self.topic, self._presence_event(True))
+            tasks = [asyncio.create_task(self._pump(sub)), asyncio.create_task(self._receive())]
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for task in done:
+                exc = task.exception()
+                if isinstance(exc, _TooSlow):
+                    with contextlib.suppress(Exception):
+                        await asyncio.wait_for(self.websocket.close(CLOSE_TOO_SLOW, "Resync from the messages API"), self.send_timeout)
+                elif exc is not None and not isinstance(exc, WebSocketDisconnect):
+                    raise exc
+        finally:
+            sub.close()
+            if await self.presence.leave():
+                await publish_async(self.topic, self._presence_event(False))
+
+    def _presence_event(self, online: bool) -> dict[str, Any]:
+        return {"type": "presence", "data": {"user_id": str(self.user_id), "online": online}}
+
+    async def _send(self, message: dict[str, Any]) -> None:
+        # A socket that cannot take a frame within the timeout is treated like an overflowed queue.
+        async with self._send_lock:
+            try:
+                await asyncio.wait_for(self.websocket.send_text(json.dumps(message, default=str)), self.send_timeout)
+            except TimeoutError as exc:
+                raise _TooSlow from exc
+
+    async def _pump(self, sub: Any) -> None:
+        own_id = str(self.user_id)
+        while True:
+            message = await sub.get(timeout=self.ping_seconds)
+            if message is None:
+                await self.presence.heartbeat()
+                await self._send({"type": "ping"})
+            elif message is OVERFLOW:
+                raise _TooSlow
+            elif message.get("type") in ("typing", "presence") and message.get("data", {}).get("user_id") == own_id:
+                continue
+            else:
+                await self._send(message)
+
+    async def _receive(self) -> None:
+        while True:
+            try:
+                frame = json.loads(await self.websocket.receive_text())
+            except ValueError:
+                await self._send({"type": "error", "detail": "Frames must be JSON objects"})
+                continue
+            kind = frame.get("type") if isinstance(frame, dict) else None
+            if kind == "message":
+                await self._accept_message(frame)
+            elif kind == "typing":
+                now = time.monotonic()
+                if now - self._last_typing >= self.typing_interval:
+                    self._last_typing = now
+                    await publish_async(self.topic, {"type": "typing", "data": {"user_id": str(self.user_id)}})
+            else:
+                await self._send({"type": "error", "detail": "Unknown event type"})
+
+    async def _accept_message(self, frame: dict[str, Any]) -> None:
+        client_id = frame.get("client_id")
+        try:
+            body = MessageCreate(body=frame.get("body")).body
+        except ValidationError:
+            await self._send({"type": "error", "client_id": client_id, "detail": "Message body must be 1-5000 characters"})
+            return
+        await self.in_flight.acquire()
+        task = asyncio.create_task(self._persist(client_id, body))
+        self._acks.add(task)
+        task.add_done_callback(self._ack_done)
+
+    def _ack_done(self, task: asyncio.Task[None]) -> None:
+        self._acks.discard(task)
+        exc = None if task.cancelled() else task.exception()
+        if exc is None:
+            return
+        # An ack that cannot be delivered means the socket is gone or stuck; the pump notices and closes it.
+        if isinstance(exc, (_TooSlow, WebSocketDisconnect)):
+            logger.debug("deal room ack not delivered: %s", exc)
+        else:
+            logger.error("deal room message handling failed", exc_info=exc)
+
+    async def _persist(self, client_id: Any, body: str) -> None:
+        try:
+            event = await self.writer.submit(self.deal_id, self.user_id, self.org_id, body)
+        except WriterBusy:
+            await self._send({"type": "error", "client_id": client_id, "detail": "Server busy, retry"})
+        except SQLAlchemyError:
+            logger.exception("deal room message for deal %s was not saved", self.deal_id)
+            await self._send({"type": "error", "client_id": client_id, "detail": "Message was not saved"})
+        else:
+            await self._send({"type": "ack", "client_id": client_id, "id": event["id"], "data": event["data"]})
+        finally:
+            self.in_flight.release()
@@ -5,27 +5,35 @@ from uuid import UUID
 from fastapi import Cookie, Depends, Request, Response
 from redis import Redis
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.config import get_settings
-from app.db import get_db
+from app.db import get_async_db, get_db
 from app.exceptions import AppError
 from app.models import Organization, Role, User
+from app.principals import Principal, principal_cache, snapshot
+from app.redis_pool import get_redis_client
 from app.security import create_token, decode_token
 
 
 def get_redis() -> Redis:
-    settings = get_settings()
-    return Redis.from_url(settings.redis_url, decode_responses=True)
+    return get_redis_client()
 
 
 def _token_cookie_name(token_type: str) -> str:
     return "b2bak_access" if token_type == "access" else "b2bak_refresh"
 
 
-def set_auth_cookies(response: Response, user_id: UUID) -> None:
+def set_auth_cookies(response: Response, user_id: UUID, org_id: UUID | None = None) -> None:
     settings = get_settings()
-    access = create_token(str(user_id), "access", timedelta(minutes=settings.jwt_access_expires_minutes))
+    # The org claim lets the rate limiter key tenant quotas without a database lookup.
+    access = create_token(
+        str(user_id),
+        "access",
+        timedelta(minutes=settings.jwt_access_expires_minutes),
+        extra={"org": str(org_id)} if org_id else None,
+    )
     refresh = create_token(str(user_id), "refresh", timedelta(days=settings.jwt_refresh_expires_days))
     response.set_cookie(
         key=_token_cookie_name("access"),
@@ -50,10 +58,7 @@ def clear_auth_cookies(response: Response) -> None:
     response.delete_cookie("b2bak_refresh")
 
 
-def get_current_user(
-    db: Session = Depends(get_db),
-    access_cookie: str | None = Cookie(default=None, alias="b2bak_access"),
-) -> User:
+def _user_id_from_cookie(access_cookie: str | None) -> UUID:
     if not access_cookie:
         raise AppError(401, "Unauthorized", "Missing auth cookie")
     try:
@@ -62,10 +67,39 @@ def get_current_user(
         raise AppError(401, "Unauthorized", "Invalid token") from exc
     if token.get("type") != "access":
         raise AppError(401, "Unauthorized", "Invalid token type")
-    user_id = token.get("sub")
-    user = db.get(User, UUID(user_id))
+    try:
+        return UUID(str(token.get("sub")))
+    except ValueError as exc:
+        raise AppError(401, "Unauthorized", "Invalid token") from exc
+
+
+def get_current_user(
+    db: Session = Depends(get_db),
+    access_cookie: str | None = Cookie(default=None, alias="b2bak_access"),
+) -> User:
+    user_id = _user_id_from_cookie(access_cookie)
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        return db.merge(cached.user, load=False)
+    user = db.get(User, user_id)
+    if not user:
+        raise AppError(401, "Unauthorized", "User does not exist")
+    principal_cache.put(Principal(user=snapshot(user)))
+    return user
+
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db),
+    access_cookie: str | None = Cookie(default=None, alias="b2bak_access"),
+) -> User:
+    user_id = _user_id_from_cookie(access_cookie)
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        return await db.merge(cached.user, load=False)
+    user = await db.get(User, user_id)
     if not user:
         raise AppError(401, "Unauthorized", "User does not exist")
+    principal_cache.put(Principal(user=snapshot(user)))
     return user
 
 
@@ -73,9 +107,13 @@ def get_current_org(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> Organization:
+    cached = principal_cache.get(current_user.id)
+    if cached is not None and cached.org is not None:
+        return db.merge(cached.org, load=False)
     org = db.scalar(select(Organization).where(Organization.id == current_user.org_id))
     if not org:
         raise AppError(401, "Unauthorized", "Organization does not exist")
+    principal_cache.put_org(current_user.id, snapshot(org))
     return org
 
 
@@ -1,5 +1,5 @@
 from fastapi import HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
 
 class AppError(HTTPException):
@@ -20,3 +20,13 @@ async def app_error_handler(request: Request, exc: AppError) -> JSONResponse:
             "request_id": getattr(request.state, "request_id", None),
         },
     )
+
+
+class NotModified(Exception):
+    # Raised once the ETag matches, before the body is loaded or serialized.
+    def __init__(self, etag: str) -> None:
+        self.etag = etag
+
+
+async def not_modified_handler(_request: Request, exc: NotModified) -> Response:
+    return Response(status_code=304, headers={"ETag": exc.etag, "Cache-Control": "private, no-cache"})
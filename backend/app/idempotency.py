@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any, Protocol
+
+from redis.exceptions import RedisError
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import get_settings
+from app.models import IdempotencyKey
+from app.redis_pool import get_async_redis_client
+from app.security import decode_token
+
+logger = logging.getLogger("b2bak.idempotency")
+
+MUTATING_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+REPLAYED_HEADER = (b"idempotent-replayed", b"true")
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    fingerprint: str
+    # None while the first request holding the key is still running.
+    status: int | None = None
+    headers: tuple[tuple[bytes, bytes], ...] = ()
+    body: bytes = b""
+
+    @property
+    def pending(self) -> bool:
+        return self.status is None
+
+    def dumps(self) -> str:
+        return json.dumps(
+            {
+                "fingerprint": self.fingerprint,
+                "status": self.status,
+                "headers": [[k.decode("latin-1"), v.decode("latin-1")] for k, v in self.headers],
+                "body": base64.b64encode(self.body).decode(),
+            }
+        )
+
+    @classmethod
+    def loads(cls, raw: str) -> StoredResponse:
+        data = json.loads(raw)
+        return cls(
+            data["fingerprint"],
+            data["status"],
+            tuple((k.encode("latin-1"), v.encode("latin-1")) for k, v in data["headers"]),
+            base64.b64decode(data["body"]),
+        )
+
+
+class IdempotencyStore(Protocol):
+    # reserve() claims the key (returns None) or returns what is already stored under it.
+    async def reserve(self, key: str, fingerprint: str, lock_seconds: int) -> StoredResponse | None: ...
+
+    async def get(self, key: str) -> StoredResponse | None: ...
+
+    async def complete(self, key: str, response: StoredResponse, ttl_seconds: int) -> None: ...
+
+    async def release(self, key: str) -> None: ...
+
+
+class RedisIdempotencyStore:
+    prefix = "idem:"
+
+    async def reserve(self, key: str, fingerprint: str, lock_seconds: int) -> StoredResponse | None:
+        client = get_async_redis_client()
+        claimed = await client.set(self.prefix + key, StoredResponse(fingerprint).dumps(), nx=True, ex=lock_seconds)
+        if claimed:
+            return None
+        existing = await self.get(key)
+        if existing is None:
+            # Expired between SET NX and GET; claim it on the next attempt.
+            return await self.reserve(key, fingerprint, lock_seconds)
+        return existing
+
+    async def get(self, key: str) -> StoredResponse | None:
+        raw = await get_async_redis_client().get(self.prefix + key)
+        return StoredResponse.loads(raw) if raw else None
+
+    async def complete(self, key: str, response: StoredResponse, ttl_seconds: int) -> None:
+        await get_async_redis_client().set(self.prefix + key, response.dumps(), ex=ttl_seconds)
+
+    async def release(self, key: str) -> None:
+        await get_async_redis_client().delete(self.prefix + key)
+
+
+class DatabaseIdempotencyStore:
+    purge_interval_seconds = 300.0
+
+    def __init__(self, session_factory: Callable[[], Session]) -> None:
+        self.session_factory = session_factory
+        self._next_purge = 0.0
+
+    def _row_to_response(self, row: IdempotencyKey) -> StoredResponse:
+        headers = tuple((k.encode("latin-1"), v.encode("latin-1")) for k, v in row.headers or ())
+        return StoredResponse(row.fingerprint, row.status_code, headers, row.body or b"")
+
+    def _reserve(self, key: str, fingerprint: str, lock_seconds: int) -> StoredResponse | None:
+        now = datetime.now(UTC)
+        with self.session_factory() as db:
+            if time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + self.purge_interval_seconds
+                db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < now))
+            else:
+                db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.expires_at < now))
+            db.add(IdempotencyKey(key=key, fingerprint=fingerprint, expires_at=now + timedelta(seconds=lock_seconds)))
+            try:
+                db.commit()
+                return None
+            except IntegrityError:
+                db.rollback()
+            row = db.get(IdempotencyKey, key)
+            return self._row_to_response(row) if row else self._reserve(key, fingerprint, lock_seconds)
+
+    def _get(self, key: str) -> StoredResponse | None:
+        with self.session_factory() as db:
+            # Compared in SQL: SQLite hands the column back naive, PostgreSQL aware.
+            row = db.scalar(
+                select(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.expires_at >= datetime.now(UTC))
+            )
+            if row is None:
+                return None
+            return self._row_to_response(row)
+
+    def _complete(self, key: str, response: StoredResponse, ttl_seconds: int) -> None:
+        with self.session_factory() as db:
+            row = db.get(IdempotencyKey, key) or IdempotencyKey(key=key)
+            row.fingerprint = response.fingerprint
+            row.status_code = response.status
+            row.headers = [[k.decode("latin-1"), v.decode("latin-1")] for k, v in response.headers]
+            row.body = response.body
+            row.expires_at = datetime.now(UTC) + timedelta(seconds=ttl_seconds)
+            db.add(row)
+            db.commit()
+
+    def _release(self, key: str) -> None:
+        with self.session_factory() as db:
+            db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)))
+            db.commit()
+
+    async def reserve(self, key: str, fingerprint: str, lock_seconds: int) -> StoredResponse | None:
+        return await run_in_threadpool(self._reserve, key, fingerprint, lock_seconds)
+
+    async def get(self, key: str) -> StoredResponse | None:
+        return await run_in_threadpool(self._get, key)
+
+    async def complete(self, key: str, response: StoredResponse, ttl_seconds: int) -> None:
+        await run_in_threadpool(self._complete, key, response, ttl_seconds)
+
+    async def release(self, key: str) -> None:
+        await run_in_threadpool(self._release, key)
+
+
+class FallbackIdempotencyStore:
+    # Redis first; while it is unreachable, keys live in Postgres instead.
+    outage_backoff_seconds = 5.0
+
+    def __init__(self, primary: IdempotencyStore, fallback: IdempotencyStore) -> None:
+        self.primary = primary
+        self.fallback = fallback
+        self._primary_down_until = 0.0
+
+    async def _call(self, method: str, *args: Any) -> Any:
+        if time.monotonic() >= self._primary_down_until:
+            try:
+                return await getattr(self.primary, method)(*args)
+            except RedisError as exc:
+                logger.warning("idempotency store unavailable, falling back to the database: %s", exc)
+                self._primary_down_until = time.monotonic() + self.outage_backoff_seconds
+        return await getattr(self.fallback, method)(*args)
+
+    async def reserve(self, key: str, fingerprint: str, lock_seconds: int) -> StoredResponse | None:
+        return await self._call("reserve", key, fingerprint, lock_seconds)
+
+    async def get(self, key: str) -> StoredResponse | None:
+        return await self._call("get", key)
+
+    async def complete(self, key: str, response: StoredResponse, ttl_seconds: int) -> None:
+        await self._call("complete", key, response, ttl_seconds)
+
+    async def release(self, key: str) -> None:
+        await self._call("release", key)
+
+
+def default_store() -> IdempotencyStore:
+    from app.db import SessionLocal
+
+    database = DatabaseIdempotencyStore(SessionLocal)
+    if get_settings().idempotency_backend == "database":
+        return database
+    return FallbackIdempotencyStore(RedisIdempotencyStore(), database)
+
+
+def _subject(scope: Scope) -> str:
+    cookie_header = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"cookie"), "")
+    access = cookie_parser(cookie_header).get("b2bak_access")
+    if access:
+        try:
+            return f"user:{decode_token(access)['sub']}"
+        except (ValueError, KeyError):
+            pass
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+def _header(scope: Scope, name: bytes) -> str | None:
+    return next((v.decode("latin-1") for k, v in scope["headers"] if k == name), None)
+
+
+class IdempotencyMiddleware:
+    poll_interval_seconds = 0.05
+
+    def __init__(self, app: ASGIApp, store: IdempotencyStore | None = None) -> None:
+        self.app = app
+        settings = get_settings()
+        self.enabled = settings.idempotency_enabled
+        self.ttl_seconds = settings.idempotency_ttl_seconds
+        self.lock_seconds = settings.idempotency_lock_seconds
+        self.max_body_bytes = settings.idempotency_max_body_bytes
+        self.store = store or default_store()
+        # Duplicates arriving at this process while the first is running wait on it instead of polling the store.
+        self._inflight: dict[str, asyncio.Future[StoredResponse | None]] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.enabled or scope["method"] not in MUTATING_METHODS:
+            await self.app(scope, receive, send)
+            return
+        idempotency_key = _header(scope, b"idempotency-key")
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > 255:
+            await _problem(scope, send, 400, "Bad Request", "Idempotency-Key must be 1-255 characters")
+            return
+        length = _header(scope, b"content-length") or "0"
+        if _header(scope, b"transfer-encoding") or not length.isdigit() or int(length) > self.max_body_bytes:
+            # Streamed or large uploads (e.g. bulk import) are not buffered just to be fingerprinted.
+            await self.app(scope, receive, send)
+            return
+        body = await _read_body(receive)
+        digest = hashlib.sha256()
+        for part in (scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body):
+            digest.update(part + b"\0")
+        fingerprint = digest.hexdigest()
+        key = f"{_subject(scope)}:{idempotency_key}"
+        replay_receive = _replay_receive(body, receive)
+
+        while True:
+            waiting = self._inflight.get(key)
+            if waiting is not None:
+                stored = await asyncio.shield(waiting)
+                if stored is None:
+                    continue
+                await self._replay(scope, send, stored, fingerprint)
+                return
+            future: asyncio.Future[StoredResponse | None] = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            try:
+                stored = await self._execute(scope, replay_receive, send, key, fingerprint)
+            except BaseException:
+                future.set_result(None)
+                raise
+            finally:
+                del self._inflight[key]
+            if not future.done():
+                future.set_result(stored)
+            return
+
+    async def _execute(self, scope: Scope, receive: Receive, send: Send, key: str, fingerprint: str) -> StoredResponse | None:
+        try:
+            existing = await self.store.reserve(key, fingerprint, self.lock_seconds)
+        except SQLAlchemyError as exc:
+            # Both stores down: serve the request without idempotency rather than failing it.
+            logger.warning("idempotency store unavailable, passing request through: %s", exc)
+            await self.app(scope, receive, send)
+            return None
+        if existing is not None:
+            # Another process holds the key: wait for its response, up to the lock lifetime.
+            deadline = time.monotonic() + self.lock_seconds
+            while existing is not None and existing.pending and existing.fingerprint == fingerprint:
+                if time.monotonic() >= deadline:
+                    await _problem(scope, send, 409, "Conflict", "A request with this Idempotency-Key is in progress")
+                    return None
+                await asyncio.sleep(self.poll_interval_seconds)
+                existing = await self.store.get(key)
+            if existing is None:
+                return await self._execute(scope, receive, send, key, fingerprint)
+            await self._replay(scope, send, existing, fingerprint)
+            return existing if not existing.pending else None
+
+        status: int | None = None
+        headers: list[tuple[bytes, bytes]] = []
+        chunks: list[bytes] = []
+
+        async def capture(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers.extend(message.get("headers", ()))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        except BaseException:
+            await self.store.release(key)
+            raise
+        stored = StoredResponse(fingerprint, status, tuple(headers), b"".join(chunks))
+        # Server errors stay retryable; responses that set cookies are not written to a shared store.
+        if status is None or status >= 500 or any(k == b"set-cookie" for k, _ in headers):
+            await self.store.release(key)
+            return None
+        await self.store.complete(key, stored, self.ttl_seconds)
+        return stored
+
+    async def _replay(self, scope: Scope, send: Send, stored: StoredResponse, fingerprint: str) -> None:
+        if stored.fingerprint != fingerprint:
+            await _problem(scope, send, 422, "Unprocessable Entity", "Idempotency-Key was already used for a different request")
+            return
+        await send({"type": "http.response.start", "status": stored.status, "headers": [*stored.headers, REPLAYED_HEADER]})
+        await send({"type": "http.response.body", "body": stored.body})
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks: list[bytes] = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _replay_receive(body: bytes, receive: Receive) -> Receive:
+    sent = False
+
+    async def replay() -> Message:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+
+async def _problem(scope: Scope, send: Send, status: int, title: str, detail: str) -> None:
+    state: dict[str, Any] = scope.get("state") or {}
+    body = json.dumps(
+        {"type": "about:blank", "title": title, "status": status, "detail": detail, "request_id": state.get("request_id")}
+    ).encode()
+    headers = [(b"content-type", b"application/problem+json"), (b"content-length", str(len(body)).encode())]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import enum
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from uuid import UUID
+
+from sqlalchemy import ColumnElement, case, cast, select, update
+from sqlalchemy.orm import Session
+
+from app.exceptions import AppError
+from app.models import (
+    Deal,
+    DealStatus,
+    Invoice,
+    InvoiceStatus,
+    Quote,
+    QuoteStatus,
+    Request,
+    RequestStatus,
+)
+from app.rollups import OPEN_QUOTE_STATUSES, bump, move_status, track_open_quote, track_paid_invoice
+
+
+@dataclass(frozen=True)
+class Transition:
+    source: tuple[enum.Enum, ...]
+    target: enum.Enum
+    invalid_detail: str
+    # Re-running a transition that already happened returns the row instead of failing.
+    idempotent: bool = False
+
+
+PUBLISH = Transition((RequestStatus.DRAFT,), RequestStatus.QUOTING, "Request cannot be published", idempotent=True)
+SHORTLIST = Transition((RequestStatus.QUOTING,), RequestStatus.SHORTLIST, "Only quoting requests can be shortlisted")
+AWARD = Transition((RequestStatus.SHORTLIST,), RequestStatus.AWARDED, "Only shortlisted requests can be awarded")
+INVOICE = Transition((DealStatus.NEGOTIATION, DealStatus.CONTRACT), DealStatus.INVOICED, "Deal cannot be invoiced")
+PAY = Transition((DealStatus.INVOICED,), DealStatus.PAID, "Invoice does not exist", idempotent=True)
+
+
+def advance[M: (Request, Deal)](
+    db: Session,
+    model: type[M],
+    entity_id: UUID,
+    transition: Transition,
+    *,
+    scope: tuple[ColumnElement[bool], ...] = (),
+    guards: tuple[ColumnElement[bool], ...] = (),
+    guard_error: AppError | None = None,
+    not_found: str = "Not found",
+) -> tuple[M, enum.Enum | None]:
+    # One guarded UPDATE ... WHERE status = :expected RETURNING per source state (usually just one): the status
+    # check and the write are the same statement, so a concurrent transition makes this one match zero rows
+    # instead of overwriting it. Returns the row and the status it left, or None for an idempotent repeat.
+    for source in transition.source:
+        stmt = (
+            update(model)
+            .where(model.id == entity_id, model.status == source, *scope, *guards)
+            .values(status=transition.target)
+            .returning(model)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        row = db.scalars(stmt).one_or_none()
+        if row is not None:
+            org_ids = [row.buyer_org_id] if model is Request else [row.buyer_org_id, row.vendor_org_id]
+            move_status(db, org_ids, model.__tablename__, source, transition.target)
+            return row, source
+    # Slow path, only on a miss: work out why, for the error response.
+    current = db.scalar(select(model.status).where(model.id == entity_id, *scope))
+    if current is None:
+        raise AppError(404, "Not Found", not_found)
+    if current == transition.target and transition.idempotent:
+        return db.get(model, entity_id, populate_existing=True), None
+    if guard_error is not None and current in transition.source:
+        raise guard_error
+    raise AppError(400, "Invalid State", transition.invalid_detail)
+
+
+def award(db: Session, request_id: UUID, org_id: UUID, winning_quote_id: UUID) -> tuple[Request, Quote, Deal]:
+    is_open = Quote.status.in_(OPEN_QUOTE_STATUSES)
+    winner_exists = select(Quote.id).where(Quote.id == winning_quote_id, Quote.request_id == Request.id, is_open).exists()
+    req, _ = advance(
+        db,
+        Request,
+        request_id,
+        AWARD,
+        scope=(Request.buyer_org_id == org_id,),
+        guards=(winner_exists,),
+        guard_error=AppError(404, "Not Found", "Winning quote not found"),
+        not_found="Request not found",
+    )
+    # All open quotes of the request are decided in one set-based statement instead of one UPDATE per quote;
+    # withdrawn quotes keep their status.
+    outcome = case((Quote.id == winning_quote_id, QuoteStatus.ACCEPTED.value), else_=QuoteStatus.REJECTED.value)
+    stmt = (
+        update(Quote)
+        .where(Quote.request_id == req.id, is_open)
+        .values(status=cast(outcome, Quote.status.type))
+        .returning(Quote)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    decided = db.scalars(stmt).all()
+    for quote in decided:
+        track_open_quote(db, quote.vendor_org_id, req.buyer_org_id, -quote.amount_cents, count=-1)
+    winner = next(quote for quote in decided if quote.id == winning_quote_id)
+    deal = Deal(
+        buyer_org_id=req.buyer_org_id,
+        vendor_org_id=winner.vendor_org_id,
+        request_id=req.id,
+        winning_quote_id=winner.id,
+    )
+    db.add(deal)
+    db.flush()
+    for deal_org_id in (deal.buyer_org_id, deal.vendor_org_id):
+        bump(db, deal_org_id, "deals", DealStatus.NEGOTIATION.value)
+    return req, winner, deal
+
+
+def invoice_deal(db: Session, deal_id: UUID, org_id: UUID) -> tuple[Invoice, bool]:
+    scope = (Deal.buyer_org_id == org_id,)
+    try:
+        deal, _ = advance(db, Deal, deal_id, INVOICE, scope=scope, not_found="Deal not found")
+    except AppError as exc:
+        # Invoicing twice returns the invoice that was already issued.
+        existing = db.scalar(select(Invoice).where(Invoice.deal_id == deal_id)) if exc.status_code == 400 else None
+        if existing is None:
+            raise
+        return existing, False
+    amount = db.scalar(select(Quote.amount_cents).where(Quote.id == deal.winning_quote_id)) if deal.winning_quote_id else None
+    invoice = Invoice(
+        deal_id=deal.id,
+        amount_cents=amount or 0,
+        currency="USD",
+        status=InvoiceStatus.DRAFT,
+        issued_at=datetime.now(UTC),
+    )
+    db.add(invoice)
+    db.flush()
+    return invoice, True
+
+
+def pay_deal(db: Session, deal_id: UUID, org_id: UUID) -> tuple[Deal, Invoice | None]:
+    deal, previous = advance(db, Deal, deal_id, PAY, scope=(Deal.buyer_org_id == org_id,), not_found="Deal not found")
+    if previous is None:
+        return deal, None
+    invoice = db.scalars(
+        update(Invoice)
+        .where(Invoice.deal_id == deal.id, Invoice.status != InvoiceStatus.PAID)
+        .values(status=InvoiceStatus.PAID, paid_at=datetime.now(UTC))
+        .returning(Invoice)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    ).first()
+    if invoice is not None:
+        track_paid_invoice(db, deal, invoice.amount_cents, invoice.paid_at)
+    return deal, invoice
+
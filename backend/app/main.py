@@ -1,15 +1,66 @@
-from fastapi import FastAPI, Request
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
 
+from app.audit import get_audit_sink
 from app.config import get_settings
-from app.exceptions import AppError, app_error_handler
-from app.middleware import RequestIDMiddleware
-from app.routers import audit, auth, deals, helper, invites, messages, notifications, quotes, requests
+from app.db import dispose_async_engine, get_db
+from app.deal_room import get_message_writer
+from app.exceptions import AppError, NotModified, app_error_handler, not_modified_handler
+from app.idempotency import IdempotencyMiddleware
+from app.middleware import RequestIDMiddleware, log_queue
+from app.outbox import outbox_stats
+from app.principals import invalidation_listener
+from app.ratelimit import RateLimitMiddleware
+from app.realtime import hub
+from app.redis_pool import close_async_pool, close_pools, get_pool, pool_stats
+from app.routers import (
+    async_reads,
+    audit,
+    auth,
+    avatars,
+    dashboard,
+    deals,
+    helper,
+    invites,
+    messages,
+    notifications,
+    quotes,
+    requests,
+)
 
 settings = get_settings()
-app = FastAPI(title="B2BAK API", version="0.1.0")
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    log_queue.start()
+    get_pool(decode_responses=True)
+    get_pool(decode_responses=False)
+    invalidation_listener.start()
+    get_audit_sink().start()
+    await hub.start()
+    await get_message_writer().start()
+    yield
+    await get_message_writer().stop()
+    await hub.stop()
+    get_audit_sink().stop()
+    invalidation_listener.stop()
+    await close_async_pool()
+    close_pools()
+    await dispose_async_engine()
+    log_queue.stop()
+
+
+app = FastAPI(title="B2BAK API", version="0.1.0", lifespan=lifespan)
+
+# Innermost: rate-limited retries never reach the idempotency store.
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(RequestIDMiddleware)
 app.add_middleware(
     CORSMiddleware,
@@ -19,6 +70,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.add_exception_handler(AppError, app_error_handler)
+app.add_exception_handler(NotModified, not_modified_handler)
 
 
 @app.exception_handler(Exception)
@@ -41,6 +93,16 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/health/redis")
+def health_redis() -> dict[str, dict[str, object]]:
+    return pool_stats()
+
+
+@app.get("/health/outbox")
+def health_outbox(db: Session = Depends(get_db)) -> dict[str, object]:
+    return outbox_stats(db)
+
+
 @app.get("/")
 def root() -> dict[str, str]:
     return {
@@ -51,12 +113,17 @@ def root() -> dict[str, str]:
     }
 
 
+if settings.db_async:
+    # First match wins, so the async read handlers shadow their sync counterparts.
+    app.include_router(async_reads.router)
 app.include_router(auth.router)
 app.include_router(requests.router)
 app.include_router(quotes.router)
 app.include_router(deals.router)
 app.include_router(messages.router)
 app.include_router(audit.router)
+app.include_router(dashboard.router)
 app.include_router(notifications.router)
 app.include_router(invites.router)
 app.include_router(helper.router)
+app.include_router(avatars.router)
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import heapq
+import logging
+import math
+import threading
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import Listing, Notification, Request, Role, User, VendorProfile
+from app.realtime import notification_event, publish_many
+from app.unread import adjust as adjust_unread
+
+logger = logging.getLogger("b2bak.matching")
+
+NOTIFY_ROLES = [Role.ORG_OWNER, Role.ADMIN, Role.VENDOR]
+# A request tag naming one of the vendor's regions counts for less than a capability match.
+REGION_WEIGHT = 0.5
+WATERMARK_OVERLAP = timedelta(seconds=30)
+
+
+def normalize(values: Iterable[str] | None) -> set[str]:
+    return {value.strip().lower() for value in values or () if value and value.strip()}
+
+
+class MatchingIndex:
+    # Inverted index over vendor capabilities (profile industries, listing categories and tags) and regions.
+    # Scoring only walks the postings of the request's own tags, so cost follows matches, not vendor count.
+    def __init__(self) -> None:
+        self._terms: dict[str, set[UUID]] = defaultdict(set)
+        self._regions: dict[str, set[UUID]] = defaultdict(set)
+        # Lowest min_budget_cents across a vendor's listings; vendors without listings take any budget.
+        self._min_budget: dict[UUID, int] = {}
+        self._vendors: set[UUID] = set()
+        self._watermark: datetime | None = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._vendors)
+
+    def add_profile(self, org_id: UUID, industries: Iterable[str] | None, regions: Iterable[str] | None) -> None:
+        with self._lock:
+            self._vendors.add(org_id)
+            for term in normalize(industries):
+                self._terms[term].add(org_id)
+            for region in normalize(regions):
+                self._regions[region].add(org_id)
+
+    def add_listing(self, org_id: UUID, category: str | None, tags: Iterable[str] | None, min_budget_cents: int) -> None:
+        with self._lock:
+            self._vendors.add(org_id)
+            for term in normalize([category or "", *(tags or ())]):
+                self._terms[term].add(org_id)
+            current = self._min_budget.get(org_id)
+            self._min_budget[org_id] = min_budget_cents if current is None else min(current, min_budget_cents)
+
+    def refresh(self, db: Session, full_rebuild_seconds: float) -> None:
+        # Profiles and listings are append-mostly: pick up new rows past the watermark, and rebuild
+        # periodically to fold in edits and deletions.
+        if time.monotonic() - self._built_at >= full_rebuild_seconds:
+            with self._lock:
+                self._terms.clear()
+                self._regions.clear()
+                self._min_budget.clear()
+                self._vendors.clear()
+                self._watermark = None
+                self._built_at = time.monotonic()
+        since = self._watermark
+        profiles = select(VendorProfile.org_id, VendorProfile.industries, VendorProfile.regions, VendorProfile.created_at)
+        listings = select(Listing.vendor_org_id, Listing.category, Listing.tags, Listing.min_budget_cents, Listing.created_at)
+        if since is not None:
+            # created_at is stamped before commit, so a row can become visible after a later-stamped one that
+            # moved the watermark; re-reading an overlap catches it. Adding a row twice is a no-op.
+            since -= WATERMARK_OVERLAP
+            profiles = profiles.where(VendorProfile.created_at >= since)
+            listings = listings.where(Listing.created_at >= since)
+        watermark = self._watermark
+        for org_id, industries, regions, created_at in db.execute(profiles.execution_options(yield_per=5_000)):
+            self.add_profile(org_id, industries, regions)
+            watermark = created_at if watermark is None or created_at > watermark else watermark
+        for org_id, category, tags, min_budget, created_at in db.execute(listings.execution_options(yield_per=5_000)):
+            self.add_listing(org_id, category, tags, min_budget or 0)
+            watermark = created_at if watermark is None or created_at > watermark else watermark
+        self._watermark = watermark
+
+    def match(
+        self, tags: Iterable[str], budget_cents: int, limit: int, exclude: Iterable[UUID] = ()
+    ) -> list[tuple[UUID, float]]:
+        terms = normalize(tags)
+        excluded = set(exclude)
+        scores: dict[UUID, float] = defaultdict(float)
+        with self._lock:
+            total = max(len(self._vendors), 1)
+            for postings, weight in [(self._terms, 1.0), (self._regions, REGION_WEIGHT)]:
+                for term in terms:
+                    vendors = postings.get(term)
+                    if not vendors:
+                        continue
+                    # Rare capabilities say more about fit than ones every vendor lists.
+                    idf = weight * math.log(1 + total / len(vendors))
+                    for org_id in vendors:
+                        scores[org_id] += idf
+            min_budget = self._min_budget
+            candidates = (
+                (org_id, score)
+                for org_id, score in scores.items()
+                if org_id not in excluded and min_budget.get(org_id, 0) <= budget_cents
+            )
+            return heapq.nlargest(limit, candidates, key=lambda item: item[1])
+
+
+_index = MatchingIndex()
+
+
+def get_matching_index() -> MatchingIndex:
+    return _index
+
+
+def _insert_new(db: Session) -> Any:
+    module = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    stmt = module.insert(Notification).on_conflict_do_nothing(index_elements=["user_id", "dedupe_key"])
+    return stmt.returning(Notification.id)
+
+
+def notify_matches(db: Session, request_id: UUID) -> int:
+    settings = get_settings()
+    req = db.get(Request, request_id)
+    if req is None:
+        return 0
+    started = time.perf_counter()
+    index = get_matching_index()
+    index.refresh(db, settings.matching_full_rebuild_seconds)
+    matches = index.match(req.tags, req.budget_cents, settings.matching_top_k, exclude=[req.buyer_org_id])
+    if not matches:
+        return 0
+    score_by_org = dict(matches)
+    payload_base = {
+        "request_id": str(req.id),
+        "title": req.title,
+        "budget_cents": req.budget_cents,
+        "message": f"New request matching your profile: {req.title}",
+        "href": f"/marketplace/requests/{req.id}",
+    }
+    recipients = db.execute(
+        select(User.id, User.org_id).where(User.org_id.in_(list(score_by_org)), User.role.in_(NOTIFY_ROLES))
+    ).all()
+    chunk_size = settings.matching_insert_chunk_size
+    created = 0
+    for start in range(0, len(recipients), chunk_size):
+        rows: list[dict[str, Any]] = [
+            {
+                "id": uuid.uuid4(),
+                "org_id": org_id,
+                "user_id": user_id,
+                "type": "request.match",
+                "dedupe_key": f"request.match:{req.id}",
+                "payload": {**payload_base, "score": round(score_by_org[org_id], 3)},
+                "created_at": datetime.now(UTC),
+            }
+            for user_id, org_id in recipients[start : start + chunk_size]
+        ]
+        # Core executemany (multi-row VALUES) per chunk; committed and pushed chunk by chunk so
+        # the first vendors hear about the request before the last chunk is written. A requeued job
+        # re-runs every chunk: recipients notified by the failed attempt conflict on the dedupe key.
+        inserted = set(db.scalars(_insert_new(db), rows))
+        db.commit()
+        rows = [row for row in rows if row["id"] in inserted]
+        # Core inserts skip the ORM flush hooks in app.realtime and app.unread, so both are done here.
+        publish_many([(f"user:{row['user_id']}", notification_event(Notification(**row))) for row in rows])
+        adjust_unread({row["user_id"]: 1 for row in rows})
+        created += len(rows)
+    logger.info(
+        "request %s matched %d vendor orgs, %d notifications in %.0f ms",
+        request_id,
+        len(matches),
+        created,
+        (time.perf_counter() - started) * 1000,
+    )
+    return created
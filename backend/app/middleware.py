@@ -1,29 +1,115 @@
 import logging
+import random
 import time
 import uuid
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import get_settings
 
 logger = logging.getLogger("b2bak.api")
 
+LONG_POLL = "long_poll"
+
+
+def mark_long_poll(request: Request) -> None:
+    # Called by handlers that hold the response until something happens (?wait=).
+    request.state.long_poll = True
+
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):  # type: ignore[no-untyped-def]
-        request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
-        request.state.request_id = request_id
+class RequestIDMiddleware:
+    # Plain ASGI: no per-request task or body buffering, so streaming responses (SSE) pass straight through.
+    def __init__(self, app: ASGIApp, sample_rate: float | None = None, slow_ms: float | None = None) -> None:
+        self.app = app
+        settings = get_settings()
+        self.sample_rate = settings.access_log_sample_rate if sample_rate is None else sample_rate
+        self.slow_ms = settings.access_log_slow_ms if slow_ms is None else slow_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = Headers(scope=scope).get("x-request-id") or str(uuid.uuid4())
+        # Read back as request.state.request_id by the error handlers.
+        scope.setdefault("state", {})["request_id"] = request_id
         started = time.perf_counter()
-        response = await call_next(request)
-        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
-        response.headers["X-Request-ID"] = request_id
-        logger.info(
+        status_code = 500
+        first_byte: float | None = None
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code, first_byte
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                first_byte = time.perf_counter()
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            finished = time.perf_counter()
+            # For SSE elapsed_ms is the stream's lifetime; ttfb_ms is what the handler took to answer and is what
+            # "slow" is judged by. A long poll waits before its first byte by design, so it is never "slow".
+            ttfb_ms = round(((first_byte or finished) - started) * 1000, 2)
+            slow = ttfb_ms >= self.slow_ms and not scope["state"].get(LONG_POLL)
+            self._log(scope, request_id, status_code, round((finished - started) * 1000, 2), ttfb_ms, slow)
+
+    def _log(
+        self, scope: Scope, request_id: str, status_code: int, elapsed_ms: float, ttfb_ms: float, slow: bool
+    ) -> None:
+        # Errors and slow requests are always kept; the rest is sampled before the record is even built.
+        always = status_code >= 500 or slow
+        if not always and (not logger.isEnabledFor(logging.INFO) or random.random() >= self.sample_rate):
+            return
+        logger.log(
+            logging.WARNING if always else logging.INFO,
             "request",
             extra={
                 "request_id": request_id,
-                "method": request.method,
-                "path": request.url.path,
-                "status_code": response.status_code,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status_code": status_code,
                 "elapsed_ms": elapsed_ms,
+                "ttfb_ms": ttfb_ms,
+                # Lets aggregations scale sampled counts back up.
+                "sample_rate": 1.0 if always else self.sample_rate,
             },
         )
-        return response
+
+
+class LogQueue:
+    # Moves the handlers of the app's loggers behind a queue drained by a background thread, so formatting
+    # and writing log lines never happen on the event loop.
+    def __init__(self, logger_name: str = "b2bak") -> None:
+        self.logger = logging.getLogger(logger_name)
+        self._listener: QueueListener | None = None
+        self._handlers: list[logging.Handler] = []
+        self._propagate = True
+
+    def start(self) -> None:
+        if self._listener is not None:
+            return
+        self._handlers = list(self.logger.handlers)
+        self._propagate = self.logger.propagate
+        targets = self._handlers or logging.getLogger().handlers or [logging.StreamHandler()]
+        queue: SimpleQueue[logging.LogRecord] = SimpleQueue()
+        self._listener = QueueListener(queue, *targets, respect_handler_level=True)
+        self.logger.handlers = [QueueHandler(queue)]
+        self.logger.propagate = False
+        self._listener.start()
+
+    def stop(self) -> None:
+        if self._listener is None:
+            return
+        # Flushes whatever is still queued.
+        self._listener.stop()
+        self._listener = None
+        self.logger.handlers = self._handlers
+        self.logger.propagate = self._propagate
+
+
+log_queue = LogQueue()
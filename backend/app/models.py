@@ -2,10 +2,10 @@ from __future__ import annotations
 
 import enum
 import uuid
-from datetime import date, datetime
+from datetime import UTC, date, datetime
 from typing import Any
 
-from sqlalchemy import JSON, Date, DateTime, Enum, ForeignKey, Integer, String, Text, UUID, UniqueConstraint
+from sqlalchemy import JSON, BigInteger, Date, DateTime, Enum, ForeignKey, Index, Integer, LargeBinary, String, Text, UUID, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db import Base
@@ -32,6 +32,11 @@ class RequestStatus(str, enum.Enum):
     CLOSED = "CLOSED"
 
 
+# Requests vendors can browse; also the predicate of the partial ix_requests_marketplace_created_at index.
+MARKETPLACE_STATUSES = (RequestStatus.PUBLISHED, RequestStatus.QUOTING, RequestStatus.SHORTLIST)
+MARKETPLACE_PREDICATE = "status IN ({})".format(", ".join(f"'{status.value}'" for status in MARKETPLACE_STATUSES))
+
+
 class QuoteStatus(str, enum.Enum):
     SUBMITTED = "SUBMITTED"
     UPDATED = "UPDATED"
@@ -109,8 +114,19 @@ class Listing(Base):
 
 class Request(Base):
     __tablename__ = "requests"
+    # List pages filter by owner or by marketplace status and order by (created_at, id); see app.query_plans.
+    __table_args__ = (
+        Index("ix_requests_buyer_org_id_created_at", "buyer_org_id", "created_at", "id"),
+        Index(
+            "ix_requests_marketplace_created_at",
+            "created_at",
+            "id",
+            postgresql_where=text(MARKETPLACE_PREDICATE),
+            sqlite_where=text(MARKETPLACE_PREDICATE),
+        ),
+    )
     id: Mapped[uuid.UUID] = uuid_pk()
-    buyer_org_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("organizations.id"), index=True)
+    buyer_org_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("organizations.id"))
     title: Mapped[str] = mapped_column(String(255))
     description: Mapped[str] = mapped_column(Text)
     budget_cents: Mapped[int] = mapped_column(Integer)
@@ -125,9 +141,13 @@ class Request(Base):
 
 class Quote(Base):
     __tablename__ = "quotes"
+    __table_args__ = (
+        Index("ix_quotes_request_id_created_at", "request_id", "created_at", "id"),
+        Index("ix_quotes_vendor_org_id_created_at", "vendor_org_id", "created_at", "id"),
+    )
     id: Mapped[uuid.UUID] = uuid_pk()
-    request_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("requests.id"), index=True)
-    vendor_org_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("organizations.id"), index=True)
+    request_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("requests.id"))
+    vendor_org_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("organizations.id"))
     amount_cents: Mapped[int] = mapped_column(Integer)
     timeline_days: Mapped[int] = mapped_column(Integer)
     terms: Mapped[str] = mapped_column(Text)
@@ -137,11 +157,31 @@ class Quote(Base):
     request: Mapped[Request] = relationship(back_populates="quotes")
 
 
+class RequestQuoteStats(Base):
+    # Rollup kept in step with the quotes of a request; withdrawn quotes are not counted.
+    __tablename__ = "request_quote_stats"
+    request_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("requests.id"), primary_key=True)
+    quote_count: Mapped[int] = mapped_column(Integer, default=0)
+    min_amount_cents: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    median_amount_cents: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    max_amount_cents: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    fastest_timeline_days: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    awarded_amount_cents: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Sorted multisets behind the summary columns, so a change is a bisect instead of a rescan of the quotes.
+    amounts: Mapped[list[int]] = mapped_column(JSON, default=list)
+    timelines: Mapped[list[int]] = mapped_column(JSON, default=list)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class Deal(Base):
     __tablename__ = "deals"
+    __table_args__ = (
+        Index("ix_deals_buyer_org_id_created_at", "buyer_org_id", "created_at", "id"),
+        Index("ix_deals_vendor_org_id_created_at", "vendor_org_id", "created_at", "id"),
+    )
     id: Mapped[uuid.UUID] = uuid_pk()
-    buyer_org_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("organizations.id"), index=True)
-    vendor_org_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("organizations.id"), index=True)
+    buyer_org_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("organizations.id"))
+    vendor_org_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("organizations.id"))
     request_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("requests.id"), index=True)
     winning_quote_id: Mapped[uuid.UUID | None] = mapped_column(ForeignKey("quotes.id"), nullable=True)
     status: Mapped[DealStatus] = mapped_column(Enum(DealStatus, name="deal_status_enum"), default=DealStatus.NEGOTIATION)
@@ -162,8 +202,9 @@ class Invoice(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (Index("ix_messages_deal_id_created_at", "deal_id", "created_at"),)
     id: Mapped[uuid.UUID] = uuid_pk()
-    deal_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("deals.id"), index=True)
+    deal_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("deals.id"))
     sender_user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), index=True)
     body: Mapped[str] = mapped_column(Text)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
@@ -171,10 +212,25 @@ class Message(Base):
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_user_id_created_at", "user_id", "created_at", "id"),
+        # Unread badge, unread-only pages and bulk mark-read only ever touch this small slice.
+        Index(
+            "ix_notifications_unread_user_id_created_at",
+            "user_id",
+            "created_at",
+            "id",
+            postgresql_where=text("read_at IS NULL"),
+            sqlite_where=text("read_at IS NULL"),
+        ),
+        # Lets a retried fan-out job skip recipients it already notified; NULL keys never conflict.
+        Index("uq_notifications_user_id_dedupe_key", "user_id", "dedupe_key", unique=True),
+    )
     id: Mapped[uuid.UUID] = uuid_pk()
     org_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("organizations.id"), index=True)
-    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), index=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"))
     type: Mapped[str] = mapped_column(String(80), index=True)
+    dedupe_key: Mapped[str | None] = mapped_column(String(120), nullable=True)
     payload: Mapped[dict[str, Any]] = mapped_column(JSON, default=dict)
     read_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, index=True)
@@ -182,8 +238,9 @@ class Notification(Base):
 
 class Invite(Base):
     __tablename__ = "invites"
+    __table_args__ = (Index("ix_invites_org_id_created_at", "org_id", "created_at"),)
     id: Mapped[uuid.UUID] = uuid_pk()
-    org_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("organizations.id"), index=True)
+    org_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("organizations.id"))
     email: Mapped[str] = mapped_column(String(320), index=True)
     role: Mapped[Role] = mapped_column(Enum(Role, name="role_enum"), default=Role.VIEWER)
     status: Mapped[str] = mapped_column(String(32), default="PENDING", index=True)
@@ -193,20 +250,57 @@ class Invite(Base):
 
 class AuditLog(Base):
     __tablename__ = "audit_log"
+    # Range-partitioned by month on Postgres (see app.audit_archive); the partition key has to be part of the PK.
+    __table_args__ = (Index("ix_audit_log_org_id_created_at", "org_id", "created_at"),)
     id: Mapped[uuid.UUID] = uuid_pk()
-    org_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("organizations.id"), index=True)
+    org_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("organizations.id"))
     actor_user_id: Mapped[uuid.UUID | None] = mapped_column(ForeignKey("users.id"), nullable=True)
-    action: Mapped[str] = mapped_column(String(120), index=True)
-    entity: Mapped[str] = mapped_column(String(120), index=True)
-    entity_id: Mapped[str] = mapped_column(String(120), index=True)
+    action: Mapped[str] = mapped_column(String(120))
+    entity: Mapped[str] = mapped_column(String(120))
+    entity_id: Mapped[str] = mapped_column(String(120))
     payload: Mapped[dict[str, Any]] = mapped_column(JSON, default=dict)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, primary_key=True)
 
 
 class IdempotencyKey(Base):
+    # Database fallback for the idempotency middleware; status_code is NULL while the first request is in flight.
     __tablename__ = "idempotency_keys"
-    __table_args__ = (UniqueConstraint("org_id", "key", "endpoint", name="uq_idempotency"),)
-    org_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("organizations.id"), primary_key=True)
-    key: Mapped[str] = mapped_column(String(120), primary_key=True)
-    endpoint: Mapped[str] = mapped_column(String(255), primary_key=True)
+    key: Mapped[str] = mapped_column(String(400), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64))
+    status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    headers: Mapped[list[list[str]] | None] = mapped_column(JSON, nullable=True)
+    body: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+
+
+class OutboxJob(Base):
+    # Background jobs written in the same transaction as the change that triggers them; app.outbox relays them to RQ.
+    __tablename__ = "job_outbox"
+    __table_args__ = (
+        Index(
+            "ix_job_outbox_pending",
+            "available_at",
+            postgresql_where=text("dispatched_at IS NULL"),
+            sqlite_where=text("dispatched_at IS NULL"),
+        ),
+    )
+    id: Mapped[uuid.UUID] = uuid_pk()
+    func: Mapped[str] = mapped_column(String(255))
+    args: Mapped[list[Any]] = mapped_column(JSON, default=list)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+    available_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+    dispatched_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class OrgRollup(Base):
+    # Per-org dashboard counters, e.g. ("requests", "QUOTING") or ("invoices_paid_cents", "2026-03").
+    # Kept current by app.rollups in the same transaction as the change; the PK prefix serves GET /dashboard.
+    __tablename__ = "org_rollups"
+    org_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("organizations.id"), primary_key=True)
+    metric: Mapped[str] = mapped_column(String(40), primary_key=True)
+    bucket: Mapped[str] = mapped_column(String(40), primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from uuid import UUID, uuid4
+
+from redis.exceptions import RedisError
+from rq import Queue
+from rq.job import Job
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.models import OutboxJob
+
+logger = logging.getLogger("b2bak.outbox")
+
+
+def enqueue(db: Session, job: Callable[..., Any] | str, *args: Any) -> OutboxJob:
+    # Only staged on the session: the job exists iff the caller's transaction commits.
+    path = job if isinstance(job, str) else f"{job.__module__}.{job.__qualname__}"
+    row = OutboxJob(id=uuid4(), func=path, args=list(args))
+    db.add(row)
+    return row
+
+
+def rq_job_id(outbox_id: UUID) -> str:
+    # Stable per outbox row, so a relay that crashes between enqueue and commit does not enqueue twice.
+    return f"outbox-{outbox_id.hex}"
+
+
+@dataclass(frozen=True)
+class RelayResult:
+    dispatched: int = 0
+    failed: int = 0
+    max_lag_seconds: float = 0.0
+
+
+def _age_seconds(now: datetime, then: datetime) -> float:
+    # SQLite hands timestamps back naive; they are stored in UTC.
+    return (now - (then if then.tzinfo else then.replace(tzinfo=UTC))).total_seconds()
+
+
+class OutboxRelay:
+    retry_base_seconds = 1.0
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        queue_factory: Callable[[], Queue],
+        batch_size: int,
+        max_backoff_seconds: float,
+    ) -> None:
+        self.session_factory = session_factory
+        self.queue_factory = queue_factory
+        self.batch_size = batch_size
+        self.max_backoff_seconds = max_backoff_seconds
+
+    def relay_once(self) -> RelayResult:
+        now = datetime.now(UTC)
+        with self.session_factory() as db:
+            # SKIP LOCKED lets several relays drain the same table without handing out a row twice.
+            rows = db.scalars(
+                select(OutboxJob)
+                .where(OutboxJob.dispatched_at.is_(None), OutboxJob.available_at <= now)
+                .order_by(OutboxJob.available_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not rows:
+                return RelayResult()
+            try:
+                queue = self.queue_factory()
+                job_ids = [rq_job_id(row.id) for row in rows]
+                known = {job.id for job in Job.fetch_many(job_ids, connection=queue.connection) if job is not None}
+                # One pipeline for the whole batch.
+                queue.enqueue_many(
+                    [
+                        Queue.prepare_data(row.func, args=tuple(row.args), job_id=job_id)
+                        for row, job_id in zip(rows, job_ids, strict=True)
+                        if job_id not in known
+                    ]
+                )
+            except RedisError as exc:
+                for row in rows:
+                    row.attempts += 1
+                    row.last_error = str(exc)[:1000]
+                    delay = min(self.retry_base_seconds * 2 ** (row.attempts - 1), self.max_backoff_seconds)
+                    row.available_at = now + timedelta(seconds=delay)
+                db.commit()
+                logger.warning("outbox relay could not reach RQ, %d jobs rescheduled: %s", len(rows), exc)
+                return RelayResult(failed=len(rows))
+            for row in rows:
+                row.dispatched_at = now
+            max_lag = max(_age_seconds(now, row.created_at) for row in rows)
+            db.commit()
+        logger.info("outbox relayed %d jobs, max lag %.0f ms", len(rows), max_lag * 1000)
+        return RelayResult(dispatched=len(rows), max_lag_seconds=max_lag)
+
+
+def purge_dispatched(db: Session, older_than: timedelta) -> int:
+    cutoff = datetime.now(UTC) - older_than
+    result = db.execute(delete(OutboxJob).where(OutboxJob.dispatched_at.is_not(None), OutboxJob.dispatched_at < cutoff))
+    db.commit()
+    return result.rowcount
+
+
+def outbox_stats(db: Session) -> dict[str, Any]:
+    pending, oldest, retrying = db.execute(
+        select(
+            func.count(),
+            func.min(OutboxJob.created_at),
+            func.count().filter(OutboxJob.attempts > 0),
+        ).where(OutboxJob.dispatched_at.is_(None))
+    ).one()
+    return {
+        "pending": pending,
+        "retrying": retrying,
+        "oldest_pending_seconds": round(_age_seconds(datetime.now(UTC), oldest), 3) if oldest else 0.0,
+    }
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import base64
+import binascii
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.exceptions import AppError
+from app.schemas import Paginated
+
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|", maxsplit=1)
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise AppError(400, "Bad Request", "Invalid cursor") from exc
+
+
+def _keyset(ordered: Select[Any], model: Any, cursor: str) -> Select[Any]:
+    if not cursor:
+        return ordered
+    created_at, row_id = decode_cursor(cursor)
+    return ordered.where(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+
+
+def keyset_query(query: Select[Any], model: Any, cursor: str, limit: int) -> Select[Any]:
+    ordered = query.order_by(model.created_at.desc(), model.id.desc())
+    return _keyset(ordered, model, cursor).limit(limit)
+
+
+def _cursor_page(rows: Sequence[Any], schema: Any, page_size: int) -> Paginated:
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    return Paginated(
+        items=[schema.model_validate(row) for row in rows],
+        page_size=page_size,
+        next_cursor=encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None,
+    )
+
+
+def _offset_page(rows: Sequence[Any], schema: Any, page: int, page_size: int, total: int) -> Paginated:
+    has_more = page * page_size < total
+    return Paginated(
+        items=[schema.model_validate(row) for row in rows],
+        page=page,
+        page_size=page_size,
+        total=total,
+        next_cursor=encode_cursor(rows[-1].created_at, rows[-1].id) if rows and has_more else None,
+    )
+
+
+def paginate(
+    db: Session,
+    query: Select[Any],
+    model: Any,
+    *,
+    schema: Any,
+    page: int,
+    page_size: int,
+    cursor: str | None,
+) -> Paginated:
+    ordered = query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor is not None:
+        # Keyset mode: one range scan on (created_at, id), no COUNT. An empty cursor starts from the newest row.
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        rows = db.scalars(keyset_query(query, model, cursor, page_size + 1)).all()
+        return _cursor_page(rows, schema, page_size)
+    page = max(1, page)
+    total = db.scalar(select(func.count()).select_from(query.subquery())) or 0
+    rows = db.scalars(ordered.offset((page - 1) * page_size).limit(page_size)).all()
+    return _offset_page(rows, schema, page, page_size, total)
+
+
+async def paginate_async(
+    db: AsyncSession,
+    query: Select[Any],
+    model: Any,
+    *,
+    schema: Any,
+    page: int,
+    page_size: int,
+    cursor: str | None,
+) -> Paginated:
+    ordered = query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor is not None:
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        rows = (await db.scalars(keyset_query(query, model, cursor, page_size + 1))).all()
+        return _cursor_page(rows, schema, page_size)
+    page = max(1, page)
+    total = await db.scalar(select(func.count()).select_from(query.subquery())) or 0
+    rows = (await db.scalars(ordered.offset((page - 1) * page_size).limit(page_size))).all()
+    return _offset_page(rows, schema, page, page_size, total)
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Any
+from uuid import UUID
+
+from redis.exceptions import RedisError
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.config import get_settings
+from app.models import Organization, User
+from app.redis_pool import get_redis_client
+
+logger = logging.getLogger("b2bak.principals")
+
+INVALIDATION_CHANNEL = "b2bak:principal:invalidate"
+
+
+@dataclass(frozen=True)
+class Principal:
+    # Detached, never-mutated snapshots; requests get their own copy via Session.merge(load=False).
+    user: User
+    org: Organization | None = None
+
+
+def snapshot[T](obj: T) -> T:
+    mapper = inspect(obj).mapper
+    copy = mapper.class_(**{attr.key: getattr(obj, attr.key) for attr in mapper.column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+class PrincipalCache:
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[UUID, tuple[float, Principal]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: UUID) -> Principal | None:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def put(self, principal: Principal) -> None:
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[principal.user.id] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(principal.user.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put_org(self, user_id: UUID, org: Organization) -> None:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries[user_id] = (entry[0], replace(entry[1], org=org))
+
+    def invalidate_user(self, user_id: UUID) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def invalidate_org(self, org_id: UUID) -> None:
+        with self._lock:
+            for user_id in [uid for uid, (_, p) in self._entries.items() if p.user.org_id == org_id]:
+                del self._entries[user_id]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+settings = get_settings()
+principal_cache = PrincipalCache(settings.principal_cache_max_entries, settings.principal_cache_ttl_seconds)
+
+
+def _apply_invalidation(message: str) -> None:
+    kind, _, raw_id = message.partition(":")
+    try:
+        target = UUID(raw_id)
+    except ValueError:
+        return
+    if kind == "user":
+        principal_cache.invalidate_user(target)
+    elif kind == "org":
+        principal_cache.invalidate_org(target)
+
+
+def publish_invalidations(messages: list[str]) -> None:
+    for message in messages:
+        _apply_invalidation(message)
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        for message in messages:
+            pipe.publish(INVALIDATION_CHANNEL, message)
+        pipe.execute()
+    except RedisError as exc:
+        # Other workers fall back to the TTL for this change.
+        logger.warning("principal invalidation publish failed: %s", exc)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_invalidations(session: Session, _flush_context: Any) -> None:
+    pending: set[str] = session.info.setdefault("principal_invalidations", set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            pending.add(f"user:{obj.id}")
+        elif isinstance(obj, Organization):
+            pending.add(f"org:{obj.id}")
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_on_commit(session: Session) -> None:
+    pending = session.info.pop("principal_invalidations", None)
+    if pending:
+        publish_invalidations(sorted(pending))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_on_rollback(session: Session, _previous_transaction: Any) -> None:
+    session.info.pop("principal_invalidations", None)
+
+
+class InvalidationListener:
+    def __init__(self) -> None:
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None or principal_cache.ttl_seconds <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="principal-invalidation", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                pubsub = get_redis_client().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Anything published while we were not subscribed is lost, so start from empty.
+                principal_cache.clear()
+                backoff = 1.0
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        _apply_invalidation(str(message["data"]))
+                pubsub.close()
+            except RedisError:
+                logger.warning("principal invalidation listener disconnected; retrying in %.0fs", backoff)
+                principal_cache.clear()
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+
+invalidation_listener = InvalidationListener()
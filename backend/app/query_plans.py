@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import json
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import Connection, Select, event, func, select, update
+from sqlalchemy.sql import Executable
+
+from app.models import AuditLog, Deal, Invite, Notification, Quote, Request, Role, User
+from app.pagination import encode_cursor, keyset_query
+from app.routers.deals import deals_query
+from app.routers.messages import deal_messages_query
+from app.routers.notifications import notifications_query
+from app.routers.requests import visible_requests_query
+
+
+@dataclass(frozen=True)
+class PlannedQuery:
+    name: str
+    statement: Executable
+    # Tables that must be reached through an index; a full scan of any of them is a regression.
+    tables: tuple[str, ...]
+    # Whether the ORDER BY has to come from the index rather than a separate sort step.
+    index_ordered: bool = True
+
+
+def _page(query: Select[Any], model: Any) -> Select[Any]:
+    # The keyset page the list routers run for ?cursor=, i.e. the hot path of every infinite-scroll list.
+    return keyset_query(query, model, encode_cursor(datetime.now(UTC), uuid.uuid4()), 21)
+
+
+def router_queries() -> list[PlannedQuery]:
+    # The router's own query builders, so a change to a filter shows up here without touching this list.
+    org_id, user_id, deal_id, request_id = (uuid.uuid4() for _ in range(4))
+    buyer = User(id=user_id, org_id=org_id, role=Role.BUYER)
+    vendor = User(id=user_id, org_id=org_id, role=Role.VENDOR)
+    return [
+        PlannedQuery("requests.buyer", _page(visible_requests_query(buyer, None), Request), ("requests",)),
+        PlannedQuery("requests.marketplace", _page(visible_requests_query(vendor, None), Request), ("requests",)),
+        PlannedQuery("quotes.vendor", _page(select(Quote).where(Quote.vendor_org_id == org_id), Quote), ("quotes",)),
+        PlannedQuery("quotes.request", _page(select(Quote).where(Quote.request_id == request_id), Quote), ("quotes",)),
+        # Buyer-or-vendor OR: two index range scans merged, then a sort of the (small) union.
+        PlannedQuery("deals.party", _page(deals_query(buyer, None), Deal), ("deals",), index_ordered=False),
+        PlannedQuery("messages.deal", deal_messages_query(deal_id, before=(datetime.now(UTC), uuid.uuid4())), ("messages",)),
+        PlannedQuery("notifications.all", _page(notifications_query(buyer, False), Notification), ("notifications",)),
+        PlannedQuery("notifications.unread", _page(notifications_query(buyer, True), Notification), ("notifications",)),
+        PlannedQuery(
+            "notifications.unread_count",
+            select(func.count()).where(Notification.user_id == user_id, Notification.read_at.is_(None)),
+            ("notifications",),
+        ),
+        PlannedQuery(
+            "notifications.mark_read_before",
+            update(Notification)
+            .where(Notification.user_id == user_id, Notification.read_at.is_(None), Notification.created_at <= datetime.now(UTC))
+            .values(read_at=datetime.now(UTC)),
+            ("notifications",),
+            index_ordered=False,
+        ),
+        PlannedQuery("invites.org", select(Invite).where(Invite.org_id == org_id).order_by(Invite.created_at.desc()), ("invites",)),
+        PlannedQuery("audit.org", _page(select(AuditLog).where(AuditLog.org_id == org_id), AuditLog), ("audit_log",)),
+    ]
+
+
+@contextmanager
+def _explaining(conn: Connection, prefix: str) -> Iterator[None]:
+    # Prefixing at the cursor keeps SQLAlchemy's own parameter processing and literal rendering intact.
+    def hook(_conn: Any, _cursor: Any, statement: str, parameters: Any, _context: Any, _executemany: bool) -> tuple[str, Any]:
+        return f"{prefix} {statement}", parameters
+
+    event.listen(conn, "before_cursor_execute", hook, retval=True)
+    try:
+        yield
+    finally:
+        event.remove(conn, "before_cursor_execute", hook)
+
+
+def explain(conn: Connection, statement: Executable) -> list[str]:
+    if conn.dialect.name == "postgresql":
+        with _explaining(conn, "EXPLAIN (FORMAT JSON)"):
+            raw = conn.execute(statement).cursor.fetchone()[0]
+        plan = json.loads(raw) if isinstance(raw, str) else raw
+        return list(_pg_nodes(plan[0]["Plan"]))
+    # pysqlite caches prepared statements by SQL text, and a cached EXPLAIN keeps reporting the plan it was
+    # prepared with even after indexes change; a unique comment forces a fresh prepare.
+    with _explaining(conn, f"/* {uuid.uuid4().hex} */ EXPLAIN QUERY PLAN"):
+        return [row[3] for row in conn.execute(statement).cursor.fetchall()]
+
+
+def _pg_nodes(node: dict[str, Any]) -> Iterator[str]:
+    yield f"{node['Node Type']} {node.get('Relation Name', '')}".strip()
+    for child in node.get("Plans", ()):
+        yield from _pg_nodes(child)
+
+
+def _full_scan_of(step: str) -> str | None:
+    # SQLite: "SCAN t" is a full table scan, "SCAN t USING [COVERING] INDEX ix" walks an index in order.
+    # Postgres: "Seq Scan t"; partitions of audit_log show up as audit_log_YYYY_MM.
+    words = [word for word in step.split() if word != "TABLE"]
+    if words[:1] == ["SCAN"] and "INDEX" not in words:
+        return words[1]
+    if words[:2] == ["Seq", "Scan"] and len(words) > 2:
+        return words[2]
+    return None
+
+
+def regressions(query: PlannedQuery, plan: list[str]) -> list[str]:
+    problems = []
+    for step in plan:
+        table = _full_scan_of(step)
+        if table is not None and table.startswith(query.tables):
+            problems.append(f"full scan: {step}")
+        if query.index_ordered and ("USE TEMP B-TREE FOR ORDER BY" in step or step == "Sort"):
+            problems.append(f"sort not served by an index: {step}")
+    return problems
+
+
+def check(conn: Connection) -> dict[str, list[str]]:
+    if conn.dialect.name == "postgresql":
+        # Small or freshly seeded tables make a seq scan legitimately cheaper; disabling it for the check
+        # means a seq scan in the plan can only mean there is no usable index.
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        conn.exec_driver_sql("SET LOCAL enable_sort = off")
+    failures = {}
+    for query in router_queries():
+        problems = regressions(query, explain(conn, query.statement))
+        if problems:
+            failures[query.name] = problems
+    return failures
@@ -1,15 +1,40 @@
-from rq import Queue
+import logging
+from typing import Any
+from uuid import UUID
+
+from rq import Queue, Worker
+from sqlalchemy.exc import SQLAlchemyError
 
 from app.config import get_settings
-from app.deps import get_redis
+from app.db import SessionLocal, engine
+from app.matching import get_matching_index, notify_matches
+from app.redis_pool import get_redis_client
+
+logger = logging.getLogger("b2bak.queue")
 
 
 def get_queue() -> Queue:
-    settings = get_settings()
-    redis_conn = get_redis()
-    return Queue("b2bak", connection=redis_conn, default_timeout=300)
+    return Queue("b2bak", connection=get_redis_client(decode_responses=False), default_timeout=300)
 
 
 def publish_notification_job(request_id: str) -> None:
-    # Minimal background worker task for publish events.
-    print(f"[worker] Request published notification for {request_id}")
+    with SessionLocal() as db:
+        notify_matches(db, UUID(request_id))
+
+
+class MatchingWorker(Worker):
+    # Refreshes the matching index in the long-lived parent before each fork, so every job starts
+    # from a warm index instead of rebuilding it from the database (`rq worker -w app.queue.MatchingWorker`).
+    def execute_job(self, job: Any, queue: Queue) -> Any:
+        try:
+            with SessionLocal() as db:
+                get_matching_index().refresh(db, get_settings().matching_full_rebuild_seconds)
+        except SQLAlchemyError as exc:
+            logger.warning("matching index refresh failed: %s", exc)
+        return super().execute_job(job, queue)
+
+    def main_work_horse(self, job: Any, queue: Queue) -> None:
+        # The forked horse inherits the parent's pooled connections (checked out for the refresh above); drop
+        # them without closing, so the horse opens its own and never shares a socket with the parent.
+        engine.dispose(close=False)
+        super().main_work_horse(job, queue)
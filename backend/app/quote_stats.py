@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from collections.abc import Iterable
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models import QuoteStatus, RequestQuoteStats
+
+# (amount_cents, timeline_days) of one counted quote.
+Bid = tuple[int, int]
+
+COUNTED_STATUSES = frozenset({QuoteStatus.SUBMITTED, QuoteStatus.UPDATED, QuoteStatus.ACCEPTED, QuoteStatus.REJECTED})
+
+
+def summarize(amounts: list[int], timelines: list[int]) -> dict[str, Any]:
+    count = len(amounts)
+    if not count:
+        median = None
+    elif count % 2:
+        median = amounts[count // 2]
+    else:
+        median = (amounts[count // 2 - 1] + amounts[count // 2]) // 2
+    return {
+        "quote_count": count,
+        "min_amount_cents": amounts[0] if amounts else None,
+        "median_amount_cents": median,
+        "max_amount_cents": amounts[-1] if amounts else None,
+        "fastest_timeline_days": timelines[0] if timelines else None,
+    }
+
+
+def _remove(values: list[int], value: int) -> None:
+    index = bisect_left(values, value)
+    if index < len(values) and values[index] == value:
+        values.pop(index)
+
+
+def _locked(db: Session, request_id: UUID) -> RequestQuoteStats:
+    # FOR UPDATE serializes concurrent quotes on the same request, so no change to the lists is lost.
+    query = select(RequestQuoteStats).where(RequestQuoteStats.request_id == request_id).with_for_update()
+    stats = db.scalar(query)
+    if stats is not None:
+        return stats
+    dialect = db.get_bind().dialect.name
+    values = {"request_id": request_id, "quote_count": 0, "amounts": [], "timelines": []}
+    if dialect in ("postgresql", "sqlite"):
+        module = postgresql if dialect == "postgresql" else sqlite
+        db.execute(module.insert(RequestQuoteStats).values(**values).on_conflict_do_nothing(index_elements=["request_id"]))
+    else:
+        db.execute(insert(RequestQuoteStats).values(**values))
+    return db.scalar(query.execution_options(populate_existing=True))
+
+
+def update_quote_stats(db: Session, request_id: UUID, added: Iterable[Bid] = (), removed: Iterable[Bid] = ()) -> RequestQuoteStats:
+    stats = _locked(db, request_id)
+    amounts, timelines = list(stats.amounts), list(stats.timelines)
+    for amount, timeline in removed:
+        _remove(amounts, amount)
+        _remove(timelines, timeline)
+    for amount, timeline in added:
+        insort(amounts, amount)
+        insort(timelines, timeline)
+    # New list objects: in-place changes to a JSON column are not tracked.
+    stats.amounts, stats.timelines = amounts, timelines
+    for field, value in summarize(amounts, timelines).items():
+        setattr(stats, field, value)
+    return stats
+
+
+def record_award(db: Session, request_id: UUID, amount_cents: int) -> None:
+    _locked(db, request_id).awarded_amount_cents = amount_cents
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Literal, Protocol
+
+from redis.exceptions import NoScriptError, RedisError
+from starlette.datastructures import MutableHeaders
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import get_settings
+from app.redis_pool import get_async_redis_client
+from app.security import decode_token
+
+logger = logging.getLogger("b2bak.ratelimit")
+
+# Token bucket in one atomic step. Uses Redis server time so workers with skewed clocks agree.
+# Grants the full lease only while the bucket is well above it, otherwise one token at a time.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local lease = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+local granted = 0
+if tokens >= lease * 2 then
+  granted = lease
+elseif tokens >= 1 then
+  granted = 1
+end
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return {granted, tostring(tokens)}
+"""
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    path_prefix: str
+    scope: Literal["ip", "org"]
+    per_minute: int
+    burst: int
+    methods: frozenset[str] | None = None
+
+    @property
+    def rate(self) -> float:
+        return self.per_minute / 60
+
+    def matches(self, method: str, path: str) -> bool:
+        return path.startswith(self.path_prefix) and (self.methods is None or method in self.methods)
+
+
+@dataclass(frozen=True)
+class Decision:
+    rule: Rule
+    allowed: bool
+    remaining: int
+    reset_seconds: int
+
+
+class BucketBackend(Protocol):
+    async def acquire(self, key: str, rule: Rule, lease: int) -> tuple[int, float]: ...
+
+
+class RedisBucketBackend:
+    def __init__(self) -> None:
+        self._script_sha: str | None = None
+
+    async def acquire(self, key: str, rule: Rule, lease: int) -> tuple[int, float]:
+        client = get_async_redis_client()
+        args = [rule.rate, rule.burst, lease]
+        if self._script_sha is None:
+            self._script_sha = await client.script_load(TOKEN_BUCKET_LUA)
+        try:
+            granted, tokens = await client.evalsha(self._script_sha, 1, key, *args)
+        except NoScriptError:
+            granted, tokens = await client.eval(TOKEN_BUCKET_LUA, 1, key, *args)
+        return int(granted), float(tokens)
+
+
+class MemoryBucketBackend:
+    # Same semantics as the Lua script, for single-process deployments and tests.
+    def __init__(self) -> None:
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    async def acquire(self, key: str, rule: Rule, lease: int) -> tuple[int, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (float(rule.burst), now))
+            tokens = min(rule.burst, tokens + (now - ts) * rule.rate)
+            granted = lease if tokens >= lease * 2 else (1 if tokens >= 1 else 0)
+            tokens -= granted
+            self._buckets[key] = (tokens, now)
+        return granted, tokens
+
+
+class RateLimiter:
+    lease_ttl_seconds = 1.0
+    outage_backoff_seconds = 5.0
+
+    def __init__(self, rules: list[Rule], backend: BucketBackend, local_lease_fraction: float) -> None:
+        self.rules = rules
+        self.backend = backend
+        self.local_lease_fraction = local_lease_fraction
+        # key -> (leased tokens left, lease expiry, last known remaining in the shared bucket)
+        self._leases: dict[str, tuple[int, float, float]] = {}
+        self._lock = threading.Lock()
+        self._backend_down_until = 0.0
+
+    def _take_local(self, key: str, now: float) -> float | None:
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is None or lease[0] <= 0 or lease[1] < now:
+                return None
+            self._leases[key] = (lease[0] - 1, lease[1], lease[2])
+            return lease[2] + lease[0] - 1
+
+    def _store_lease(self, key: str, tokens: int, now: float, remaining: float) -> None:
+        with self._lock:
+            if len(self._leases) > 50_000:
+                self._leases = {k: v for k, v in self._leases.items() if v[1] >= now}
+            self._leases[key] = (tokens, now + self.lease_ttl_seconds, remaining)
+
+    async def check(self, rule: Rule, key: str) -> Decision:
+        now = time.monotonic()
+        local_remaining = self._take_local(key, now)
+        if local_remaining is not None:
+            return Decision(rule, True, int(local_remaining), math.ceil((rule.burst - local_remaining) / rule.rate))
+        if now < self._backend_down_until:
+            return Decision(rule, True, rule.burst, 0)
+        lease = max(1, int(rule.burst * self.local_lease_fraction))
+        try:
+            granted, tokens = await self.backend.acquire(key, rule, lease)
+        except RedisError as exc:
+            # Fail open: losing Redis must not take the API down with it.
+            logger.warning("rate limit backend unavailable, failing open: %s", exc)
+            self._backend_down_until = now + self.outage_backoff_seconds
+            return Decision(rule, True, rule.burst, 0)
+        if granted == 0:
+            return Decision(rule, False, 0, max(1, math.ceil((1 - tokens) / rule.rate)))
+        if granted > 1:
+            self._store_lease(key, granted - 1, now, tokens)
+        remaining = tokens + granted - 1
+        return Decision(rule, True, int(remaining), math.ceil((rule.burst - remaining) / rule.rate))
+
+
+def default_rules() -> list[Rule]:
+    settings = get_settings()
+    return [
+        Rule("auth-login", "/auth/login", "ip", 10, 10, frozenset({"POST"})),
+        Rule("auth-register", "/auth/register", "ip", 10, 10, frozenset({"POST"})),
+        Rule("auth-refresh", "/auth/refresh", "ip", 20, 20, frozenset({"POST"})),
+        Rule("org", "/", "org", settings.rate_limit_org_per_minute, settings.rate_limit_org_burst),
+    ]
+
+
+def _subject(scope: Scope, rule_scope: str) -> str | None:
+    client = scope.get("client")
+    ip = client[0] if client else "unknown"
+    if rule_scope == "ip":
+        return f"ip:{ip}"
+    cookie_header = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"cookie"), "")
+    access = cookie_parser(cookie_header).get("b2bak_access")
+    if not access:
+        return None
+    try:
+        token = decode_token(access)
+    except ValueError:
+        return None
+    # Tokens issued before the org claim existed are limited per user until they refresh.
+    return f"org:{token['org']}" if token.get("org") else f"user:{token.get('sub')}"
+
+
+class RateLimitMiddleware:
+    exempt_paths = ("/health", "/docs", "/openapi.json", "/redoc")
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter | None = None) -> None:
+        self.app = app
+        settings = get_settings()
+        self.enabled = settings.rate_limit_enabled
+        self.limiter = limiter or RateLimiter(
+            default_rules(),
+            MemoryBucketBackend() if settings.rate_limit_backend == "memory" else RedisBucketBackend(),
+            settings.rate_limit_local_lease_fraction,
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.enabled or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+        decisions: list[Decision] = []
+        for rule in self.limiter.rules:
+            if not rule.matches(scope["method"], scope["path"]):
+                continue
+            subject = _subject(scope, rule.scope)
+            if subject is None:
+                continue
+            decision = await self.limiter.check(rule, f"rl:{rule.name}:{subject}")
+            decisions.append(decision)
+            if not decision.allowed:
+                await self._reject(scope, send, decision)
+                return
+        if not decisions:
+            await self.app(scope, receive, send)
+            return
+        tightest = min(decisions, key=lambda d: d.remaining)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["RateLimit-Limit"] = str(tightest.rule.burst)
+                headers["RateLimit-Remaining"] = str(max(0, tightest.remaining))
+                headers["RateLimit-Reset"] = str(max(0, tightest.reset_seconds))
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    async def _reject(self, scope: Scope, send: Send, decision: Decision) -> None:
+        state: dict[str, Any] = scope.get("state") or {}
+        body = json.dumps(
+            {
+                "type": "about:blank",
+                "title": "Too Many Requests",
+                "status": 429,
+                "detail": "Rate limit exceeded",
+                "request_id": state.get("request_id"),
+            }
+        ).encode()
+        headers = [
+            (b"content-type", b"application/problem+json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(decision.reset_seconds).encode()),
+            (b"ratelimit-limit", str(decision.rule.burst).encode()),
+            (b"ratelimit-remaining", b"0"),
+            (b"ratelimit-reset", str(decision.reset_seconds).encode()),
+        ]
+        await send({"type": "http.response.start", "status": 429, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
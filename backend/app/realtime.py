@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any
+
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import Message, Notification
+from app.pagination import encode_cursor
+from app.redis_pool import get_async_redis_client, get_redis_client
+from app.schemas import MessageOut, NotificationOut
+
+logger = logging.getLogger("b2bak.realtime")
+
+CHANNEL_PREFIX = "b2bak:rt:"
+# Delivered in place of events a subscriber could not keep up with; the consumer should resync from the DB.
+OVERFLOW: dict[str, Any] = {"type": "overflow"}
+
+
+class Subscription:
+    def __init__(self, hub: Hub, topic: str, maxsize: int) -> None:
+        self.hub = hub
+        self.topic = topic
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def offer(self, message: dict[str, Any]) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+
+    async def get(self, timeout: float | None = None) -> dict[str, Any] | None:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    # One Redis pattern subscription per process, fanned out to bounded per-client queues.
+    def __init__(self, queue_size: int) -> None:
+        self.queue_size = queue_size
+        self._subs: dict[str, set[Subscription]] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    def subscribe(self, topic: str) -> Subscription:
+        sub = Subscription(self, topic, self.queue_size)
+        self._subs.setdefault(topic, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        subs = self._subs.get(sub.topic)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self._subs[sub.topic]
+
+    def dispatch(self, topic: str, message: dict[str, Any]) -> None:
+        for sub in list(self._subs.get(topic, ())):
+            sub.offer(message)
+
+    def _drop_all(self) -> None:
+        for subs in list(self._subs.values()):
+            for sub in list(subs):
+                sub.offer(OVERFLOW)
+                sub.overflowed = True
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="realtime-hub")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                pubsub = get_async_redis_client().pubsub(ignore_subscribe_messages=True)
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                backoff = 1.0
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] != "pmessage":
+                            continue
+                        topic = str(message["channel"]).removeprefix(CHANNEL_PREFIX)
+                        try:
+                            self.dispatch(topic, json.loads(message["data"]))
+                        except ValueError:
+                            logger.warning("dropping malformed realtime message on %s", topic)
+                finally:
+                    await pubsub.aclose()
+            except RedisError as exc:
+                # Subscribers may have missed events while disconnected; make them resync.
+                logger.warning("realtime hub disconnected (%s); retrying in %.0fs", exc, backoff)
+                self._drop_all()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+
+hub = Hub(get_settings().realtime_queue_size)
+
+
+def publish(topic: str, message: dict[str, Any]) -> None:
+    publish_many([(topic, message)])
+
+
+def publish_many(messages: list[tuple[str, dict[str, Any]]]) -> None:
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        for topic, message in messages:
+            pipe.publish(f"{CHANNEL_PREFIX}{topic}", json.dumps(message, default=str))
+        pipe.execute()
+    except RedisError as exc:
+        # The rows are committed; connected clients pick them up on their next resync.
+        logger.warning("realtime publish failed: %s", exc)
+
+
+async def publish_async(topic: str, message: dict[str, Any]) -> None:
+    # For ephemeral events raised on the event loop (typing, presence); nothing to persist, so losing one is fine.
+    try:
+        await get_async_redis_client().publish(f"{CHANNEL_PREFIX}{topic}", json.dumps(message, default=str))
+    except RedisError as exc:
+        logger.warning("realtime publish failed: %s", exc)
+
+
+def notification_event(note: Notification) -> dict[str, Any]:
+    return {
+        "type": "notification",
+        "id": encode_cursor(note.created_at, note.id),
+        "data": NotificationOut.model_validate(note).model_dump(mode="json"),
+    }
+
+
+def message_event(msg: Message) -> dict[str, Any]:
+    return {
+        "type": "message",
+        "id": str(msg.id),
+        "data": MessageOut.model_validate(msg).model_dump(mode="json"),
+    }
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_events(session: Session, _flush_context: Any) -> None:
+    # Serialized here because commit expires the instances.
+    events = []
+    for obj in session.new:
+        if isinstance(obj, Notification):
+            events.append((f"user:{obj.user_id}", notification_event(obj)))
+        elif isinstance(obj, Message):
+            events.append((f"deal:{obj.deal_id}", message_event(obj)))
+    if events:
+        session.info.setdefault("realtime_events", []).extend(events)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_on_commit(session: Session) -> None:
+    events = session.info.pop("realtime_events", None)
+    if events:
+        publish_many(events)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_on_rollback(session: Session, _previous_transaction: Any) -> None:
+    session.info.pop("realtime_events", None)
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+from redis import BlockingConnectionPool, Redis
+from redis.asyncio import BlockingConnectionPool as AsyncBlockingConnectionPool
+from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.config import get_settings
+
+
+class MeteredConnectionPool(BlockingConnectionPool):
+    # Blocking so bursts queue for a connection instead of opening more sockets than max_connections.
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.in_use = 0
+        self.checkouts = 0
+        self.checkout_errors = 0
+        self.wait_seconds_total = 0.0
+
+    def get_connection(self, *args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            connection = super().get_connection(*args, **kwargs)
+        except RedisConnectionError:
+            with self._metrics_lock:
+                self.checkout_errors += 1
+            raise
+        with self._metrics_lock:
+            self.in_use += 1
+            self.checkouts += 1
+            self.wait_seconds_total += time.perf_counter() - started
+        return connection
+
+    def release(self, connection: Any) -> None:
+        super().release(connection)
+        with self._metrics_lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def stats(self) -> dict[str, Any]:
+        with self._metrics_lock:
+            return {
+                "max_connections": self.max_connections,
+                "created": len(self._connections),
+                "in_use": self.in_use,
+                "checkouts": self.checkouts,
+                "checkout_errors": self.checkout_errors,
+                "avg_wait_ms": round(self.wait_seconds_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            }
+
+
+_pools: dict[bool, MeteredConnectionPool] = {}
+_pools_lock = threading.Lock()
+_async_pool: AsyncBlockingConnectionPool | None = None
+
+
+def _pool_kwargs() -> dict[str, Any]:
+    settings = get_settings()
+    return {
+        "max_connections": settings.redis_max_connections,
+        "timeout": settings.redis_pool_timeout_seconds,
+        "health_check_interval": settings.redis_health_check_interval,
+        "socket_timeout": settings.redis_socket_timeout_seconds,
+        "socket_connect_timeout": settings.redis_socket_timeout_seconds,
+    }
+
+
+def get_pool(decode_responses: bool = True) -> MeteredConnectionPool:
+    pool = _pools.get(decode_responses)
+    if pool is not None:
+        return pool
+    settings = get_settings()
+    with _pools_lock:
+        if decode_responses not in _pools:
+            _pools[decode_responses] = MeteredConnectionPool.from_url(
+                settings.redis_url, decode_responses=decode_responses, **_pool_kwargs()
+            )
+        return _pools[decode_responses]
+
+
+def get_redis_client(decode_responses: bool = True) -> Redis:
+    # RQ pickles job payloads, so it needs the bytes (decode_responses=False) pool.
+    return Redis(connection_pool=get_pool(decode_responses))
+
+
+def get_async_redis_client() -> AsyncRedis:
+    # Bound to the running event loop; created lazily and closed by the app lifespan.
+    global _async_pool
+    if _async_pool is None:
+        _async_pool = AsyncBlockingConnectionPool.from_url(get_settings().redis_url, decode_responses=True, **_pool_kwargs())
+    return AsyncRedis(connection_pool=_async_pool)
+
+
+async def close_async_pool() -> None:
+    global _async_pool
+    if _async_pool is not None:
+        pool, _async_pool = _async_pool, None
+        await pool.disconnect()
+
+
+def close_pools() -> None:
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.disconnect()
+        _pools.clear()
+
+
+def pool_stats() -> dict[str, dict[str, Any]]:
+    return {("text" if decode else "bytes"): pool.stats() for decode, pool in list(_pools.items())}
+
+
+
+def incr_with_expire(client: Redis, key: str, ttl_seconds: int) -> int:
+    # MULTI/EXEC: one round trip, and the key can never be left without a TTL.
+    pipe = client.pipeline(transaction=True)
+    pipe.incr(key)
+    pipe.expire(key, ttl_seconds, nx=True)
+    current, _ = pipe.execute()
+    return int(current)
+
+
+def get_and_delete_many(client: Redis, *keys: str) -> list[Any]:
+    pipe = client.pipeline(transaction=True)
+    for key in keys:
+        pipe.getdel(key)
+    return pipe.execute()
+
+
+def set_many_with_ttl(client: Redis, values: dict[str, Any], ttl_seconds: int, nx: bool = False) -> list[bool]:
+    # With nx=True a key that already exists keeps its value; the result says which keys were written.
+    pipe = client.pipeline(transaction=True)
+    for key, value in values.items():
+        pipe.set(key, value, ex=ttl_seconds, nx=nx)
+    return [bool(result) for result in pipe.execute()]
+
+
+async def hset_with_expire(client: AsyncRedis, key: str, mapping: dict[str, Any], ttl_seconds: int) -> dict[str, Any]:
+    # Writes the fields, pushes the key's TTL out and reads the whole hash back in one round trip.
+    pipe = client.pipeline(transaction=False)
+    pipe.hset(key, mapping=mapping)
+    pipe.expire(key, ttl_seconds)
+    pipe.hgetall(key)
+    *_, entries = await pipe.execute()
+    return entries
+
+
+async def hdel_and_getall(client: AsyncRedis, key: str, *fields: str) -> dict[str, Any]:
+    pipe = client.pipeline(transaction=False)
+    pipe.hdel(key, *fields)
+    pipe.hgetall(key)
+    _, entries = await pipe.execute()
+    return entries
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import event, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models import Deal, Invoice, InvoiceStatus, OrgRollup, Quote, QuoteStatus, Request
+
+OPEN_QUOTE_STATUSES = (QuoteStatus.SUBMITTED, QuoteStatus.UPDATED)
+
+# (org_id, metric, bucket)
+Key = tuple[UUID, str, str]
+
+
+def bump(db: Session, org_id: UUID, metric: str, bucket: str, delta: int = 1) -> None:
+    # Staged on the session and written by the before_commit hook below, in the caller's transaction.
+    if delta:
+        db.info.setdefault("rollup_deltas", Counter())[(org_id, metric, bucket)] += delta
+
+
+def move_status(db: Session, org_ids: Iterable[UUID], metric: str, previous: Any, current: Any) -> None:
+    for org_id in org_ids:
+        bump(db, org_id, metric, previous.value, -1)
+        bump(db, org_id, metric, current.value, 1)
+
+
+def track_open_quote(db: Session, vendor_org_id: UUID, buyer_org_id: UUID, amount_cents: int, count: int = 1) -> None:
+    # count=1 when a quote opens, -1 when it is withdrawn or decided, 0 when only its amount changes.
+    for org_id, metric in [(vendor_org_id, "open_quotes_submitted"), (buyer_org_id, "open_quotes_received")]:
+        bump(db, org_id, metric, "count", count)
+        bump(db, org_id, metric, "value_cents", amount_cents)
+
+
+def track_paid_invoice(db: Session, deal: Deal, amount_cents: int, paid_at: datetime) -> None:
+    month = f"{paid_at:%Y-%m}"
+    bump(db, deal.buyer_org_id, "invoices_paid_cents", month, amount_cents)
+    bump(db, deal.vendor_org_id, "invoices_earned_cents", month, amount_cents)
+
+
+def apply_deltas(db: Session, deltas: dict[Key, int]) -> None:
+    # One upsert for the whole transaction; sorted so concurrent writers lock rows in the same order.
+    rows = [
+        {"org_id": org_id, "metric": metric, "bucket": bucket, "value": delta}
+        for (org_id, metric, bucket), delta in sorted(deltas.items(), key=lambda item: (str(item[0][0]), *item[0][1:]))
+        if delta
+    ]
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    module = postgresql if dialect == "postgresql" else sqlite
+    stmt = module.insert(OrgRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["org_id", "metric", "bucket"],
+        set_={"value": OrgRollup.value + stmt.excluded.value, "updated_at": func.now()},
+    )
+    db.execute(stmt, rows)
+
+
+@event.listens_for(Session, "before_commit")
+def _write_rollups(session: Session) -> None:
+    deltas = session.info.pop("rollup_deltas", None)
+    if deltas:
+        apply_deltas(session, deltas)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rollups(session: Session, _previous_transaction: Any) -> None:
+    session.info.pop("rollup_deltas", None)
+
+
+def compute_rollups(db: Session) -> Counter[Key]:
+    # Ground truth from the source tables, for the reconciliation job and the initial backfill.
+    truth: Counter[Key] = Counter()
+    for org_id, status, count in db.execute(
+        select(Request.buyer_org_id, Request.status, func.count()).group_by(Request.buyer_org_id, Request.status)
+    ):
+        truth[(org_id, "requests", status.value)] += count
+    for side in (Deal.buyer_org_id, Deal.vendor_org_id):
+        for org_id, status, count in db.execute(select(side, Deal.status, func.count()).group_by(side, Deal.status)):
+            truth[(org_id, "deals", status.value)] += count
+    open_quotes = (
+        select(Quote.vendor_org_id, Request.buyer_org_id, func.count(), func.sum(Quote.amount_cents))
+        .join(Request, Request.id == Quote.request_id)
+        .where(Quote.status.in_(OPEN_QUOTE_STATUSES))
+        .group_by(Quote.vendor_org_id, Request.buyer_org_id)
+    )
+    for vendor_org_id, buyer_org_id, count, total in db.execute(open_quotes):
+        for org_id, metric in [(vendor_org_id, "open_quotes_submitted"), (buyer_org_id, "open_quotes_received")]:
+            truth[(org_id, metric, "count")] += count
+            truth[(org_id, metric, "value_cents")] += total or 0
+    # Month bucketing is done here rather than in SQL so the same code runs on Postgres and SQLite.
+    paid = (
+        select(Deal.buyer_org_id, Deal.vendor_org_id, Invoice.paid_at, Invoice.amount_cents)
+        .join(Deal, Deal.id == Invoice.deal_id)
+        .where(Invoice.status == InvoiceStatus.PAID, Invoice.paid_at.is_not(None))
+    )
+    for buyer_org_id, vendor_org_id, paid_at, amount in db.execute(paid.execution_options(yield_per=10_000)):
+        month = f"{paid_at:%Y-%m}"
+        truth[(buyer_org_id, "invoices_paid_cents", month)] += amount
+        truth[(vendor_org_id, "invoices_earned_cents", month)] += amount
+    return +truth
+
+
+def read_rollups(db: Session) -> Counter[Key]:
+    stored: Counter[Key] = Counter()
+    for org_id, metric, bucket, value in db.execute(select(OrgRollup.org_id, OrgRollup.metric, OrgRollup.bucket, OrgRollup.value)):
+        stored[(org_id, metric, bucket)] = value
+    return stored
+
+
+def drift(truth: Counter[Key], stored: Counter[Key]) -> dict[Key, int]:
+    return {key: truth[key] - stored[key] for key in truth.keys() | stored.keys() if truth[key] != stored[key]}
@@ -0,0 +1,141 @@
+from collections.abc import Sequence
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query
+from fastapi import Request as HTTPRequest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.conditional import Conditional, conditional
+from app.db import get_async_db
+from app.deps import get_current_user_async
+from app.exceptions import AppError
+from app.middleware import mark_long_poll
+from app.models import Deal, DealStatus, Message, Notification, Request, RequestStatus, User
+from app.pagination import paginate_async
+from app.realtime import hub
+from app.routers.deals import deals_query, is_deal_party
+from app.routers.messages import (
+    LONG_POLL_MAX_SECONDS,
+    MESSAGE_PAGE_MAX,
+    MESSAGE_PAGE_SIZE,
+    check_page_params,
+    chronological,
+    deal_messages_query,
+    message_anchor_query,
+    wait_for_message,
+)
+from app.routers.notifications import notifications_query
+from app.routers.requests import check_request_head, request_head_query, visible_requests_query
+from app.schemas import DealOut, MessageOut, NotificationOut, Paginated, RequestOut
+from app.search import apply_search
+
+# Async (AsyncSession) versions of the read-heavy endpoints. Mounted ahead of the sync routers when
+# DB_ASYNC is enabled, so these paths resolve here and everything else keeps the threadpool handlers.
+router = APIRouter(tags=["async-reads"])
+
+
+@router.get("/requests", response_model=Paginated, tags=["requests"])
+async def list_requests(
+    status: RequestStatus | None = None,
+    search: str | None = None,
+    page: int = 1,
+    page_size: int = 20,
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user_async),
+) -> Paginated:
+    query = visible_requests_query(user, status)
+    if search:
+        query = await db.run_sync(apply_search, query, search, ranked=cursor is None)
+    return await paginate_async(db, query, Request, schema=RequestOut, page=page, page_size=page_size, cursor=cursor)
+
+
+@router.get("/requests/{request_id}", response_model=RequestOut, tags=["requests"])
+async def get_request(
+    request_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user_async),
+    cond: Conditional = Depends(conditional),
+) -> Request:
+    check_request_head((await db.execute(request_head_query(request_id))).first(), user, cond)
+    return await db.get(Request, request_id)
+
+
+@router.get("/deals", response_model=Paginated, tags=["deals"])
+async def list_deals(
+    status: DealStatus | None = None,
+    page: int = 1,
+    page_size: int = 20,
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user_async),
+) -> Paginated:
+    query = deals_query(user, status)
+    return await paginate_async(db, query, Deal, schema=DealOut, page=page, page_size=page_size, cursor=cursor)
+
+
+async def _message_anchor(db: AsyncSession, deal_id: UUID, message_id: UUID | None) -> tuple[datetime, UUID] | None:
+    if message_id is None:
+        return None
+    created_at = await db.scalar(message_anchor_query(deal_id, message_id))
+    if created_at is None:
+        raise AppError(400, "Bad Request", "Unknown message cursor")
+    return created_at, message_id
+
+
+async def _read_messages(
+    db: AsyncSession, user: User, deal_id: UUID, before: UUID | None, after: UUID | None, limit: int
+) -> list[Message]:
+    deal = await db.get(Deal, deal_id)
+    if not is_deal_party(deal, user):
+        raise AppError(404, "Not Found", "Deal not found")
+    query = deal_messages_query(
+        deal_id,
+        before=await _message_anchor(db, deal_id, before),
+        after=await _message_anchor(db, deal_id, after),
+        limit=limit,
+    )
+    return chronological((await db.scalars(query)).all(), after)
+
+
+@router.get("/deals/{deal_id}/messages", response_model=list[MessageOut], tags=["messages"])
+async def list_messages(
+    deal_id: UUID,
+    http_request: HTTPRequest,
+    before: UUID | None = None,
+    after: UUID | None = None,
+    limit: int = Query(default=MESSAGE_PAGE_SIZE, ge=1, le=MESSAGE_PAGE_MAX),
+    wait: float = Query(default=0, ge=0, le=LONG_POLL_MAX_SECONDS),
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user_async),
+) -> Sequence[Message]:
+    check_page_params(before, after, wait)
+    sub = hub.subscribe(f"deal:{deal_id}") if wait else None
+    try:
+        messages = await _read_messages(db, user, deal_id, before, after, limit)
+        if messages or sub is None:
+            return messages
+        await db.close()
+        mark_long_poll(http_request)
+        if not await wait_for_message(sub, wait):
+            return []
+        return await _read_messages(db, user, deal_id, None, after, limit)
+    finally:
+        if sub is not None:
+            sub.close()
+
+
+@router.get("/notifications", response_model=Paginated, tags=["notifications"])
+async def list_notifications(
+    page: int = 1,
+    page_size: int = 20,
+    unread_only: bool = False,
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user_async),
+) -> Paginated:
+    query = notifications_query(user, unread_only)
+    return await paginate_async(
+        db, query, Notification, schema=NotificationOut, page=page, page_size=page_size, cursor=cursor
+    )
@@ -1,13 +1,27 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import func, select
+import csv
+import io
+import json
+import zlib
+from collections.abc import Iterator
+from datetime import UTC, datetime
+from typing import Any, Literal
+
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import Session
 
+from app.audit_archive import COLUMNS, get_audit_archive
 from app.deps import get_current_user, get_db
 from app.models import AuditLog, User
+from app.pagination import decode_cursor, encode_cursor, paginate
 from app.schemas import AuditOut, Paginated
 
 router = APIRouter(prefix="/audit", tags=["audit"])
 
+EXPORT_FETCH_SIZE = 2_000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
 
 @router.get("", response_model=Paginated)
 def list_audit(
@@ -15,6 +29,7 @@ def list_audit(
     page_size: int = 20,
     entity: str | None = None,
     action: str | None = None,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ) -> Paginated:
@@ -23,6 +38,113 @@ def list_audit(
         query = query.where(AuditLog.entity == entity)
     if action:
         query = query.where(AuditLog.action == action)
-    total = db.scalar(select(func.count()).select_from(query.subquery())) or 0
-    items = db.scalars(query.order_by(AuditLog.created_at.desc()).offset((page - 1) * page_size).limit(page_size)).all()
-    return Paginated(items=[AuditOut.model_validate(item) for item in items], page=page, page_size=page_size, total=total)
+    result = paginate(db, query, AuditLog, schema=AuditOut, page=page, page_size=page_size, cursor=cursor)
+    if cursor is None or result.next_cursor is not None:
+        return result
+    # Keyset pages run on past the live partitions into the cold archive; offset pages cover live rows only.
+    return get_audit_archive().extend_page(result, user.org_id, cursor, entity=entity, action=action)
+
+
+def _export_record(row: dict[str, Any]) -> dict[str, Any]:
+    created_at = row["created_at"]
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=UTC)
+    record = {column: (str(row[column]) if column.endswith("id") and row[column] is not None else row[column]) for column in COLUMNS}
+    record["created_at"] = created_at.isoformat()
+    # Pass as ?after= to resume an interrupted export right after this row.
+    record["cursor"] = encode_cursor(created_at, row["id"])
+    return record
+
+
+def _format_ndjson(records: Iterator[dict[str, Any]]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record, separators=(",", ":"), default=str) + "\n"
+
+
+def _format_csv(records: Iterator[dict[str, Any]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([*COLUMNS, "cursor"])
+    for record in records:
+        writer.writerow([json.dumps(record["payload"]) if column == "payload" else record[column] for column in [*COLUMNS, "cursor"]])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _chunked(lines: Iterator[str], gzip: bool) -> Iterator[bytes]:
+    # Coalesce rows into ~64 KiB writes and compress incrementally; memory stays flat for any range size.
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+    pending: list[bytes] = []
+    size = 0
+    for line in lines:
+        data = line.encode()
+        pending.append(data)
+        size += len(data)
+        if size >= EXPORT_CHUNK_BYTES:
+            block = b"".join(pending)
+            pending, size = [], 0
+            out = compressor.compress(block) if compressor else block
+            if out:
+                yield out
+    block = b"".join(pending)
+    if compressor:
+        yield compressor.compress(block) + compressor.flush()
+    elif block:
+        yield block
+
+
+@router.get("/export")
+def export_audit(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    since: datetime | None = None,
+    until: datetime | None = None,
+    entity: str | None = None,
+    action: str | None = None,
+    after: str | None = None,
+    accept_encoding: str = Header(default=""),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    after_key = decode_cursor(after) if after else None
+    query = select(*AuditLog.__table__.c).where(AuditLog.org_id == user.org_id)
+    if since:
+        query = query.where(AuditLog.created_at >= since)
+    if until:
+        query = query.where(AuditLog.created_at < until)
+    if entity:
+        query = query.where(AuditLog.entity == entity)
+    if action:
+        query = query.where(AuditLog.action == action)
+    if after_key:
+        query = query.where(tuple_(AuditLog.created_at, AuditLog.id) > tuple_(*after_key))
+    query = query.order_by(AuditLog.created_at.asc(), AuditLog.id.asc())
+    org_id = user.org_id
+    bind = db.get_bind()
+
+    def records() -> Iterator[dict[str, Any]]:
+        # Archived months come first (they are older than anything live), then the live partitions.
+        archived = get_audit_archive().iter_ascending(
+            org_id, since=since, until=until, after=after_key, entity=entity, action=action
+        )
+        for row in archived:
+            yield _export_record(row)
+        # A dedicated session: the request-scoped one may be closed before the body is streamed.
+        with Session(bind=bind) as stream_db:
+            # Core rows (no identity map) fetched through a server-side cursor, EXPORT_FETCH_SIZE at a time.
+            result = stream_db.execute(query.execution_options(yield_per=EXPORT_FETCH_SIZE))
+            for row in result.mappings():
+                yield _export_record(dict(row))
+
+    lines = _format_csv(records()) if format == "csv" else _format_ndjson(records())
+    use_gzip = "gzip" in accept_encoding.lower()
+    filename = f"audit-{datetime.now(UTC):%Y%m%dT%H%M%SZ}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"}
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(_chunked(lines, use_gzip), media_type=media_type, headers=headers)
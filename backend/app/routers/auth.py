@@ -3,15 +3,18 @@ from datetime import timedelta
 from uuid import UUID
 
 import httpx
-from fastapi import APIRouter, Cookie, Depends, Query, Request, Response
+from fastapi import APIRouter, Cookie, Depends, Query, Response
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 from urllib.parse import urlencode
 
+from app.avatars import AvatarError, get_avatar_store, store_data_url
+from app.conditional import Conditional, conditional
 from app.config import get_settings
 from app.deps import clear_auth_cookies, get_current_org, get_current_user, get_db, get_redis, set_auth_cookies
 from app.exceptions import AppError
 from app.models import BuyerProfile, Organization, Role, User, VendorProfile
+from app.redis_pool import get_and_delete_many
 from app.schemas import (
     LoginPayload,
     MeOut,
@@ -30,14 +33,6 @@ OAUTH_PROVIDER_GOOGLE = "google"
 OAUTH_PROVIDER_GITHUB = "github"
 
 
-def _rate_limit(redis_client, key: str, limit: int = 10, window_seconds: int = 60) -> None:
-    current = redis_client.incr(key)
-    if current == 1:
-        redis_client.expire(key, window_seconds)
-    if int(current) > limit:
-        raise AppError(429, "Too Many Requests", "Rate limit exceeded")
-
-
 def _provider_exists(provider: str) -> bool:
     return provider in {OAUTH_PROVIDER_GOOGLE, OAUTH_PROVIDER_GITHUB}
 
@@ -175,28 +170,22 @@ def _exchange_provider_code(provider: str, code: str) -> tuple[str, str | None]:
 @router.post("/login", response_model=UserOut)
 def login(
     payload: LoginPayload,
-    request: Request,
     response: Response,
     db: Session = Depends(get_db),
 ) -> User:
-    redis_client = get_redis()
-    _rate_limit(redis_client, f"rl:login:{request.client.host if request.client else 'unknown'}")
     user = db.scalar(select(User).where(User.email == payload.email.lower()))
     if not user or not verify_password(payload.password, user.password_hash):
         raise AppError(401, "Unauthorized", "Invalid credentials")
-    set_auth_cookies(response, user.id)
+    set_auth_cookies(response, user.id, user.org_id)
     return user
 
 
 @router.post("/register", response_model=UserOut)
 def register(
     payload: RegisterPayload,
-    request: Request,
     response: Response,
     db: Session = Depends(get_db),
 ) -> User:
-    redis_client = get_redis()
-    _rate_limit(redis_client, f"rl:register:{request.client.host if request.client else 'unknown'}", limit=10)
     existing = db.scalar(select(User).where(User.email == payload.email))
     if existing is not None:
         raise AppError(409, "Conflict", "User with this email already exists")
@@ -219,7 +208,7 @@ def register(
         db.add(VendorProfile(org_id=org.id, company_name=payload.org_name, industries=[], regions=[]))
     db.commit()
     db.refresh(user)
-    set_auth_cookies(response, user.id)
+    set_auth_cookies(response, user.id, user.org_id)
     return user
 
 
@@ -247,15 +236,13 @@ def oauth_exchange(
     if not _provider_exists(provider):
         raise AppError(400, "Bad Request", "Unsupported provider")
     redis_client = get_redis()
-    state_key = f"oauth:state:{payload.state}"
-    intent = redis_client.get(state_key)
-    redis_client.delete(state_key)
+    (intent,) = get_and_delete_many(redis_client, f"oauth:state:{payload.state}")
     if intent is None:
         raise AppError(401, "Unauthorized", "Invalid or expired OAuth state")
     email, provider_subject = _exchange_provider_code(provider, payload.code)
     user = db.scalar(select(User).where(User.email == email))
     if user is not None:
-        set_auth_cookies(response, user.id)
+        set_auth_cookies(response, user.id, user.org_id)
         return OAuthExchangeOut(status="authenticated", user=UserOut.model_validate(user))
     settings = get_settings()
     one_time_nonce = secrets.token_urlsafe(24)
@@ -293,8 +280,7 @@ def oauth_complete_registration(
     if not nonce:
         raise AppError(401, "Unauthorized", "Invalid verification token")
     redis_client = get_redis()
-    value = redis_client.get(f"oauth:verify:{nonce}")
-    redis_client.delete(f"oauth:verify:{nonce}")
+    (value,) = get_and_delete_many(redis_client, f"oauth:verify:{nonce}")
     if value is None:
         raise AppError(401, "Unauthorized", "Expired verification token")
     parts = value.split("|", maxsplit=3)
@@ -304,7 +290,7 @@ def oauth_complete_registration(
     role = Role[payload.role]
     existing = db.scalar(select(User).where(User.email == email))
     if existing is not None:
-        set_auth_cookies(response, existing.id)
+        set_auth_cookies(response, existing.id, existing.org_id)
         return existing
     org_name = f"{email.split('@', maxsplit=1)[0].replace('.', ' ').replace('_', ' ').title()} Workspace"
     org = Organization(name=org_name)
@@ -324,7 +310,7 @@ def oauth_complete_registration(
         db.add(VendorProfile(org_id=org.id, company_name=f"{email.split('@', maxsplit=1)[0]} Ltd", industries=[], regions=[]))
     db.commit()
     db.refresh(user)
-    set_auth_cookies(response, user.id)
+    set_auth_cookies(response, user.id, user.org_id)
     return user
 
 
@@ -336,13 +322,10 @@ def logout(response: Response) -> dict[str, str]:
 
 @router.post("/refresh")
 def refresh(
-    request: Request,
     response: Response,
     b2bak_refresh: str | None = Cookie(default=None),
     db: Session = Depends(get_db),
 ) -> dict[str, str]:
-    redis_client = get_redis()
-    _rate_limit(redis_client, f"rl:refresh:{request.client.host if request.client else 'unknown'}", limit=20)
     if b2bak_refresh is None:
         raise AppError(401, "Unauthorized", "Missing refresh token")
     try:
@@ -354,7 +337,7 @@ def refresh(
     user = db.get(User, UUID(token["sub"]))
     if not user:
         raise AppError(401, "Unauthorized", "Invalid refresh token")
-    set_auth_cookies(response, user.id)
+    set_auth_cookies(response, user.id, user.org_id)
     return {"message": "refreshed"}
 
 
@@ -362,12 +345,20 @@ def refresh(
 def me(
     user: User = Depends(get_current_user),
     org: Organization = Depends(get_current_org),
+    cond: Conditional = Depends(conditional),
 ) -> MeOut:
+    # Both come from the principal cache; users have no updated_at, so the tag hashes the exposed fields.
+    cond.check(*_profile_fields(user), org.id, org.name)
     return MeOut(user=user, organization=org)
 
 
+def _profile_fields(user: User) -> list[object]:
+    return [getattr(user, field) for field in UserOut.model_fields]
+
+
 @router.get("/profile", response_model=UserOut)
-def profile(user: User = Depends(get_current_user)) -> User:
+def profile(user: User = Depends(get_current_user), cond: Conditional = Depends(conditional)) -> User:
+    cond.check(*_profile_fields(user))
     return user
 
 
@@ -380,7 +371,14 @@ def update_profile(
     if payload.display_name is not None:
         user.display_name = payload.display_name
     if payload.avatar_url is not None:
-        user.avatar_url = payload.avatar_url
+        avatar_url = payload.avatar_url
+        if avatar_url.startswith("data:"):
+            # Stored once by content hash; the users row only keeps the short /avatars/<digest> reference.
+            try:
+                avatar_url = store_data_url(get_avatar_store(), avatar_url)
+            except AvatarError as exc:
+                raise AppError(422, "Unprocessable Entity", str(exc)) from exc
+        user.avatar_url = avatar_url
     if payload.theme_preference is not None:
         user.theme_preference = payload.theme_preference
     if payload.locale is not None:
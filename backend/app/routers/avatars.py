@@ -0,0 +1,28 @@
+from typing import Literal
+
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import FileResponse
+
+from app.avatars import get_avatar_store
+from app.exceptions import AppError
+
+router = APIRouter(prefix="/avatars", tags=["avatars"])
+
+
+@router.get("/{digest}")
+def get_avatar(
+    digest: str,
+    request: Request,
+    size: Literal["orig", "sm", "md"] = "orig",
+) -> Response:
+    found = get_avatar_store().open(digest, size)
+    if found is None:
+        raise AppError(404, "Not Found", "Avatar not found")
+    path, media_type = found
+    # Content-addressed, so a given URL never changes: strong ETag plus an immutable year-long cache.
+    etag = f'"{digest}-{size}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
@@ -0,0 +1,29 @@
+from collections import defaultdict
+
+from fastapi import APIRouter, Depends
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.deps import get_current_user, get_db
+from app.models import DealStatus, OrgRollup, RequestStatus, User
+from app.schemas import DashboardOut, OpenQuotesOut
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+
+@router.get("", response_model=DashboardOut)
+def get_dashboard(db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> DashboardOut:
+    # One primary-key range read of the org's rollup rows instead of COUNT/SUM scans over requests, deals and invoices.
+    metrics: dict[str, dict[str, int]] = defaultdict(dict)
+    for metric, bucket, value in db.execute(
+        select(OrgRollup.metric, OrgRollup.bucket, OrgRollup.value).where(OrgRollup.org_id == user.org_id)
+    ):
+        metrics[metric][bucket] = value
+    return DashboardOut(
+        requests={status.value: metrics["requests"].get(status.value, 0) for status in RequestStatus},
+        deals={status.value: metrics["deals"].get(status.value, 0) for status in DealStatus},
+        open_quotes_submitted=OpenQuotesOut(**metrics["open_quotes_submitted"]),
+        open_quotes_received=OpenQuotesOut(**metrics["open_quotes_received"]),
+        invoices_paid_cents=dict(sorted(metrics["invoices_paid_cents"].items())),
+        invoices_earned_cents=dict(sorted(metrics["invoices_earned_cents"].items())),
+    )
@@ -1,33 +1,42 @@
-from datetime import UTC, datetime
 from uuid import UUID
 
 from fastapi import APIRouter, Depends
-from sqlalchemy import func, or_, select
+from sqlalchemy import Select, or_, select
 from sqlalchemy.orm import Session
 
 from app.audit import write_audit
+from app.conditional import Conditional, conditional
 from app.deps import get_current_user, get_db, require_roles
 from app.exceptions import AppError
-from app.models import Deal, DealStatus, Invoice, InvoiceStatus, Quote, Role, User
+from app.lifecycle import invoice_deal, pay_deal
+from app.models import Deal, DealStatus, Invoice, Role, User
+from app.pagination import paginate
 from app.schemas import DealOut, InvoiceOut, Paginated
 
 router = APIRouter(prefix="/deals", tags=["deals"])
 
 
+def deals_query(user: User, status: DealStatus | None) -> Select[tuple[Deal]]:
+    query = select(Deal).where(or_(Deal.buyer_org_id == user.org_id, Deal.vendor_org_id == user.org_id))
+    if status:
+        query = query.where(Deal.status == status)
+    return query
+
+
+def is_deal_party(deal: Deal | None, user: User) -> bool:
+    return deal is not None and user.org_id in (deal.buyer_org_id, deal.vendor_org_id)
+
+
 @router.get("", response_model=Paginated)
 def list_deals(
     status: DealStatus | None = None,
     page: int = 1,
     page_size: int = 20,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ) -> Paginated:
-    query = select(Deal).where(or_(Deal.buyer_org_id == user.org_id, Deal.vendor_org_id == user.org_id))
-    if status:
-        query = query.where(Deal.status == status)
-    total = db.scalar(select(func.count()).select_from(query.subquery())) or 0
-    items = db.scalars(query.order_by(Deal.created_at.desc()).offset((page - 1) * page_size).limit(page_size)).all()
-    return Paginated(items=[DealOut.model_validate(item) for item in items], page=page, page_size=page_size, total=total)
+    return paginate(db, deals_query(user, status), Deal, schema=DealOut, page=page, page_size=page_size, cursor=cursor)
 
 
 @router.get("/{deal_id}", response_model=DealOut)
@@ -35,11 +44,15 @@ def get_deal(
     deal_id: UUID,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
+    cond: Conditional = Depends(conditional),
 ) -> Deal:
-    deal = db.get(Deal, deal_id)
-    if not deal or (deal.buyer_org_id != user.org_id and deal.vendor_org_id != user.org_id):
+    head = db.execute(
+        select(Deal.buyer_org_id, Deal.vendor_org_id, Deal.status, Deal.updated_at).where(Deal.id == deal_id)
+    ).first()
+    if not is_deal_party(head, user):
         raise AppError(404, "Not Found", "Deal not found")
-    return deal
+    cond.check(deal_id, head.status.value, head.updated_at.isoformat())
+    return db.get(Deal, deal_id)
 
 
 @router.post("/{deal_id}/create-invoice", response_model=InvoiceOut)
@@ -48,33 +61,18 @@ def create_invoice(
     db: Session = Depends(get_db),
     user: User = Depends(require_roles([Role.ORG_OWNER, Role.ADMIN, Role.BUYER])),
 ) -> Invoice:
-    deal = db.get(Deal, deal_id)
-    if not deal or deal.buyer_org_id != user.org_id:
-        raise AppError(404, "Not Found", "Deal not found")
-    existing = db.scalar(select(Invoice).where(Invoice.deal_id == deal.id))
-    if existing:
-        return existing
-    winning = db.get(Quote, deal.winning_quote_id) if deal.winning_quote_id else None
-    amount = winning.amount_cents if winning else 0
-    invoice = Invoice(
-        deal_id=deal.id,
-        amount_cents=amount,
-        currency="USD",
-        status=InvoiceStatus.DRAFT,
-        issued_at=datetime.now(UTC),
-    )
-    deal.status = DealStatus.INVOICED
-    db.add(invoice)
+    invoice, created = invoice_deal(db, deal_id, user.org_id)
+    if not created:
+        return invoice
     write_audit(
         db,
         org_id=user.org_id,
         actor_user_id=user.id,
         action="deal.create_invoice",
         entity="deal",
-        entity_id=str(deal.id),
+        entity_id=str(deal_id),
     )
     db.commit()
-    db.refresh(invoice)
     return invoice
 
 
@@ -84,15 +82,9 @@ def mark_paid(
     db: Session = Depends(get_db),
     user: User = Depends(require_roles([Role.ORG_OWNER, Role.ADMIN, Role.BUYER])),
 ) -> Deal:
-    deal = db.get(Deal, deal_id)
-    if not deal or deal.buyer_org_id != user.org_id:
-        raise AppError(404, "Not Found", "Deal not found")
-    invoice = db.scalar(select(Invoice).where(Invoice.deal_id == deal.id))
-    if not invoice:
-        raise AppError(400, "Invalid State", "Invoice does not exist")
-    invoice.status = InvoiceStatus.PAID
-    invoice.paid_at = datetime.now(UTC)
-    deal.status = DealStatus.PAID
+    deal, invoice = pay_deal(db, deal_id, user.org_id)
+    if invoice is None:
+        return deal
     write_audit(
         db,
         org_id=user.org_id,
@@ -103,5 +95,4 @@ def mark_paid(
         payload={"invoice_id": str(invoice.id)},
     )
     db.commit()
-    db.refresh(deal)
     return deal
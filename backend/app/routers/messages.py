@@ -1,28 +1,146 @@
+import time
+from collections.abc import Sequence
+from datetime import datetime
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Query, WebSocket
+from fastapi import Request as HTTPRequest
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Select, select, tuple_
 from sqlalchemy.orm import Session
 
 from app.audit import write_audit
+from app.deal_room import DealRoomConnection
 from app.deps import get_current_user, get_db
 from app.exceptions import AppError
+from app.middleware import mark_long_poll
 from app.models import Deal, Message, User
+from app.realtime import OVERFLOW, Subscription, hub
+from app.routers.deals import is_deal_party
 from app.schemas import MessageCreate, MessageOut
 
 router = APIRouter(prefix="/deals", tags=["messages"])
 
+MESSAGE_PAGE_SIZE = 50
+MESSAGE_PAGE_MAX = 200
+LONG_POLL_MAX_SECONDS = 25
+
+# (created_at, id) of the message a page starts after or ends before.
+Anchor = tuple[datetime, UUID]
+
+
+def message_anchor_query(deal_id: UUID, message_id: UUID) -> Select[tuple[datetime]]:
+    return select(Message.created_at).where(Message.id == message_id, Message.deal_id == deal_id)
+
+
+def deal_messages_query(
+    deal_id: UUID, *, before: Anchor | None = None, after: Anchor | None = None, limit: int = MESSAGE_PAGE_SIZE
+) -> Select[tuple[Message]]:
+    # Range scans on (deal_id, created_at); pages never re-read the thread from the start.
+    query = select(Message).where(Message.deal_id == deal_id)
+    key = tuple_(Message.created_at, Message.id)
+    if after is not None:
+        return query.where(key > tuple_(*after)).order_by(Message.created_at.asc(), Message.id.asc()).limit(limit)
+    if before is not None:
+        query = query.where(key < tuple_(*before))
+    # Newest page first; see chronological().
+    return query.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit)
+
+
+def chronological(rows: Sequence[Message], after: UUID | None) -> list[Message]:
+    return list(rows) if after is not None else list(reversed(rows))
+
+
+def check_page_params(before: UUID | None, after: UUID | None, wait: float) -> None:
+    if before is not None and after is not None:
+        raise AppError(400, "Bad Request", "Use either before or after, not both")
+    if wait and after is None:
+        raise AppError(400, "Bad Request", "wait requires after")
+
+
+async def wait_for_message(sub: Subscription, timeout: float) -> bool:
+    # The deal topic also carries the room's typing and presence events; only a new message (or an overflow,
+    # which may have swallowed one) ends a long poll early.
+    deadline = time.monotonic() + timeout
+    while (remaining := deadline - time.monotonic()) > 0:
+        event = await sub.get(timeout=remaining)
+        if event is None:
+            return False
+        if event is OVERFLOW or event.get("type") == "message":
+            return True
+    return False
+
+
+def _anchor(db: Session, deal_id: UUID, message_id: UUID | None) -> Anchor | None:
+    if message_id is None:
+        return None
+    created_at = db.scalar(message_anchor_query(deal_id, message_id))
+    if created_at is None:
+        raise AppError(400, "Bad Request", "Unknown message cursor")
+    return created_at, message_id
+
+
+def _read_page(db: Session, user: User, deal_id: UUID, before: UUID | None, after: UUID | None, limit: int) -> list[Message]:
+    deal = db.get(Deal, deal_id)
+    if not is_deal_party(deal, user):
+        raise AppError(404, "Not Found", "Deal not found")
+    query = deal_messages_query(deal_id, before=_anchor(db, deal_id, before), after=_anchor(db, deal_id, after), limit=limit)
+    return chronological(db.scalars(query).all(), after)
+
 
 @router.get("/{deal_id}/messages", response_model=list[MessageOut])
-def list_messages(
+async def list_messages(
     deal_id: UUID,
+    http_request: HTTPRequest,
+    before: UUID | None = None,
+    after: UUID | None = None,
+    limit: int = Query(default=MESSAGE_PAGE_SIZE, ge=1, le=MESSAGE_PAGE_MAX),
+    wait: float = Query(default=0, ge=0, le=LONG_POLL_MAX_SECONDS),
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ) -> list[Message]:
-    deal = db.get(Deal, deal_id)
-    if not deal or (deal.buyer_org_id != user.org_id and deal.vendor_org_id != user.org_id):
+    # Without cursors: the newest page. before=<id>: the page older than that message. after=<id>: newer messages,
+    # and with wait=<seconds> the request is held until one arrives (long poll).
+    check_page_params(before, after, wait)
+    # Subscribed before the first read, so a message committed in between still wakes us.
+    sub = hub.subscribe(f"deal:{deal_id}") if wait else None
+    try:
+        messages = await run_in_threadpool(_read_page, db, user, deal_id, before, after, limit)
+        if messages or sub is None:
+            return messages
+        # The wait must not pin a pooled connection; the session checks one out again for the re-read.
+        await run_in_threadpool(db.close)
+        mark_long_poll(http_request)
+        if not await wait_for_message(sub, wait):
+            return []
+        # The event only means "look again"; the read is the source of truth.
+        return await run_in_threadpool(_read_page, db, user, deal_id, None, after, limit)
+    finally:
+        if sub is not None:
+            sub.close()
+
+
+def _join_room(db: Session, access_cookie: str | None, deal_id: UUID) -> User:
+    user = get_current_user(db, access_cookie)
+    if not is_deal_party(db.get(Deal, deal_id), user):
         raise AppError(404, "Not Found", "Deal not found")
-    return db.scalars(select(Message).where(Message.deal_id == deal.id).order_by(Message.created_at.asc())).all()
+    return user
+
+
+@router.websocket("/{deal_id}/ws")
+async def deal_room(websocket: WebSocket, deal_id: UUID, db: Session = Depends(get_db)) -> None:
+    # Same cookie and party check as the HTTP routes; a rejected join is closed with 4000 + the HTTP status.
+    try:
+        user = await run_in_threadpool(_join_room, db, websocket.cookies.get("b2bak_access"), deal_id)
+    except AppError as exc:
+        await websocket.accept()
+        await websocket.close(4000 + exc.status_code, exc.detail)
+        return
+    finally:
+        # The connection can live for hours; it must not hold a pooled DB connection meanwhile.
+        await run_in_threadpool(db.close)
+    await websocket.accept()
+    await DealRoomConnection(websocket, deal_id, user.id, user.org_id).run()
 
 
 @router.post("/{deal_id}/messages", response_model=MessageOut)
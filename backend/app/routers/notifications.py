@@ -1,38 +1,87 @@
 from __future__ import annotations
 
 import json
-import time
+from collections.abc import AsyncIterator
 from datetime import UTC, datetime
+from typing import Any
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
-from sqlalchemy import func, select
+from sqlalchemy import ColumnElement, Select, select, tuple_, update
 from sqlalchemy.orm import Session
 
+from app import unread
 from app.audit import write_audit
 from app.deps import get_current_user, get_db
 from app.exceptions import AppError
 from app.models import Notification, User
-from app.schemas import NotificationOut, Paginated
+from app.pagination import decode_cursor, paginate
+from app.realtime import OVERFLOW, hub, notification_event
+from app.schemas import (
+    NotificationOut,
+    NotificationReadPayload,
+    NotificationReadResult,
+    Paginated,
+    UnreadCountOut,
+)
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
+STREAM_PING_SECONDS = 15.0
+STREAM_BACKLOG_LIMIT = 500
+
+
+def notifications_query(user: User, unread_only: bool) -> Select[tuple[Notification]]:
+    query = select(Notification).where(Notification.user_id == user.id)
+    if unread_only:
+        query = query.where(Notification.read_at.is_(None))
+    return query
+
 
 @router.get("", response_model=Paginated)
 def list_notifications(
     page: int = 1,
     page_size: int = 20,
     unread_only: bool = False,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ) -> Paginated:
-    query = select(Notification).where(Notification.user_id == user.id)
-    if unread_only:
-        query = query.where(Notification.read_at.is_(None))
-    total = db.scalar(select(func.count()).select_from(query.subquery())) or 0
-    items = db.scalars(query.order_by(Notification.created_at.desc()).offset((page - 1) * page_size).limit(page_size)).all()
-    return Paginated(items=[NotificationOut.model_validate(item) for item in items], page=page, page_size=page_size, total=total)
+    query = notifications_query(user, unread_only)
+    return paginate(db, query, Notification, schema=NotificationOut, page=page, page_size=page_size, cursor=cursor)
+
+
+def _mark_read(db: Session, user: User, *criteria: ColumnElement[bool]) -> int:
+    # One set-based UPDATE; rows that were already read are not touched, so the counter moves by exactly the rowcount.
+    result = db.execute(
+        update(Notification)
+        .where(Notification.user_id == user.id, Notification.read_at.is_(None), *criteria)
+        .values(read_at=datetime.now(UTC))
+        .execution_options(synchronize_session=False)
+    )
+    unread.stage(db, user.id, -result.rowcount)
+    return result.rowcount
+
+
+@router.get("/unread-count", response_model=UnreadCountOut)
+def unread_count(db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> UnreadCountOut:
+    return UnreadCountOut(unread=unread.unread_count(db, user.id))
+
+
+@router.post("/read", response_model=NotificationReadResult)
+def mark_many_read(
+    payload: NotificationReadPayload,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> NotificationReadResult:
+    if payload.ids is not None:
+        updated = _mark_read(db, user, Notification.id.in_(payload.ids))
+    else:
+        updated = _mark_read(db, user, Notification.created_at <= payload.before)
+    db.commit()
+    return NotificationReadResult(updated=updated)
 
 
 @router.post("/{notification_id}/read", response_model=NotificationOut)
@@ -41,12 +90,11 @@ def mark_read(
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ) -> Notification:
+    _mark_read(db, user, Notification.id == notification_id)
+    db.commit()
     note = db.get(Notification, notification_id)
     if not note or note.user_id != user.id:
         raise AppError(404, "Not Found", "Notification not found")
-    note.read_at = datetime.now(UTC)
-    db.commit()
-    db.refresh(note)
     return note
 
 
@@ -81,26 +129,54 @@ def emit_job_notification(
     return {"status": "ok", "notification_id": str(note.id)}
 
 
+def _sse(message: dict[str, Any]) -> str:
+    return f"id: {message['id']}\nevent: {message['type']}\ndata: {json.dumps(message['data'])}\n\n"
+
+
+def _backlog(db: Session, user_id: UUID, last_event_id: str) -> list[dict[str, Any]]:
+    created_at, row_id = decode_cursor(last_event_id)
+    rows = db.scalars(
+        select(Notification)
+        .where(Notification.user_id == user_id, tuple_(Notification.created_at, Notification.id) > tuple_(created_at, row_id))
+        .order_by(Notification.created_at.asc(), Notification.id.asc())
+        .limit(STREAM_BACKLOG_LIMIT)
+    ).all()
+    return [notification_event(row) for row in rows]
+
+
 @router.get("/stream")
-def notification_stream(
+async def notification_stream(
+    last_event_id: str | None = Header(default=None, alias="Last-Event-ID"),
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ) -> StreamingResponse:
-    def event_iter():
-        last_seen = datetime.now(UTC)
-        while True:
-            rows = db.scalars(
-                select(Notification)
-                .where(Notification.user_id == user.id, Notification.created_at > last_seen)
-                .order_by(Notification.created_at.asc())
-            ).all()
-            for row in rows:
-                payload = NotificationOut.model_validate(row).model_dump(mode="json")
-                yield f"event: notification\ndata: {json.dumps(payload)}\n\n"
-                if row.created_at > last_seen:
-                    last_seen = row.created_at
-            # keep-alive ping
-            yield "event: ping\ndata: {}\n\n"
-            time.sleep(2)
-
-    return StreamingResponse(event_iter(), media_type="text/event-stream")
+    # Subscribe before reading the backlog so nothing committed in between is lost; replays are deduped by id.
+    sub = hub.subscribe(f"user:{user.id}")
+    try:
+        backlog = await run_in_threadpool(_backlog, db, user.id, last_event_id) if last_event_id else []
+    except BaseException:
+        sub.close()
+        raise
+    finally:
+        # Idle streams must not pin a pooled DB connection.
+        await run_in_threadpool(db.close)
+
+    async def event_iter() -> AsyncIterator[str]:
+        sent: set[str] = set()
+        try:
+            for message in backlog:
+                sent.add(message["id"])
+                yield _sse(message)
+            while True:
+                message = await sub.get(timeout=STREAM_PING_SECONDS)
+                if message is None:
+                    yield "event: ping\ndata: {}\n\n"
+                elif message is OVERFLOW:
+                    # Too slow or the hub lost Redis: end the stream; EventSource reconnects with Last-Event-ID.
+                    return
+                elif message["id"] not in sent:
+                    yield _sse(message)
+        finally:
+            sub.close()
+
+    return StreamingResponse(event_iter(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -1,14 +1,27 @@
 from uuid import UUID
 
 from fastapi import APIRouter, Depends
-from sqlalchemy import func, select
+from fastapi import Request as HTTPRequest
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.audit import write_audit
-from app.deps import get_current_user, get_db, require_roles
+from app.deps import get_current_user, get_db, request_id_from_state, require_roles
 from app.exceptions import AppError
 from app.models import Quote, QuoteStatus, Request, RequestStatus, Role, User
-from app.schemas import Paginated, QuoteCreate, QuoteOut, QuotePatch
+from app.pagination import paginate
+from app.quote_stats import COUNTED_STATUSES, update_quote_stats
+from app.rollups import OPEN_QUOTE_STATUSES, track_open_quote
+from app.schemas import (
+    Paginated,
+    ProblemDetail,
+    QuoteBatchItem,
+    QuoteBatchOut,
+    QuoteBatchPayload,
+    QuoteCreate,
+    QuoteOut,
+    QuotePatch,
+)
 
 router = APIRouter(prefix="/quotes", tags=["quotes"])
 
@@ -18,6 +31,7 @@ def list_quotes(
     request_id: UUID | None = None,
     page: int = 1,
     page_size: int = 20,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ) -> Paginated:
@@ -30,22 +44,18 @@ def list_quotes(
         query = select(Quote).where(Quote.vendor_org_id == user.org_id)
         if request_id:
             query = query.where(Quote.request_id == request_id)
-    total = db.scalar(select(func.count()).select_from(query.subquery())) or 0
-    items = db.scalars(query.order_by(Quote.created_at.desc()).offset((page - 1) * page_size).limit(page_size)).all()
-    return Paginated(items=[QuoteOut.model_validate(item) for item in items], page=page, page_size=page_size, total=total)
+    return paginate(db, query, Quote, schema=QuoteOut, page=page, page_size=page_size, cursor=cursor)
 
 
-@router.post("", response_model=QuoteOut)
-def create_quote(
-    payload: QuoteCreate,
-    db: Session = Depends(get_db),
-    user: User = Depends(require_roles([Role.ORG_OWNER, Role.ADMIN, Role.VENDOR])),
-) -> Quote:
-    req = db.get(Request, payload.request_id)
+def _quoting_error(req: Request | None) -> AppError | None:
     if not req:
-        raise AppError(404, "Not Found", "Request not found")
+        return AppError(404, "Not Found", "Request not found")
     if req.status not in [RequestStatus.PUBLISHED, RequestStatus.QUOTING, RequestStatus.SHORTLIST]:
-        raise AppError(400, "Invalid State", "Request not open for quoting")
+        return AppError(400, "Invalid State", "Request not open for quoting")
+    return None
+
+
+def _new_quote(db: Session, payload: QuoteCreate, user: User) -> Quote:
     quote = Quote(
         request_id=payload.request_id,
         vendor_org_id=user.org_id,
@@ -55,7 +65,10 @@ def create_quote(
         status=QuoteStatus.SUBMITTED,
     )
     db.add(quote)
-    db.flush()
+    return quote
+
+
+def _audit_quote_created(db: Session, quote: Quote, user: User) -> None:
     write_audit(
         db,
         org_id=user.org_id,
@@ -63,13 +76,71 @@ def create_quote(
         action="quote.create",
         entity="quote",
         entity_id=str(quote.id),
-        payload={"request_id": str(payload.request_id)},
+        payload={"request_id": str(quote.request_id)},
     )
+
+
+@router.post("", response_model=QuoteOut)
+def create_quote(
+    payload: QuoteCreate,
+    db: Session = Depends(get_db),
+    user: User = Depends(require_roles([Role.ORG_OWNER, Role.ADMIN, Role.VENDOR])),
+) -> Quote:
+    req = db.get(Request, payload.request_id)
+    error = _quoting_error(req)
+    if error:
+        raise error
+    quote = _new_quote(db, payload, user)
+    db.flush()
+    _audit_quote_created(db, quote, user)
+    update_quote_stats(db, quote.request_id, added=[(quote.amount_cents, quote.timeline_days)])
+    track_open_quote(db, quote.vendor_org_id, req.buyer_org_id, quote.amount_cents)
     db.commit()
     db.refresh(quote)
     return quote
 
 
+@router.post("/batch", response_model=QuoteBatchOut)
+def create_quotes_batch(
+    payload: QuoteBatchPayload,
+    request: HTTPRequest,
+    db: Session = Depends(get_db),
+    user: User = Depends(require_roles([Role.ORG_OWNER, Role.ADMIN, Role.VENDOR])),
+) -> QuoteBatchOut:
+    # Items failing the single-quote checks are reported and skipped; the rest commit together.
+    request_ids = {item.request_id for item in payload.items}
+    requests_by_id = {req.id: req for req in db.scalars(select(Request).where(Request.id.in_(request_ids)))}
+    results: list[QuoteBatchItem] = []
+    created: list[tuple[QuoteBatchItem, Quote]] = []
+    for index, item in enumerate(payload.items):
+        result = QuoteBatchItem(index=index, request_id=item.request_id)
+        results.append(result)
+        error = _quoting_error(requests_by_id.get(item.request_id))
+        if error:
+            result.error = ProblemDetail(
+                title=error.title,
+                status=error.status_code,
+                detail=error.detail,
+                request_id=request_id_from_state(request),
+            )
+            continue
+        created.append((result, _new_quote(db, item, user)))
+    if created:
+        db.flush()
+        bids: dict[UUID, list[tuple[int, int]]] = {}
+        for result, quote in created:
+            _audit_quote_created(db, quote, user)
+            bids.setdefault(quote.request_id, []).append((quote.amount_cents, quote.timeline_days))
+            track_open_quote(db, quote.vendor_org_id, requests_by_id[quote.request_id].buyer_org_id, quote.amount_cents)
+            # Serialized before commit so the response needs no per-quote refresh.
+            result.quote = QuoteOut.model_validate(quote)
+        # Sorted so concurrent batches take the stats row locks in the same order.
+        for request_id in sorted(bids):
+            update_quote_stats(db, request_id, added=bids[request_id])
+        db.commit()
+    return QuoteBatchOut(created=len(created), failed=len(results) - len(created), items=results)
+
+
 @router.patch("/{quote_id}", response_model=QuoteOut)
 def patch_quote(
     quote_id: UUID,
@@ -82,9 +153,14 @@ def patch_quote(
         raise AppError(404, "Not Found", "Quote not found")
     if quote.status in [QuoteStatus.WITHDRAWN, QuoteStatus.ACCEPTED, QuoteStatus.REJECTED]:
         raise AppError(400, "Invalid State", "Quote cannot be updated")
+    previous = (quote.amount_cents, quote.timeline_days)
     for field, value in payload.model_dump(exclude_none=True).items():
         setattr(quote, field, value)
     quote.status = QuoteStatus.UPDATED
+    if previous != (quote.amount_cents, quote.timeline_days):
+        update_quote_stats(db, quote.request_id, added=[(quote.amount_cents, quote.timeline_days)], removed=[previous])
+        # Still open: only the amount moves, the open count stays.
+        track_open_quote(db, quote.vendor_org_id, quote.request.buyer_org_id, quote.amount_cents - previous[0], count=0)
     write_audit(
         db,
         org_id=user.org_id,
@@ -110,6 +186,10 @@ def withdraw_quote(
         raise AppError(404, "Not Found", "Quote not found")
     if quote.status in [QuoteStatus.ACCEPTED, QuoteStatus.REJECTED]:
         raise AppError(400, "Invalid State", "Awarded/rejected quote cannot be withdrawn")
+    if quote.status in COUNTED_STATUSES:
+        update_quote_stats(db, quote.request_id, removed=[(quote.amount_cents, quote.timeline_days)])
+    if quote.status in OPEN_QUOTE_STATUSES:
+        track_open_quote(db, quote.vendor_org_id, quote.request.buyer_org_id, -quote.amount_cents, count=-1)
     quote.status = QuoteStatus.WITHDRAWN
     write_audit(
         db,
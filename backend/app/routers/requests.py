@@ -1,40 +1,92 @@
-from uuid import UUID
+from datetime import UTC, datetime
+from typing import Any, Literal
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, Header
-from sqlalchemy import func, or_, select
+from fastapi import APIRouter, Depends
+from fastapi import Request as HTTPRequest
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import ColumnElement, Select, bindparam, insert, select
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+from app import outbox
 from app.audit import write_audit
+from app.bulk_import import detect_format, iter_records, validate
+from app.conditional import Conditional, conditional
+from app.config import get_settings
 from app.deps import get_current_user, get_db, require_roles
 from app.exceptions import AppError
-from app.models import Deal, IdempotencyKey, Quote, QuoteStatus, Request, RequestStatus, Role, User
-from app.queue import get_queue, publish_notification_job
-from app.schemas import AwardPayload, Paginated, RequestCreate, RequestOut, RequestPatch
+from app.lifecycle import PUBLISH, SHORTLIST, advance, award
+from app.models import MARKETPLACE_STATUSES, Request, RequestQuoteStats, RequestStatus, Role, User
+from app.pagination import paginate
+from app.queue import publish_notification_job
+from app.quote_stats import record_award
+from app.rollups import bump
+from app.schemas import (
+    AwardPayload,
+    ImportRowError,
+    Paginated,
+    QuoteStatsOut,
+    RequestCreate,
+    RequestImportResult,
+    RequestOut,
+    RequestPatch,
+)
+from app.search import apply_search, index_requests
 
 router = APIRouter(prefix="/requests", tags=["requests"])
 
 
+def is_marketplace_request() -> ColumnElement[bool]:
+    # Rendered as literals at execution time: the planner can only match the partial marketplace index
+    # against values it can see, not against bound parameters.
+    return Request.status.in_(bindparam("marketplace_statuses", list(MARKETPLACE_STATUSES), expanding=True, literal_execute=True))
+
+
+# Shared with the async read router so both engines answer with the same rows.
+def visible_requests_query(user: User, status: RequestStatus | None) -> Select[tuple[Request]]:
+    if user.role in [Role.VENDOR, Role.VIEWER]:
+        # Vendors/viewers can browse open marketplace requests.
+        query = select(Request).where(is_marketplace_request())
+    else:
+        query = select(Request).where(Request.buyer_org_id == user.org_id)
+    if status:
+        query = query.where(Request.status == status)
+    return query
+
+
+def can_view_request(req: Request, user: User) -> bool:
+    if req.buyer_org_id == user.org_id:
+        return True
+    return user.role in [Role.VENDOR, Role.VIEWER] and req.status in MARKETPLACE_STATUSES
+
+
+def request_head_query(request_id: UUID) -> Select[tuple[UUID, UUID, RequestStatus, datetime]]:
+    # Visibility and the ETag need these narrow columns; description and tags are only loaded when changed.
+    return select(Request.id, Request.buyer_org_id, Request.status, Request.updated_at).where(Request.id == request_id)
+
+
+def check_request_head(head: Any, user: User, cond: Conditional) -> None:
+    if not head or not can_view_request(head, user):
+        raise AppError(404, "Not Found", "Request not found")
+    cond.check(head.id, head.status.value, head.updated_at.isoformat())
+
+
 @router.get("", response_model=Paginated)
 def list_requests(
     status: RequestStatus | None = None,
     search: str | None = None,
     page: int = 1,
     page_size: int = 20,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ) -> Paginated:
-    if user.role in [Role.VENDOR, Role.VIEWER]:
-        # Vendors/viewers can browse open marketplace requests.
-        query = select(Request).where(Request.status.in_([RequestStatus.PUBLISHED, RequestStatus.QUOTING, RequestStatus.SHORTLIST]))
-    else:
-        query = select(Request).where(Request.buyer_org_id == user.org_id)
-    if status:
-        query = query.where(Request.status == status)
+    query = visible_requests_query(user, status)
     if search:
-        query = query.where(or_(Request.title.ilike(f"%{search}%"), Request.description.ilike(f"%{search}%")))
-    total = db.scalar(select(func.count()).select_from(query.subquery())) or 0
-    items = db.scalars(query.order_by(Request.created_at.desc()).offset((page - 1) * page_size).limit(page_size)).all()
-    return Paginated(items=[RequestOut.model_validate(item) for item in items], page=page, page_size=page_size, total=total)
+        # Relevance order only applies to offset pages; cursor pages stay on (created_at, id).
+        query = apply_search(db, query, search, ranked=cursor is None)
+    return paginate(db, query, Request, schema=RequestOut, page=page, page_size=page_size, cursor=cursor)
 
 
 @router.post("", response_model=RequestOut)
@@ -55,6 +107,7 @@ def create_request(
     )
     db.add(req)
     db.flush()
+    bump(db, user.org_id, "requests", RequestStatus.DRAFT.value)
     write_audit(
         db,
         org_id=user.org_id,
@@ -69,20 +122,121 @@ def create_request(
     return req
 
 
+def _insert_request_batch(db: Session, org_id: UUID, user_id: UUID, batch: list[dict[str, Any]], rows: list[int]) -> None:
+    # One multi-row INSERT and one summary audit entry per batch instead of a transaction per request.
+    db.execute(insert(Request), batch)
+    bump(db, org_id, "requests", RequestStatus.DRAFT.value, len(batch))
+    write_audit(
+        db,
+        org_id=org_id,
+        actor_user_id=user_id,
+        action="request.import",
+        entity="request",
+        entity_id=str(batch[0]["id"]),
+        payload={"count": len(batch), "first_row": rows[0], "last_row": rows[-1]},
+    )
+    db.commit()
+    index_requests(db, batch)
+
+
+@router.post("/import", response_model=RequestImportResult)
+async def import_requests(
+    http_request: HTTPRequest,
+    format: Literal["csv", "ndjson"] | None = None,
+    batch_size: int | None = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(require_roles([Role.ORG_OWNER, Role.ADMIN, Role.BUYER])),
+) -> RequestImportResult:
+    settings = get_settings()
+    batch_size = max(1, min(batch_size or settings.request_import_batch_size, 10_000))
+    org_id, user_id = user.org_id, user.id
+    fmt = detect_format(http_request.headers.get("content-type"), format)
+    errors: list[ImportRowError] = []
+    failed = imported = batches = 0
+    batch: list[dict[str, Any]] = []
+    batch_rows: list[int] = []
+
+    def fail(row: int, messages: list[str]) -> None:
+        nonlocal failed
+        failed += 1
+        if len(errors) < settings.request_import_max_errors:
+            errors.append(ImportRowError(row=row, errors=messages))
+
+    async def flush() -> None:
+        nonlocal imported, batches
+        try:
+            await run_in_threadpool(_insert_request_batch, db, org_id, user_id, batch, batch_rows)
+        except SQLAlchemyError as exc:
+            await run_in_threadpool(db.rollback)
+            for row in batch_rows:
+                fail(row, [f"batch insert failed: {exc.__class__.__name__}"])
+        else:
+            imported += len(batch)
+            batches += 1
+        batch.clear()
+        batch_rows.clear()
+
+    async for row, record in iter_records(http_request.stream(), fmt, settings.request_import_max_record_chars):
+        if isinstance(record, str):
+            fail(row, [record])
+            continue
+        payload = validate(RequestCreate, record)
+        if isinstance(payload, list):
+            fail(row, payload)
+            continue
+        now = datetime.now(UTC)
+        batch.append(
+            {
+                "id": uuid4(),
+                "buyer_org_id": org_id,
+                **payload.model_dump(),
+                "status": RequestStatus.DRAFT,
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+        batch_rows.append(row)
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+    return RequestImportResult(
+        imported=imported,
+        failed=failed,
+        batches=batches,
+        errors=errors,
+        errors_truncated=failed > len(errors),
+    )
+
+
 @router.get("/{request_id}", response_model=RequestOut)
 def get_request(
     request_id: UUID,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
+    cond: Conditional = Depends(conditional),
 ) -> Request:
-    req = db.get(Request, request_id)
-    if not req:
+    check_request_head(db.execute(request_head_query(request_id)).first(), user, cond)
+    return db.get(Request, request_id)
+
+
+@router.get("/{request_id}/quote-stats", response_model=QuoteStatsOut)
+def get_quote_stats(
+    request_id: UUID,
+    db: Session = Depends(get_db),
+    user: User = Depends(require_roles([Role.ORG_OWNER, Role.ADMIN, Role.BUYER])),
+) -> QuoteStatsOut:
+    # One primary-key lookup on the rollup; the sorted lists behind it are not loaded.
+    columns = [getattr(RequestQuoteStats, field) for field in QuoteStatsOut.model_fields if field != "request_id"]
+    row = db.execute(
+        select(Request.buyer_org_id, *columns)
+        .outerjoin(RequestQuoteStats, RequestQuoteStats.request_id == Request.id)
+        .where(Request.id == request_id)
+    ).first()
+    if row is None or row.buyer_org_id != user.org_id:
         raise AppError(404, "Not Found", "Request not found")
-    if req.buyer_org_id == user.org_id:
-        return req
-    if user.role in [Role.VENDOR, Role.VIEWER] and req.status in [RequestStatus.PUBLISHED, RequestStatus.QUOTING, RequestStatus.SHORTLIST]:
-        return req
-    raise AppError(404, "Not Found", "Request not found")
+    values = {key: value for key, value in row._mapping.items() if key != "buyer_org_id" and value is not None}
+    return QuoteStatsOut(request_id=request_id, **values)
 
 
 @router.patch("/{request_id}", response_model=RequestOut)
@@ -116,36 +270,16 @@ def patch_request(
 @router.post("/{request_id}/publish", response_model=RequestOut)
 def publish_request(
     request_id: UUID,
-    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     user: User = Depends(require_roles([Role.ORG_OWNER, Role.ADMIN, Role.BUYER])),
 ) -> Request:
-    req = db.get(Request, request_id)
-    if not req or req.buyer_org_id != user.org_id:
-        raise AppError(404, "Not Found", "Request not found")
-    if idempotency_key:
-        existing = db.scalar(
-            select(IdempotencyKey).where(
-                IdempotencyKey.org_id == user.org_id,
-                IdempotencyKey.key == idempotency_key,
-                IdempotencyKey.endpoint == f"requests/{request_id}/publish",
-            )
-        )
-        if existing:
-            return req
-        db.add(
-            IdempotencyKey(
-                org_id=user.org_id,
-                key=idempotency_key,
-                endpoint=f"requests/{request_id}/publish",
-            )
-        )
-    if req.status == RequestStatus.QUOTING:
+    # Retries carrying an Idempotency-Key are replayed by IdempotencyMiddleware before reaching here.
+    req, previous = advance(
+        db, Request, request_id, PUBLISH, scope=(Request.buyer_org_id == user.org_id,), not_found="Request not found"
+    )
+    if previous is None:
         return req
-    if req.status != RequestStatus.DRAFT:
-        raise AppError(400, "Invalid State", "Request cannot be published")
-    req.status = RequestStatus.QUOTING
-    get_queue().enqueue(publish_notification_job, str(req.id))
+    outbox.enqueue(db, publish_notification_job, str(req.id))
     write_audit(
         db,
         org_id=user.org_id,
@@ -155,7 +289,6 @@ def publish_request(
         entity_id=str(req.id),
     )
     db.commit()
-    db.refresh(req)
     return req
 
 
@@ -165,12 +298,9 @@ def shortlist_request(
     db: Session = Depends(get_db),
     user: User = Depends(require_roles([Role.ORG_OWNER, Role.ADMIN, Role.BUYER])),
 ) -> Request:
-    req = db.get(Request, request_id)
-    if not req or req.buyer_org_id != user.org_id:
-        raise AppError(404, "Not Found", "Request not found")
-    if req.status != RequestStatus.QUOTING:
-        raise AppError(400, "Invalid State", "Only quoting requests can be shortlisted")
-    req.status = RequestStatus.SHORTLIST
+    req, _ = advance(
+        db, Request, request_id, SHORTLIST, scope=(Request.buyer_org_id == user.org_id,), not_found="Request not found"
+    )
     write_audit(
         db,
         org_id=user.org_id,
@@ -180,7 +310,6 @@ def shortlist_request(
         entity_id=str(req.id),
     )
     db.commit()
-    db.refresh(req)
     return req
 
 
@@ -191,26 +320,8 @@ def award_request(
     db: Session = Depends(get_db),
     user: User = Depends(require_roles([Role.ORG_OWNER, Role.ADMIN, Role.BUYER])),
 ) -> dict[str, str]:
-    req = db.get(Request, request_id)
-    if not req or req.buyer_org_id != user.org_id:
-        raise AppError(404, "Not Found", "Request not found")
-    if req.status != RequestStatus.SHORTLIST:
-        raise AppError(400, "Invalid State", "Only shortlisted requests can be awarded")
-    winner = db.get(Quote, payload.winning_quote_id)
-    if not winner or winner.request_id != req.id:
-        raise AppError(404, "Not Found", "Winning quote not found")
-    quotes = db.scalars(select(Quote).where(Quote.request_id == req.id)).all()
-    for quote in quotes:
-        quote.status = QuoteStatus.ACCEPTED if quote.id == winner.id else QuoteStatus.REJECTED
-    req.status = RequestStatus.AWARDED
-    deal = Deal(
-        buyer_org_id=req.buyer_org_id,
-        vendor_org_id=winner.vendor_org_id,
-        request_id=req.id,
-        winning_quote_id=winner.id,
-    )
-    db.add(deal)
-    db.flush()
+    req, winner, deal = award(db, request_id, user.org_id, payload.winning_quote_id)
+    record_award(db, req.id, winner.amount_cents)
     write_audit(
         db,
         org_id=user.org_id,
@@ -5,8 +5,9 @@ from datetime import date, datetime
 from typing import Any
 from typing import Literal
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
+from app.avatars import is_avatar_ref
 from app.models import DealStatus, InvoiceStatus, QuoteStatus, RequestStatus, Role
 
 
@@ -126,16 +127,17 @@ class ProfileUpdatePayload(BaseModel):
             return None
         if len(v) > 1_500_000:
             raise ValueError("Avatar payload is too large")
-        if not (v.startswith("data:image/") or v.startswith("http://") or v.startswith("https://")):
+        if not (v.startswith("data:image/") or v.startswith("http://") or v.startswith("https://") or is_avatar_ref(v)):
             raise ValueError("Avatar must be an image URL or image data URL")
         return v
 
 
 class Paginated(BaseModel):
     items: list[Any]
-    page: int
+    page: int | None = None
     page_size: int
-    total: int
+    total: int | None = None
+    next_cursor: str | None = None
 
 
 class RequestCreate(BaseModel):
@@ -147,6 +149,19 @@ class RequestCreate(BaseModel):
     tags: list[str] = Field(default_factory=list)
 
 
+class ImportRowError(BaseModel):
+    row: int
+    errors: list[str]
+
+
+class RequestImportResult(BaseModel):
+    imported: int
+    failed: int
+    batches: int
+    errors: list[ImportRowError]
+    errors_truncated: bool = False
+
+
 class RequestPatch(BaseModel):
     title: str | None = None
     description: str | None = None
@@ -196,6 +211,49 @@ class QuoteOut(BaseModel):
     updated_at: datetime
 
 
+class QuoteStatsOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    request_id: uuid.UUID
+    quote_count: int = 0
+    min_amount_cents: int | None = None
+    median_amount_cents: int | None = None
+    max_amount_cents: int | None = None
+    fastest_timeline_days: int | None = None
+    awarded_amount_cents: int | None = None
+
+
+class OpenQuotesOut(BaseModel):
+    count: int = 0
+    value_cents: int = 0
+
+
+class DashboardOut(BaseModel):
+    requests: dict[str, int]
+    deals: dict[str, int]
+    open_quotes_submitted: OpenQuotesOut
+    open_quotes_received: OpenQuotesOut
+    invoices_paid_cents: dict[str, int]
+    invoices_earned_cents: dict[str, int]
+
+
+class QuoteBatchPayload(BaseModel):
+    items: list[QuoteCreate] = Field(min_length=1, max_length=200)
+
+
+class QuoteBatchItem(BaseModel):
+    index: int
+    request_id: uuid.UUID
+    quote: QuoteOut | None = None
+    # Same problem details the single-quote endpoint would have returned for this item.
+    error: ProblemDetail | None = None
+
+
+class QuoteBatchOut(BaseModel):
+    created: int
+    failed: int
+    items: list[QuoteBatchItem]
+
+
 class AwardPayload(BaseModel):
     winning_quote_id: uuid.UUID
 
@@ -259,6 +317,25 @@ class NotificationOut(BaseModel):
     created_at: datetime
 
 
+class NotificationReadPayload(BaseModel):
+    ids: list[uuid.UUID] | None = Field(default=None, min_length=1, max_length=1000)
+    before: datetime | None = None
+
+    @model_validator(mode="after")
+    def validate_target(self) -> NotificationReadPayload:
+        if (self.ids is None) == (self.before is None):
+            raise ValueError("Provide either ids or before")
+        return self
+
+
+class NotificationReadResult(BaseModel):
+    updated: int
+
+
+class UnreadCountOut(BaseModel):
+    unread: int
+
+
 class InviteCreate(BaseModel):
     email: str = Field(min_length=3, max_length=320)
     role: Role = Role.VIEWER
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import argparse
+import re
+from datetime import UTC, date, datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.audit_archive import COLUMNS, add_months, get_audit_archive, month_start, partition_ddl
+from app.config import get_settings
+from app.db import SessionLocal
+
+_PARTITION_RE = re.compile(r"^audit_log_p(\d{4})_(\d{2})$")
+
+
+def _partition_start(name: str) -> date | None:
+    match = _PARTITION_RE.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def _as_datetime(value: date) -> datetime:
+    return datetime(value.year, value.month, value.day, tzinfo=UTC)
+
+
+def ensure_partitions(db: Session, months_ahead: int) -> None:
+    start = month_start(datetime.now(UTC).date())
+    for offset in range(months_ahead + 1):
+        db.execute(text(partition_ddl(add_months(start, offset))))
+    db.commit()
+
+
+def attached_partitions(db: Session) -> list[str]:
+    rows = db.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'audit_log'::regclass"
+        )
+    )
+    return sorted(name for (name,) in rows if _partition_start(name))
+
+
+def detached_partitions(db: Session) -> list[str]:
+    # Detached by an earlier run that died before archiving; they are picked up again here.
+    rows = db.execute(
+        text(
+            "SELECT c.relname FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE c.relkind = 'r' AND n.nspname = current_schema() AND c.relname LIKE 'audit_log_p%' "
+            "AND NOT EXISTS (SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid)"
+        )
+    )
+    return sorted(name for (name,) in rows if _partition_start(name))
+
+
+def archive_partition(db: Session, name: str, chunk_rows: int) -> int:
+    start = _partition_start(name)
+    assert start is not None
+    archive = get_audit_archive()
+    query = text(f"SELECT {', '.join(COLUMNS)} FROM {name} ORDER BY org_id, created_at DESC, id DESC")
+    result = db.execute(query.execution_options(yield_per=10_000))
+    range_start, range_end = _as_datetime(start), _as_datetime(add_months(start, 1))
+    total = 0
+    for chunk, rows in enumerate(result.mappings().partitions(chunk_rows)):
+        archive.write_partition(name, range_start, range_end, [dict(row) for row in rows], chunk)
+        total += len(rows)
+    # The archive files and manifest are on disk (fsync'd) before the rows go away.
+    db.execute(text(f"DROP TABLE {name}"))
+    db.commit()
+    return total
+
+
+def run(archive_after_days: int, months_ahead: int, chunk_rows: int, dry_run: bool) -> None:
+    cutoff = datetime.now(UTC).date() - timedelta(days=archive_after_days)
+    with SessionLocal() as db:
+        if not dry_run:
+            ensure_partitions(db, months_ahead)
+        for name in attached_partitions(db):
+            start = _partition_start(name)
+            if start is None or add_months(start, 1) > cutoff:
+                continue
+            print(f"{'would detach' if dry_run else 'detaching'} {name}")
+            if not dry_run:
+                db.execute(text(f"ALTER TABLE audit_log DETACH PARTITION {name}"))
+                db.commit()
+        if dry_run:
+            return
+        for name in detached_partitions(db):
+            print(f"archived {name}: {archive_partition(db, name, chunk_rows)} rows")
+        stray = db.execute(text("SELECT count(*) FROM audit_log_default")).scalar() or 0
+        if stray:
+            print(f"warning: {stray} rows in audit_log_default; create partitions covering them")
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Create upcoming audit_log partitions and archive expired ones.")
+    parser.add_argument("--archive-after-days", type=int, default=settings.audit_archive_after_days)
+    parser.add_argument("--months-ahead", type=int, default=settings.audit_partitions_ahead)
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    run(args.archive_after_days, args.months_ahead, args.chunk_rows, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
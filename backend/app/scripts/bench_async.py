@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from collections import Counter
+
+import httpx
+
+# Point --target at two running API instances, one started with DB_ASYNC=false and one with DB_ASYNC=true,
+# e.g. --target sync=http://localhost:8000 --target async=http://localhost:8001.
+# Start both with RATE_LIMIT_ENABLED=false: every simulated client shares one login, so the per-org bucket would
+# turn the run into a measurement of fast 429s. A target that still sends RateLimit headers is refused.
+DEFAULT_PATHS = ["/requests?page_size=20", "/requests?cursor=&page_size=20", "/deals", "/notifications"]
+
+
+async def _login(base_url: str, email: str, password: str) -> httpx.Cookies:
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        res = await client.post("/auth/login", json={"email": email, "password": password})
+        res.raise_for_status()
+        return res.cookies
+
+
+async def _client_loop(
+    client: httpx.AsyncClient, paths: list[str], deadline: float, latencies: list[float], errors: Counter[int]
+) -> None:
+    i = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            res = await client.get(paths[i % len(paths)])
+        except httpx.HTTPError:
+            errors[0] += 1
+        else:
+            # Only successful responses are timed; an error page is usually much faster than the real work.
+            if res.is_success:
+                latencies.append((time.perf_counter() - started) * 1000)
+            else:
+                errors[res.status_code] += 1
+        i += 1
+
+
+async def run_target(name: str, base_url: str, args: argparse.Namespace) -> None:
+    cookies = await _login(base_url, args.email, args.password)
+    # One connection per simulated client so the server, not the benchmark's pool, is the bottleneck.
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, cookies=cookies, limits=limits, timeout=60) as client:
+        probe = await client.get(args.path[0])
+        if "ratelimit-limit" in probe.headers or probe.status_code == 429:
+            sys.exit(f"{name}: rate limiting is on; restart the target with RATE_LIMIT_ENABLED=false")
+        warmup: list[float] = []
+        await asyncio.gather(
+            *(
+                _client_loop(client, args.path, time.perf_counter() + args.warmup, warmup, Counter())
+                for _ in range(args.concurrency)
+            )
+        )
+        latencies: list[float] = []
+        errors: Counter[int] = Counter()
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(_client_loop(client, args.path, deadline, latencies, errors) for _ in range(args.concurrency))
+        )
+        elapsed = time.perf_counter() - started
+    failed = sum(errors.values())
+    total = len(latencies) + failed
+    # Status 0 is a transport error (timeout, refused connection).
+    summary = ", ".join(f"{status}: {count}" for status, count in sorted(errors.items()))
+    if not total or failed / total > args.max_error_ratio:
+        sys.exit(f"{name}: {failed} of {total} requests failed ({summary or 'no requests'}); results discarded")
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{name:8} {len(latencies) / elapsed:9.1f} req/s  p50={quantiles[49]:8.1f}ms  "
+        f"p95={quantiles[94]:8.1f}ms  p99={quantiles[98]:8.1f}ms  errors={failed}"
+        + (f" ({summary})" if summary else "")
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", action="append", required=True, help="name=base_url, repeatable")
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--path", action="append", help="request path, repeatable; defaults to the list endpoints")
+    parser.add_argument(
+        "--max-error-ratio", type=float, default=0.01, help="abort a target whose share of failed requests is higher"
+    )
+    parser.add_argument("--email", default="buyer@demo.local")
+    parser.add_argument("--password", default="Demo12345!")
+    args = parser.parse_args()
+    args.path = args.path or DEFAULT_PATHS
+    for target in args.target:
+        name, _, base_url = target.partition("=")
+        if not base_url:
+            parser.error(f"--target must be name=base_url, got {target!r}")
+        asyncio.run(run_target(name, base_url, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import UTC, date, datetime, timedelta
+
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.models import Organization, Request, RequestStatus
+from app.search import apply_search
+
+BENCH_ORG_NAME = "Search Bench Org"
+WORDS = [
+    "cloud", "migration", "security", "audit", "design", "frontend", "backend", "finops", "kubernetes",
+    "payroll", "logistics", "warehouse", "analytics", "dashboard", "compliance", "soc2", "gdpr", "mobile",
+    "onboarding", "integration", "erp", "crm", "procurement", "translation", "support", "training",
+]
+QUERIES = ["cloud migration", "soc2 audit", "warehouse", "kube", "gdpr compliance training"]
+
+
+def _sentence(rng: random.Random, length: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def seed_requests(db: Session, rows: int, batch_size: int) -> uuid.UUID:
+    org = db.scalar(select(Organization).where(Organization.name == BENCH_ORG_NAME))
+    if org is None:
+        org = Organization(name=BENCH_ORG_NAME)
+        db.add(org)
+        db.commit()
+    rng = random.Random(42)
+    now = datetime.now(UTC)
+    for start in range(0, rows, batch_size):
+        batch = [
+            {
+                "id": uuid.uuid4(),
+                "buyer_org_id": org.id,
+                "title": _sentence(rng, 4).title(),
+                "description": _sentence(rng, 24),
+                "budget_cents": rng.randint(10_000, 10_000_000),
+                "currency": "USD",
+                "deadline_date": date.today() + timedelta(days=rng.randint(7, 120)),
+                "tags": [],
+                "status": RequestStatus.QUOTING,
+                "created_at": now - timedelta(seconds=start + i),
+                "updated_at": now,
+            }
+            for i in range(min(batch_size, rows - start))
+        ]
+        db.execute(insert(Request), batch)
+        db.commit()
+        print(f"seeded {start + len(batch)}/{rows}")
+    return org.id
+
+
+def _time_query(db: Session, build, repeat: int) -> list[float]:  # type: ignore[no-untyped-def]
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        db.scalars(build().limit(20)).all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def run_benchmark(db: Session, org_id: uuid.UUID, repeat: int) -> None:
+    base = select(Request).where(Request.buyer_org_id == org_id)
+    for term in QUERIES:
+        ilike = _time_query(
+            db,
+            lambda term=term: base.where(
+                or_(Request.title.ilike(f"%{term}%"), Request.description.ilike(f"%{term}%"))
+            ).order_by(Request.created_at.desc()),
+            repeat,
+        )
+        ranked = _time_query(db, lambda term=term: apply_search(db, base, term), repeat)
+        print(
+            f"{term!r:32} ilike p50={statistics.median(ilike):8.2f}ms max={max(ilike):8.2f}ms | "
+            f"ranked p50={statistics.median(ranked):8.2f}ms max={max(ranked):8.2f}ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--cleanup", action="store_true")
+    args = parser.parse_args()
+    with SessionLocal() as db:
+        if args.skip_seed:
+            org_id = db.scalar(select(Organization.id).where(Organization.name == BENCH_ORG_NAME))
+            if org_id is None:
+                parser.error("no seeded benchmark data; run without --skip-seed first")
+        else:
+            org_id = seed_requests(db, args.rows, args.batch_size)
+        run_benchmark(db, org_id, args.repeat)
+        if args.cleanup:
+            db.execute(delete(Request).where(Request.buyer_org_id == org_id))
+            db.execute(delete(Organization).where(Organization.id == org_id))
+            db.commit()
+
+
+if __name__ == "__main__":
+    main()
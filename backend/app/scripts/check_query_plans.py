@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import argparse
+import sys
+
+from app.db import engine
+from app.query_plans import check, explain, router_queries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="EXPLAIN the list-router queries and fail on full scans.")
+    parser.add_argument("--verbose", action="store_true", help="print every plan, not just regressions")
+    args = parser.parse_args()
+    with engine.connect() as conn:
+        failures = check(conn)
+        if args.verbose:
+            for query in router_queries():
+                print(f"{query.name}: {' / '.join(explain(conn, query.statement))}")
+        conn.rollback()
+    for name, problems in failures.items():
+        for problem in problems:
+            print(f"REGRESSION {name}: {problem}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import signal
+import time
+from datetime import timedelta
+from typing import Any
+
+from app.config import get_settings
+from app.db import SessionLocal
+from app.outbox import OutboxRelay, outbox_stats, purge_dispatched
+from app.queue import get_queue
+
+logger = logging.getLogger("b2bak.outbox")
+
+PURGE_EVERY_SECONDS = 600.0
+STATS_EVERY_SECONDS = 60.0
+
+
+def run(batch_size: int, poll_interval: float, once: bool) -> None:
+    settings = get_settings()
+    relay = OutboxRelay(SessionLocal, get_queue, batch_size, settings.outbox_max_backoff_seconds)
+    stopping = False
+
+    def stop(_signum: int, _frame: Any) -> None:
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    next_purge = next_stats = time.monotonic()
+    while not stopping:
+        result = relay.relay_once()
+        if once and result.dispatched < batch_size:
+            return
+        now = time.monotonic()
+        if now >= next_stats:
+            next_stats = now + STATS_EVERY_SECONDS
+            with SessionLocal() as db:
+                logger.info("outbox backlog %s", outbox_stats(db))
+        if now >= next_purge:
+            next_purge = now + PURGE_EVERY_SECONDS
+            with SessionLocal() as db:
+                purge_dispatched(db, timedelta(hours=settings.outbox_retention_hours))
+        # A full batch means there is more waiting: loop straight away instead of sleeping.
+        if result.dispatched < batch_size:
+            time.sleep(poll_interval)
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Relay committed outbox jobs to RQ.")
+    parser.add_argument("--batch-size", type=int, default=settings.outbox_batch_size)
+    parser.add_argument("--poll-interval", type=float, default=settings.outbox_poll_interval_seconds)
+    parser.add_argument("--once", action="store_true", help="drain what is due and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    run(args.batch_size, args.poll_interval, args.once)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import argparse
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.rollups import apply_deltas, compute_rollups, drift, read_rollups
+
+logger = logging.getLogger("b2bak.rollups")
+
+
+def reconcile(db: Session, dry_run: bool = False) -> int:
+    # Truth and stored values come from one snapshot; on Postgres that needs REPEATABLE READ.
+    if db.get_bind().dialect.name == "postgresql":
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    corrections = drift(compute_rollups(db), read_rollups(db))
+    db.commit()
+    for (org_id, metric, bucket), delta in sorted(corrections.items(), key=lambda item: (str(item[0][0]), *item[0][1:])):
+        logger.warning("rollup drift org=%s %s/%s: %+d", org_id, metric, bucket, delta)
+    if corrections and not dry_run:
+        # Applied as increments rather than absolute values, so bumps committed since the snapshot are kept.
+        apply_deltas(db, corrections)
+        db.commit()
+    return len(corrections)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare dashboard rollups with the source tables and fix drift.")
+    parser.add_argument("--dry-run", action="store_true", help="only report drift")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    with SessionLocal() as db:
+        count = reconcile(db, args.dry_run)
+    logger.info("rollup reconciliation done, %d buckets %s", count, "drifted" if args.dry_run else "corrected")
+
+
+if __name__ == "__main__":
+    main()
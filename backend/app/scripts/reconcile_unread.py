@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+
+from redis.exceptions import RedisError
+
+from app.config import get_settings
+from app.db import SessionLocal
+from app.unread import reconcile
+
+logger = logging.getLogger("b2bak.unread")
+
+
+def run_once() -> int:
+    with SessionLocal() as db:
+        fixed = reconcile(db)
+    logger.info("unread counters reconciled, %d corrected", fixed)
+    return fixed
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Correct Redis unread notification counters from the table.")
+    parser.add_argument("--interval", type=float, default=settings.unread_reconcile_interval_seconds)
+    parser.add_argument("--once", action="store_true", help="run a single pass and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    while True:
+        try:
+            run_once()
+        except RedisError as exc:
+            if args.once:
+                raise
+            logger.warning("unread reconciliation skipped, Redis unavailable: %s", exc)
+        if args.once:
+            return
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,20 +19,24 @@ from app.models import (
     Message,
     Notification,
     Organization,
+    OrgRollup,
+    OutboxJob,
     Quote,
     QuoteStatus,
     Request,
+    RequestQuoteStats,
     RequestStatus,
     Role,
     User,
     VendorProfile,
     Invite,
 )
+from app.rollups import apply_deltas, compute_rollups, drift, read_rollups
 from app.security import hash_password
 
 
 def reset_data(db: Session) -> None:
-    for model in [Notification, Invite, Message, Invoice, Deal, Quote, Request, AuditLog, IdempotencyKey, VendorProfile, BuyerProfile, User, Organization]:
+    for model in [Notification, Invite, Message, Invoice, Deal, Quote, RequestQuoteStats, Request, AuditLog, IdempotencyKey, OutboxJob, OrgRollup, VendorProfile, BuyerProfile, User, Organization]:
         db.execute(delete(model))
     db.commit()
 
@@ -167,6 +171,9 @@ def seed_data(db: Session) -> None:
     write_audit(db, org_id=org.id, actor_user_id=admin.id, action="seed.create", entity="system", entity_id="bootstrap", payload={"source": "seed.py"})
     write_audit(db, org_id=org.id, actor_user_id=buyer.id, action="request.create", entity="request", entity_id=str(req_draft.id))
     write_audit(db, org_id=org.id, actor_user_id=buyer.id, action="request.shortlist", entity="request", entity_id=str(req_shortlist.id))
+    # Seed rows bypass the routers, so the dashboard rollups are brought in line with them here.
+    db.flush()
+    apply_deltas(db, drift(compute_rollups(db), read_rollups(db)))
     db.commit()
 
 
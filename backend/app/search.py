@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import math
+import re
+import threading
+import weakref
+from collections import defaultdict
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import Engine, Select, case, event, func, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import Session
+
+from app.models import Request
+
+# Kept in sync with the generated column in migration 20260220_0004. The 'simple' config
+# avoids English-only stemming since the marketplace serves both en and ru users.
+TS_CONFIG = "simple"
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_search_vector = literal_column("requests.search_vector", type_=TSVECTOR)
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in _TOKEN_RE.findall(text.lower()) if len(token) > 1 or token.isdigit()]
+
+
+class InvertedIndex:
+    # BM25 over title + description; the SQLite fallback for the Postgres tsvector index.
+    k1 = 1.2
+    b = 0.75
+    title_boost = 2
+
+    def __init__(self) -> None:
+        self._postings: dict[str, dict[UUID, int]] = defaultdict(dict)
+        self._doc_terms: dict[UUID, set[str]] = {}
+        self._doc_len: dict[UUID, int] = {}
+        self._total_len = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def add(self, doc_id: UUID, title: str, description: str) -> None:
+        tokens = tokenize(title) * self.title_boost + tokenize(description)
+        freqs: dict[str, int] = defaultdict(int)
+        for token in tokens:
+            freqs[token] += 1
+        with self._lock:
+            self._remove_locked(doc_id)
+            for term, tf in freqs.items():
+                self._postings[term][doc_id] = tf
+            self._doc_terms[doc_id] = set(freqs)
+            self._doc_len[doc_id] = len(tokens)
+            self._total_len += len(tokens)
+
+    def remove(self, doc_id: UUID) -> None:
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: UUID) -> None:
+        for term in self._doc_terms.pop(doc_id, ()):
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+        self._total_len -= self._doc_len.pop(doc_id, 0)
+
+    def search(self, query: str) -> list[tuple[UUID, float]]:
+        # Every query term must match (as a prefix, for type-ahead), mirroring `term:* & ...` in Postgres.
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self._lock:
+            doc_count = len(self._doc_len)
+            if doc_count == 0:
+                return []
+            avg_len = self._total_len / doc_count
+            scores: dict[UUID, float] | None = None
+            for term in terms:
+                term_scores: dict[UUID, float] = defaultdict(float)
+                for indexed, postings in self._postings.items():
+                    if not indexed.startswith(term):
+                        continue
+                    idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for doc_id, tf in postings.items():
+                        norm = tf + self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                        term_scores[doc_id] += idf * tf * (self.k1 + 1) / norm
+                if scores is None:
+                    scores = dict(term_scores)
+                else:
+                    scores = {doc_id: score + term_scores[doc_id] for doc_id, score in scores.items() if doc_id in term_scores}
+                if not scores:
+                    return []
+        return sorted((scores or {}).items(), key=lambda item: item[1], reverse=True)
+
+
+# One fallback index per engine, dropped with it; built lazily from the table on the first search.
+_fallback_indexes: weakref.WeakKeyDictionary[Engine, InvertedIndex] = weakref.WeakKeyDictionary()
+_build_lock = threading.Lock()
+
+
+def _uses_fallback(db: Session) -> bool:
+    return db.get_bind().dialect.name != "postgresql"
+
+
+def _engine(db: Session) -> Engine:
+    bind = db.get_bind()
+    return bind if isinstance(bind, Engine) else bind.engine
+
+
+def _fallback_index(db: Session) -> InvertedIndex:
+    engine = _engine(db)
+    index = _fallback_indexes.get(engine)
+    if index is not None:
+        return index
+    with _build_lock:
+        index = _fallback_indexes.get(engine)
+        if index is None:
+            index = InvertedIndex()
+            for row in db.execute(select(Request.id, Request.title, Request.description)):
+                index.add(row.id, row.title, row.description)
+            _fallback_indexes[engine] = index
+        return index
+
+
+def index_requests(db: Session, rows: list[dict[str, Any]]) -> None:
+    # Core bulk inserts bypass the ORM flush hook below, so callers feed the fallback index after their commit.
+    index = _fallback_indexes.get(_engine(db)) if _uses_fallback(db) else None
+    if index is not None:
+        for row in rows:
+            index.add(row["id"], row["title"], row["description"])
+
+
+@event.listens_for(Session, "after_flush")
+def _stage_fallback_changes(session: Session, _flush_context: Any) -> None:
+    # Applied after commit, so rows from a rolled back transaction never reach the index.
+    if session.bind is None or not _uses_fallback(session):
+        return
+    staged = session.info.setdefault("search_changes", {})
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Request):
+            staged[obj.id] = (obj.title, obj.description)
+    for obj in session.deleted:
+        if isinstance(obj, Request):
+            staged[obj.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_fallback_changes(session: Session) -> None:
+    staged = session.info.pop("search_changes", None)
+    index = _fallback_indexes.get(_engine(session)) if staged else None
+    if index is None:
+        # Not built yet: the first search reads the committed rows from the table.
+        return
+    for doc_id, fields in staged.items():
+        if fields is None:
+            index.remove(doc_id)
+        else:
+            index.add(doc_id, *fields)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_fallback_changes(session: Session, _previous_transaction: Any) -> None:
+    session.info.pop("search_changes", None)
+
+
+def apply_search(db: Session, query: Select[Any], search: str, *, ranked: bool = True) -> Select[Any]:
+    terms = tokenize(search)
+    if _uses_fallback(db):
+        hits = _fallback_index(db).search(search)
+        ids = [doc_id for doc_id, _ in hits]
+        query = query.where(Request.id.in_(ids))
+        if ranked and ids:
+            query = query.order_by(case({doc_id: pos for pos, doc_id in enumerate(ids)}, value=Request.id))
+        return query
+    pattern = f"%{search.strip()}%"
+    if not terms:
+        return query.where(Request.title.ilike(pattern))
+    ts_query = func.to_tsquery(TS_CONFIG, " & ".join(f"{term}:*" for term in terms))
+    # tsvector match uses the GIN index; the trigram index keeps substring matches on titles indexed too.
+    query = query.where(or_(_search_vector.op("@@")(ts_query), Request.title.ilike(pattern)))
+    if ranked:
+        rank = func.ts_rank_cd(_search_vector, ts_query) + func.similarity(Request.title, search.strip())
+        query = query.order_by(rank.desc())
+    return query
@@ -17,10 +17,10 @@ def verify_password(plain_password: str, password_hash: str) -> bool:
     return pwd_context.verify(plain_password, password_hash)
 
 
-def create_token(sub: str, token_type: str, expires_delta: timedelta) -> str:
+def create_token(sub: str, token_type: str, expires_delta: timedelta, extra: dict[str, Any] | None = None) -> str:
     settings = get_settings()
     now = datetime.now(UTC)
-    payload: dict[str, Any] = {"sub": sub, "type": token_type, "iat": int(now.timestamp())}
+    payload: dict[str, Any] = {**(extra or {}), "sub": sub, "type": token_type, "iat": int(now.timestamp())}
     payload["exp"] = int((now + expires_delta).timestamp())
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
 
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from collections.abc import Iterable
+from typing import Any
+from uuid import UUID
+
+from redis.exceptions import RedisError
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import Notification
+from app.redis_pool import get_redis_client, set_many_with_ttl
+
+logger = logging.getLogger("b2bak.unread")
+
+KEY_PREFIX = "b2bak:unread:"
+
+# Counters are only adjusted while they exist: a missing key means "unknown" and the next read seeds it from the
+# table, so an expired or evicted counter never restarts from zero.
+_ADJUST = """
+for i, key in ipairs(KEYS) do
+  if redis.call('EXISTS', key) == 1 then
+    if redis.call('INCRBY', key, ARGV[i]) < 0 then
+      redis.call('SET', key, 0, 'KEEPTTL')
+    end
+  end
+end
+return 0
+"""
+
+# Compare-and-set for reconciliation: a counter that moved since it was read is left for the next run.
+_REPLACE_IF_UNCHANGED = """
+local changed = 0
+for i, key in ipairs(KEYS) do
+  if redis.call('GET', key) == ARGV[2 * i - 1] then
+    redis.call('SET', key, ARGV[2 * i], 'KEEPTTL')
+    changed = changed + 1
+  end
+end
+return changed
+"""
+
+
+def counter_key(user_id: UUID) -> str:
+    return f"{KEY_PREFIX}{user_id}"
+
+
+def count_unread(db: Session, user_ids: Iterable[UUID]) -> dict[UUID, int]:
+    ids = list(user_ids)
+    counts = dict.fromkeys(ids, 0)
+    rows = db.execute(
+        select(Notification.user_id, func.count())
+        .where(Notification.user_id.in_(ids), Notification.read_at.is_(None))
+        .group_by(Notification.user_id)
+    )
+    counts.update({user_id: count for user_id, count in rows})
+    return counts
+
+
+def adjust(deltas: dict[UUID, int]) -> None:
+    items = sorted((str(user_id), delta) for user_id, delta in deltas.items() if delta)
+    if not items:
+        return
+    try:
+        client = get_redis_client()
+        client.eval(_ADJUST, len(items), *(KEY_PREFIX + user_id for user_id, _ in items), *(delta for _, delta in items))
+    except RedisError as exc:
+        # The rows are committed; the reconciliation job brings the counter back in line.
+        logger.warning("unread counter update failed: %s", exc)
+
+
+def unread_count(db: Session, user_id: UUID) -> int:
+    key = counter_key(user_id)
+    ttl = get_settings().unread_counter_ttl_seconds
+    try:
+        client = get_redis_client()
+        # Reading refreshes the TTL, so only counters of users who stopped polling expire.
+        cached = client.getex(key, ex=ttl)
+        if cached is not None:
+            return int(cached)
+    except RedisError as exc:
+        logger.warning("unread counter unavailable, counting from the table: %s", exc)
+        return count_unread(db, [user_id])[user_id]
+    count = count_unread(db, [user_id])[user_id]
+    try:
+        # NX: a counter seeded concurrently by another reader wins.
+        set_many_with_ttl(client, {key: count}, ttl, nx=True)
+    except RedisError as exc:
+        logger.warning("unread counter seed failed: %s", exc)
+    return count
+
+
+def stage(db: Session, user_id: UUID, delta: int) -> None:
+    # Applied after commit, so a rolled back insert or read never reaches the counter.
+    if delta:
+        db.info.setdefault("unread_deltas", Counter())[user_id] += delta
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_inserts(session: Session, _flush_context: Any) -> None:
+    for obj in session.new:
+        if isinstance(obj, Notification) and obj.read_at is None:
+            stage(session, obj.user_id, 1)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_on_commit(session: Session) -> None:
+    deltas = session.info.pop("unread_deltas", None)
+    if deltas:
+        adjust(deltas)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_on_rollback(session: Session, _previous_transaction: Any) -> None:
+    session.info.pop("unread_deltas", None)
+
+
+def reconcile(db: Session, batch_size: int = 500) -> int:
+    # Walks the live counters only; users without one are seeded from the table on their next read.
+    client = get_redis_client()
+    fixed = 0
+    batch: list[str] = []
+    for key in client.scan_iter(match=f"{KEY_PREFIX}*", count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            fixed += _reconcile_batch(db, client, batch)
+            batch = []
+    if batch:
+        fixed += _reconcile_batch(db, client, batch)
+    return fixed
+
+
+def _reconcile_batch(db: Session, client: Any, keys: list[str]) -> int:
+    # Counter values are read before the table, so a notification committed in between is seen by the CAS below
+    # as a moved counter rather than silently overwritten.
+    stored = client.mget(keys)
+    user_ids = [UUID(key.removeprefix(KEY_PREFIX)) for key in keys]
+    truth = count_unread(db, user_ids)
+    db.rollback()
+    stale = [
+        (key, value, truth[user_id])
+        for key, value, user_id in zip(keys, stored, user_ids, strict=True)
+        if value is not None and int(value) != truth[user_id]
+    ]
+    if not stale:
+        return 0
+    for key, value, count in stale:
+        logger.warning("unread counter drift %s: %s -> %d", key, value, count)
+    args = [part for _, value, count in stale for part in (value, count)]
+    return int(client.eval(_REPLACE_IF_UNCHANGED, len(stale), *(key for key, _, _ in stale), *args))
@@ -0,0 +1,37 @@
+"""add ranked search index for requests
+
+Revision ID: 20260220_0004
+Revises: 20260219_0003
+Create Date: 2026-02-20
+"""
+
+from alembic import op
+
+revision = "20260220_0004"
+down_revision = "20260219_0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "ALTER TABLE requests ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+        ") STORED"
+    )
+    op.create_index("ix_requests_search_vector", "requests", ["search_vector"], postgresql_using="gin")
+    op.create_index(
+        "ix_requests_title_trgm",
+        "requests",
+        ["title"],
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_requests_title_trgm", table_name="requests")
+    op.drop_index("ix_requests_search_vector", table_name="requests")
+    op.drop_column("requests", "search_vector")
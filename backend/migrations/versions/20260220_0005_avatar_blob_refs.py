@@ -0,0 +1,106 @@
+"""move inline avatar data urls into the avatar store
+
+Revision ID: 20260220_0005
+Revises: 20260220_0004
+Create Date: 2026-02-20
+"""
+
+import base64
+import binascii
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+from pathlib import Path
+
+from alembic import op
+import sqlalchemy as sa
+from PIL import Image, UnidentifiedImageError
+
+revision = "20260220_0005"
+down_revision = "20260220_0004"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+BATCH_SIZE = 200
+# Frozen copy of the avatar store layout at this revision:
+# <root>/<digest[:2]>/<digest>/{orig.<ext>,sm.webp,md.webp}, referenced as /avatars/<digest>.
+REF_PREFIX = "/avatars/"
+VARIANTS = {"sm": 64, "md": 256}
+FORMATS = {"PNG", "JPEG", "GIF", "WEBP"}
+DATA_URL_RE = re.compile(r"^data:image/[a-z0-9.+-]+;base64,(?P<data>.+)$", re.IGNORECASE | re.DOTALL)
+
+
+def _write(path: Path, payload: bytes) -> None:
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, "wb") as handle:
+        handle.write(payload)
+    os.replace(tmp_name, path)
+
+
+def _thumbnail(image: Image.Image, edge: int) -> bytes:
+    thumb = image.convert("RGBA")
+    thumb.thumbnail((edge, edge))
+    buffer = io.BytesIO()
+    thumb.save(buffer, format="WEBP", quality=85)
+    return buffer.getvalue()
+
+
+def _store(root: Path, value: str) -> str | None:
+    # None for anything the store cannot hold (SVG, utf8-encoded payloads, other formats); those stay inline.
+    match = DATA_URL_RE.match(value)
+    if not match:
+        return None
+    try:
+        data = base64.b64decode(match.group("data"), validate=True)
+        with Image.open(io.BytesIO(data)) as image:
+            image_format = image.format or ""
+            if image_format not in FORMATS:
+                return None
+            image.load()
+            thumbnails = {name: _thumbnail(image, edge) for name, edge in VARIANTS.items()}
+    except (binascii.Error, ValueError, UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        return None
+    digest = hashlib.sha256(data).hexdigest()
+    target = root / digest[:2] / digest
+    original = target / f"orig.{image_format.lower()}"
+    if not original.exists():
+        target.mkdir(parents=True, exist_ok=True)
+        for name, payload in thumbnails.items():
+            _write(target / f"{name}.webp", payload)
+        _write(original, data)
+    return f"{REF_PREFIX}{digest}"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    users = sa.table("users", sa.column("id"), sa.column("avatar_url"))
+    # Read the way Settings.avatar_storage_dir is, without importing the app config.
+    root = Path(os.environ.get("AVATAR_STORAGE_DIR", "var/avatars"))
+    last_id = None
+    skipped = 0
+    while True:
+        query = sa.select(users.c.id, users.c.avatar_url).where(users.c.avatar_url.like("data:%")).order_by(users.c.id)
+        if last_id is not None:
+            query = query.where(users.c.id > last_id)
+        rows = bind.execute(query.limit(BATCH_SIZE)).all()
+        if not rows:
+            break
+        for row in rows:
+            ref = _store(root, row.avatar_url)
+            if ref is None:
+                skipped += 1
+                continue
+            bind.execute(sa.update(users).where(users.c.id == row.id).values(avatar_url=ref))
+        last_id = rows[-1].id
+    if skipped:
+        logger.warning("%d avatar data urls could not be moved to the avatar store and were left inline", skipped)
+
+
+def downgrade() -> None:
+    # References stay valid after a downgrade; the blobs are not inlined back.
+    pass
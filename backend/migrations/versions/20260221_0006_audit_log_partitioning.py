@@ -0,0 +1,97 @@
+"""partition audit_log by month
+
+Revision ID: 20260221_0006
+Revises: 20260220_0005
+Create Date: 2026-02-21
+"""
+
+from datetime import UTC, date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260221_0006"
+down_revision = "20260220_0005"
+branch_labels = None
+depends_on = None
+
+COLUMNS = "id, org_id, actor_user_id, action, entity, entity_id, payload, created_at"
+# Months created past the current one; the audit_retention script keeps extending the window.
+PARTITIONS_AHEAD = 3
+
+
+def _add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _partition_ddl(start: date) -> str:
+    end = _add_months(start, 1)
+    return (
+        f"CREATE TABLE IF NOT EXISTS audit_log_p{start:%Y_%m} PARTITION OF audit_log "
+        f"FOR VALUES FROM ('{start.isoformat()} 00:00:00+00') TO ('{end.isoformat()} 00:00:00+00')"
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        op.create_index("ix_audit_log_org_id_created_at", "audit_log", ["org_id", "created_at"])
+        return
+    op.execute("ALTER TABLE audit_log RENAME TO audit_log_legacy")
+    op.execute("ALTER TABLE audit_log_legacy RENAME CONSTRAINT audit_log_pkey TO audit_log_legacy_pkey")
+    op.execute(
+        """
+        CREATE TABLE audit_log (
+            id uuid NOT NULL,
+            org_id uuid NOT NULL REFERENCES organizations(id),
+            actor_user_id uuid REFERENCES users(id),
+            action varchar(120) NOT NULL,
+            entity varchar(120) NOT NULL,
+            entity_id varchar(120) NOT NULL,
+            payload json NOT NULL,
+            created_at timestamptz NOT NULL,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    # Replaces the single-column indexes: every audit read is "this org, newest first".
+    op.execute("CREATE INDEX ix_audit_log_org_id_created_at ON audit_log (org_id, created_at)")
+    # Catches rows outside any monthly partition so inserts never fail; the retention job keeps it empty.
+    op.execute("CREATE TABLE audit_log_default PARTITION OF audit_log DEFAULT")
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM audit_log_legacy")).scalar()
+    now = datetime.now(UTC).date()
+    start = (oldest.date() if oldest else now).replace(day=1)
+    last = _add_months(now.replace(day=1), PARTITIONS_AHEAD)
+    while start <= last:
+        op.execute(_partition_ddl(start))
+        start = _add_months(start, 1)
+    op.execute(f"INSERT INTO audit_log ({COLUMNS}) SELECT {COLUMNS} FROM audit_log_legacy")
+    op.execute("DROP TABLE audit_log_legacy")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        op.drop_index("ix_audit_log_org_id_created_at", table_name="audit_log")
+        return
+    # Archived partitions are not restored; only rows still in the database come back.
+    op.execute("ALTER TABLE audit_log RENAME TO audit_log_partitioned")
+    op.execute("ALTER TABLE audit_log_partitioned RENAME CONSTRAINT audit_log_pkey TO audit_log_partitioned_pkey")
+    op.execute(
+        """
+        CREATE TABLE audit_log (
+            id uuid PRIMARY KEY,
+            org_id uuid REFERENCES organizations(id),
+            actor_user_id uuid REFERENCES users(id),
+            action varchar(120) NOT NULL,
+            entity varchar(120) NOT NULL,
+            entity_id varchar(120) NOT NULL,
+            payload json NOT NULL,
+            created_at timestamptz NOT NULL
+        )
+        """
+    )
+    op.execute("CREATE INDEX ix_audit_log_org_id ON audit_log (org_id)")
+    op.execute(f"INSERT INTO audit_log ({COLUMNS}) SELECT {COLUMNS} FROM audit_log_partitioned")
+    op.execute("DROP TABLE audit_log_partitioned CASCADE")
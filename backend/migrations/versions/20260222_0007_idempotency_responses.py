@@ -0,0 +1,44 @@
+"""store full responses for idempotent replays
+
+Revision ID: 20260222_0007
+Revises: 20260221_0006
+Create Date: 2026-02-22
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "20260222_0007"
+down_revision = "20260221_0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The old rows hold bare keys with no response to replay, so there is nothing worth carrying over.
+    op.drop_table("idempotency_keys")
+    op.create_table(
+        "idempotency_keys",
+        sa.Column("key", sa.String(length=400), primary_key=True),
+        sa.Column("fingerprint", sa.String(length=64), nullable=False),
+        sa.Column("status_code", sa.Integer(), nullable=True),
+        sa.Column("headers", sa.JSON(), nullable=True),
+        sa.Column("body", sa.LargeBinary(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_idempotency_keys_expires_at", "idempotency_keys", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_idempotency_keys_expires_at", table_name="idempotency_keys")
+    op.drop_table("idempotency_keys")
+    op.create_table(
+        "idempotency_keys",
+        sa.Column("org_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("organizations.id"), primary_key=True),
+        sa.Column("key", sa.String(length=120), primary_key=True),
+        sa.Column("endpoint", sa.String(length=255), primary_key=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint("org_id", "key", "endpoint", name="uq_idempotency"),
+    )
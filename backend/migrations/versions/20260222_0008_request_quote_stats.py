@@ -0,0 +1,58 @@
+"""per-request quote statistics rollup
+
+Revision ID: 20260222_0008
+Revises: 20260222_0007
+Create Date: 2026-02-22
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "20260222_0008"
+down_revision = "20260222_0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "request_quote_stats",
+        sa.Column("request_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("requests.id"), primary_key=True),
+        sa.Column("quote_count", sa.Integer(), nullable=False),
+        sa.Column("min_amount_cents", sa.Integer(), nullable=True),
+        sa.Column("median_amount_cents", sa.Integer(), nullable=True),
+        sa.Column("max_amount_cents", sa.Integer(), nullable=True),
+        sa.Column("fastest_timeline_days", sa.Integer(), nullable=True),
+        sa.Column("awarded_amount_cents", sa.Integer(), nullable=True),
+        sa.Column("amounts", sa.JSON(), nullable=False),
+        sa.Column("timelines", sa.JSON(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    # Mirrors app.quote_stats.summarize: withdrawn quotes are not counted, and the median of an even
+    # count is the floored mean of the middle pair.
+    op.execute(
+        """
+        INSERT INTO request_quote_stats (
+            request_id, quote_count, min_amount_cents, median_amount_cents, max_amount_cents,
+            fastest_timeline_days, awarded_amount_cents, amounts, timelines
+        )
+        SELECT
+            request_id,
+            count(*) FILTER (WHERE status <> 'WITHDRAWN'),
+            min(amount_cents) FILTER (WHERE status <> 'WITHDRAWN'),
+            floor(
+                percentile_cont(0.5) WITHIN GROUP (ORDER BY amount_cents) FILTER (WHERE status <> 'WITHDRAWN')
+            )::integer,
+            max(amount_cents) FILTER (WHERE status <> 'WITHDRAWN'),
+            min(timeline_days) FILTER (WHERE status <> 'WITHDRAWN'),
+            max(amount_cents) FILTER (WHERE status = 'ACCEPTED'),
+            coalesce(json_agg(amount_cents ORDER BY amount_cents) FILTER (WHERE status <> 'WITHDRAWN'), '[]'),
+            coalesce(json_agg(timeline_days ORDER BY timeline_days) FILTER (WHERE status <> 'WITHDRAWN'), '[]')
+        FROM quotes
+        GROUP BY request_id
+        """
+    )
+
+def downgrade() -> None:
+    op.drop_table("request_quote_stats")
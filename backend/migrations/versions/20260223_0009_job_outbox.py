@@ -0,0 +1,42 @@
+"""transactional outbox for background jobs
+
+Revision ID: 20260223_0009
+Revises: 20260222_0008
+Create Date: 2026-02-23
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "20260223_0009"
+down_revision = "20260222_0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_outbox",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("func", sa.String(length=255), nullable=False),
+        sa.Column("args", sa.JSON(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("available_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("dispatched_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    # Only undispatched rows are indexed, so the relay's poll stays cheap however much history is retained.
+    op.create_index(
+        "ix_job_outbox_pending",
+        "job_outbox",
+        ["available_at"],
+        postgresql_where=sa.text("dispatched_at IS NULL"),
+        sqlite_where=sa.text("dispatched_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_job_outbox_pending", table_name="job_outbox")
+    op.drop_table("job_outbox")
@@ -0,0 +1,63 @@
+"""per-org dashboard rollups
+
+Revision ID: 20260223_0010
+Revises: 20260223_0009
+Create Date: 2026-02-23
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "20260223_0010"
+down_revision = "20260223_0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "org_rollups",
+        sa.Column("org_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("organizations.id"), primary_key=True),
+        sa.Column("metric", sa.String(length=40), primary_key=True),
+        sa.Column("bucket", sa.String(length=40), primary_key=True),
+        sa.Column("value", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    # Same ground truth as app.rollups.compute_rollups; paid invoices are bucketed by UTC month.
+    op.execute(
+        """
+        WITH open_quotes AS (
+            SELECT q.vendor_org_id, r.buyer_org_id, q.amount_cents
+            FROM quotes q JOIN requests r ON r.id = q.request_id
+            WHERE q.status IN ('SUBMITTED', 'UPDATED')
+        ),
+        paid AS (
+            SELECT d.buyer_org_id, d.vendor_org_id, to_char(i.paid_at AT TIME ZONE 'UTC', 'YYYY-MM') AS month,
+                i.amount_cents
+            FROM invoices i JOIN deals d ON d.id = i.deal_id
+            WHERE i.status = 'PAID' AND i.paid_at IS NOT NULL
+        ),
+        truth (org_id, metric, bucket, value) AS (
+            SELECT buyer_org_id, 'requests', status::text, count(*) FROM requests GROUP BY 1, 3
+            UNION ALL SELECT buyer_org_id, 'deals', status::text, count(*) FROM deals GROUP BY 1, 3
+            UNION ALL SELECT vendor_org_id, 'deals', status::text, count(*) FROM deals GROUP BY 1, 3
+            UNION ALL SELECT vendor_org_id, 'open_quotes_submitted', 'count', count(*) FROM open_quotes GROUP BY 1
+            UNION ALL SELECT vendor_org_id, 'open_quotes_submitted', 'value_cents', sum(amount_cents)
+                FROM open_quotes GROUP BY 1
+            UNION ALL SELECT buyer_org_id, 'open_quotes_received', 'count', count(*) FROM open_quotes GROUP BY 1
+            UNION ALL SELECT buyer_org_id, 'open_quotes_received', 'value_cents', sum(amount_cents)
+                FROM open_quotes GROUP BY 1
+            UNION ALL SELECT buyer_org_id, 'invoices_paid_cents', month, sum(amount_cents) FROM paid GROUP BY 1, 3
+            UNION ALL SELECT vendor_org_id, 'invoices_earned_cents', month, sum(amount_cents) FROM paid GROUP BY 1, 3
+        )
+        INSERT INTO org_rollups (org_id, metric, bucket, value)
+        SELECT org_id, metric, bucket, sum(value) FROM truth
+        GROUP BY org_id, metric, bucket
+        HAVING sum(value) > 0
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("org_rollups")
@@ -0,0 +1,69 @@
+"""composite and partial indexes matching the list routers
+
+Revision ID: 20260224_0011
+Revises: 20260223_0010
+Create Date: 2026-02-24
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260224_0011"
+down_revision = "20260223_0010"
+branch_labels = None
+depends_on = None
+
+# Status list of app.models.MARKETPLACE_STATUSES at this revision.
+MARKETPLACE_PREDICATE = "status IN ('PUBLISHED', 'QUOTING', 'SHORTLIST')"
+
+# (name, table, columns, partial predicate)
+INDEXES = [
+    ("ix_requests_buyer_org_id_created_at", "requests", ["buyer_org_id", "created_at", "id"], None),
+    ("ix_requests_marketplace_created_at", "requests", ["created_at", "id"], MARKETPLACE_PREDICATE),
+    ("ix_quotes_request_id_created_at", "quotes", ["request_id", "created_at", "id"], None),
+    ("ix_quotes_vendor_org_id_created_at", "quotes", ["vendor_org_id", "created_at", "id"], None),
+    ("ix_deals_buyer_org_id_created_at", "deals", ["buyer_org_id", "created_at", "id"], None),
+    ("ix_deals_vendor_org_id_created_at", "deals", ["vendor_org_id", "created_at", "id"], None),
+    ("ix_messages_deal_id_created_at", "messages", ["deal_id", "created_at"], None),
+    ("ix_notifications_user_id_created_at", "notifications", ["user_id", "created_at", "id"], None),
+    ("ix_notifications_unread_user_id_created_at", "notifications", ["user_id", "created_at", "id"], "read_at IS NULL"),
+    ("ix_invites_org_id_created_at", "invites", ["org_id", "created_at"], None),
+]
+
+# Single-column indexes that are now the leading column of a composite above; dropping them saves a write per row.
+SUPERSEDED = [
+    ("ix_requests_buyer_org_id", "requests", ["buyer_org_id"]),
+    ("ix_quotes_request_id", "quotes", ["request_id"]),
+    ("ix_quotes_vendor_org_id", "quotes", ["vendor_org_id"]),
+    ("ix_deals_buyer_org_id", "deals", ["buyer_org_id"]),
+    ("ix_deals_vendor_org_id", "deals", ["vendor_org_id"]),
+    ("ix_messages_deal_id", "messages", ["deal_id"]),
+    ("ix_notifications_user_id", "notifications", ["user_id"]),
+    ("ix_invites_org_id", "invites", ["org_id"]),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction, and keeps the tables writable while the indexes build.
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            predicate = sa.text(where) if where else None
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_where=predicate,
+                sqlite_where=predicate,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for name, table, _columns in SUPERSEDED:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in SUPERSEDED:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _columns, _where in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
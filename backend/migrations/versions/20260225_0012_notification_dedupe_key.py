@@ -0,0 +1,39 @@
+"""dedupe key for fan-out notifications
+
+Revision ID: 20260225_0012
+Revises: 20260224_0011
+Create Date: 2026-02-25
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260225_0012"
+down_revision = "20260224_0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("notifications", sa.Column("dedupe_key", sa.String(length=120), nullable=True))
+    # Existing rows keep a NULL key, which never conflicts; CONCURRENTLY keeps notifications writable.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "uq_notifications_user_id_dedupe_key",
+            "notifications",
+            ["user_id", "dedupe_key"],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "uq_notifications_user_id_dedupe_key",
+            table_name="notifications",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("notifications", "dedupe_key")
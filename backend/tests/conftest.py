@@ -1,15 +1,20 @@
+import uuid
 from collections.abc import Generator
+from datetime import timedelta
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from app.db import Base, get_db
 from app.main import app
+from app.models import Organization, Role, User
+from app.security import create_token
 
 SQLALCHEMY_DATABASE_URL = "sqlite+pysqlite:///:memory:"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool)
 TestingSessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, class_=Session)
 
 
@@ -33,3 +38,21 @@ def client(db: Session) -> Generator[TestClient, None, None]:
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
+
+
+@pytest.fixture()
+def login_as(client: TestClient, db: Session):
+    # Pass user= to switch back to an existing user instead of creating one.
+    def _login(role: Role = Role.BUYER, org: Organization | None = None, user: User | None = None) -> User:
+        if user is None:
+            if org is None:
+                org = Organization(name="Test Org")
+                db.add(org)
+                db.flush()
+            user = User(org_id=org.id, email=f"{uuid.uuid4().hex}@test.local", password_hash="x", role=role)
+            db.add(user)
+            db.commit()
+        client.cookies.set("b2bak_access", create_token(str(user.id), "access", timedelta(minutes=5)))
+        return user
+
+    return _login
@@ -0,0 +1,119 @@
+from collections.abc import AsyncGenerator, Generator
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.db import Base, get_async_db, get_db
+from app.exceptions import AppError, NotModified, app_error_handler, not_modified_handler
+from app.main import app
+from app.models import Deal, Message, Notification, Organization, Request, RequestStatus, Role, User
+from app.routers import async_reads
+from app.security import create_token
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture()
+def clients(tmp_path: Path) -> Generator[tuple[TestClient, TestClient, dict[str, str]], None, None]:
+    # A file database so the sync and async engines read the same rows.
+    db_path = tmp_path / "reads.db"
+    sync_engine = create_engine(f"sqlite+pysqlite:///{db_path}")
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    Base.metadata.create_all(bind=sync_engine)
+    SyncSession = sessionmaker(bind=sync_engine, class_=Session)
+    AsyncSessionTest = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    with SyncSession() as db:
+        buyer_org, vendor_org = Organization(name="Buyer"), Organization(name="Vendor")
+        db.add_all([buyer_org, vendor_org])
+        db.flush()
+        buyer = User(org_id=buyer_org.id, email="buyer@async.test", password_hash="x", role=Role.BUYER)
+        db.add(buyer)
+        db.flush()
+        reqs = [
+            Request(
+                buyer_org_id=buyer_org.id,
+                title=f"Request {i}",
+                description="cloud migration",
+                budget_cents=1000,
+                deadline_date=date.today() + timedelta(days=30),
+                status=RequestStatus.QUOTING,
+            )
+            for i in range(5)
+        ]
+        db.add_all(reqs)
+        db.flush()
+        deal = Deal(buyer_org_id=buyer_org.id, vendor_org_id=vendor_org.id, request_id=reqs[0].id)
+        db.add(deal)
+        db.flush()
+        db.add(Message(deal_id=deal.id, sender_user_id=buyer.id, body="hello"))
+        db.add(Notification(org_id=buyer_org.id, user_id=buyer.id, type="request.published", payload={}))
+        db.commit()
+        ids = {"request": str(reqs[0].id), "deal": str(deal.id)}
+        token = create_token(str(buyer.id), "access", timedelta(minutes=5))
+
+    def override_get_db() -> Generator[Session, None, None]:
+        with SyncSession() as db:
+            yield db
+
+    async def override_get_async_db() -> AsyncGenerator[AsyncSession, None]:
+        async with AsyncSessionTest() as db:
+            yield db
+
+    async_app = FastAPI()
+    async_app.add_exception_handler(AppError, app_error_handler)
+    async_app.add_exception_handler(NotModified, not_modified_handler)
+    async_app.include_router(async_reads.router)
+    async_app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as sync_client, TestClient(async_app) as async_client:
+        for c in (sync_client, async_client):
+            c.cookies.set("b2bak_access", token)
+        yield sync_client, async_client, ids
+    app.dependency_overrides.clear()
+    sync_engine.dispose()
+
+
+def test_async_reads_match_sync_handlers(clients: tuple[TestClient, TestClient, dict[str, str]]) -> None:
+    sync_client, async_client, ids = clients
+    paths = [
+        "/requests?page_size=2",
+        "/requests?cursor=&page_size=2",
+        "/requests?search=cloud",
+        f"/requests/{ids['request']}",
+        "/deals",
+        f"/deals/{ids['deal']}/messages",
+        "/notifications?unread_only=true",
+    ]
+    for path in paths:
+        expected = sync_client.get(path)
+        actual = async_client.get(path)
+        assert expected.status_code == 200, path
+        assert actual.status_code == 200, path
+        assert actual.json() == expected.json(), path
+
+    # Same conditional-GET contract on both stacks.
+    etag = sync_client.get(f"/requests/{ids['request']}").headers["etag"]
+    assert async_client.get(f"/requests/{ids['request']}").headers["etag"] == etag
+    assert async_client.get(f"/requests/{ids['request']}", headers={"If-None-Match": etag}).status_code == 304
+
+    cursor = async_client.get("/requests?cursor=&page_size=2").json()["next_cursor"]
+    assert async_client.get(f"/requests?cursor={cursor}&page_size=2").json() == sync_client.get(
+        f"/requests?cursor={cursor}&page_size=2"
+    ).json()
+
+
+def test_async_reads_hide_other_orgs(clients: tuple[TestClient, TestClient, dict[str, str]]) -> None:
+    _, async_client, _ = clients
+    missing = "00000000-0000-0000-0000-000000000000"
+    assert async_client.get(f"/requests/{missing}").status_code == 404
+    assert async_client.get(f"/deals/{missing}/messages").status_code == 404
+    async_client.cookies.clear()
+    assert async_client.get("/deals").status_code == 401
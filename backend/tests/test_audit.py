@@ -0,0 +1,95 @@
+import uuid
+from datetime import UTC, datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.audit import BufferedAuditSink, _encode, _Segment
+from app.models import AuditLog, Organization
+
+
+def _entry(org_id: uuid.UUID, action: str) -> dict[str, object]:
+    return {
+        "id": uuid.uuid4(),
+        "org_id": org_id,
+        "actor_user_id": None,
+        "action": action,
+        "entity": "request",
+        "entity_id": "r-1",
+        "payload": {"title": "x"},
+        "created_at": datetime.now(UTC),
+    }
+
+
+def _audit_count(db: Session) -> int:
+    db.expire_all()
+    return db.scalar(select(func.count()).select_from(AuditLog)) or 0
+
+
+def test_buffered_sink_writes_after_commit_and_skips_rollback(db: Session, tmp_path: Path) -> None:
+    org = Organization(name="Audit Org")
+    db.add(org)
+    db.commit()
+    sink = BufferedAuditSink(tmp_path, sessionmaker(bind=db.get_bind()), batch_size=10, flush_interval=60)
+
+    sink.record(db, _entry(org.id, "request.rolled_back"))
+    db.rollback()
+    sink.record(db, _entry(org.id, "request.create"))
+    sink.record(db, _entry(org.id, "request.publish"))
+    sink.record(db, _entry(org.id, "request.award"))
+    db.commit()
+
+    assert _audit_count(db) == 0
+    assert len(list(tmp_path.glob("audit-*.ndjson"))) == 1
+    assert sink.flush() == 3
+    sink.stop()
+    assert _audit_count(db) == 3
+    assert db.scalar(select(func.count()).where(AuditLog.action == "request.rolled_back")) == 0
+    assert list(tmp_path.glob("audit-*.ndjson")) == []
+
+
+def test_buffered_sink_replays_spool_left_by_crash(db: Session, tmp_path: Path) -> None:
+    org = Organization(name="Audit Org")
+    db.add(org)
+    db.commit()
+    entries = [_entry(org.id, f"request.e{i}") for i in range(3)]
+    # A dead process's segment: one entry already inserted before the crash, and a torn final line.
+    db.add(AuditLog(**entries[0]))
+    db.commit()
+    (tmp_path / "audit-999-dead.ndjson").write_text("".join(_encode(e) + "\n" for e in entries) + '{"id": "tor')
+
+    sink = BufferedAuditSink(tmp_path, sessionmaker(bind=db.get_bind()), flush_interval=60)
+    sink.start()
+    sink.stop()
+
+    assert _audit_count(db) == 3
+    assert list(tmp_path.glob("audit-*.ndjson")) == []
+
+
+def test_claim_skips_segments_discarded_by_their_owner(tmp_path: Path) -> None:
+    owner = _Segment.create(tmp_path)
+    assert _Segment.claim(owner.path) is None
+    owner.discard()
+    # Listed by the recoverer, then unlinked before it got to open it.
+    assert _Segment.claim(owner.path) is None
+
+
+def test_spool_failure_after_commit_inserts_entries_directly(
+    db: Session, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    org = Organization(name="Audit Org")
+    db.add(org)
+    db.commit()
+    sink = BufferedAuditSink(tmp_path, sessionmaker(bind=db.get_bind()), flush_interval=60)
+
+    def disk_full(self: _Segment, entries: list, fsync: bool) -> None:
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(_Segment, "append", disk_full)
+    sink.record(db, _entry(org.id, "request.create"))
+    db.commit()
+    sink.stop()
+
+    assert _audit_count(db) == 1
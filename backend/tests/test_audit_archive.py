@@ -0,0 +1,92 @@
+import uuid
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import audit_archive
+from app.audit_archive import AuditArchive
+from app.models import AuditLog, Organization
+from app.routers import audit as audit_router
+
+
+def _row(org_id: uuid.UUID, action: str, created_at: datetime) -> dict[str, object]:
+    return {
+        "id": uuid.uuid4(),
+        "org_id": org_id,
+        "actor_user_id": None,
+        "action": action,
+        "entity": "request",
+        "entity_id": "r-1",
+        "payload": {},
+        "created_at": created_at,
+    }
+
+
+def test_keyset_pages_continue_into_archived_partitions(
+    client: TestClient, db: Session, login_as, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    user = login_as()
+    other_org = Organization(name="Other")
+    db.add(other_org)
+    now = datetime.now(UTC).replace(tzinfo=None)
+    for i in range(2):
+        db.add(AuditLog(**_row(user.org_id, "request.create", now - timedelta(minutes=i))))
+    db.commit()
+
+    archive = AuditArchive(tmp_path)
+    old = datetime(2025, 1, 15, tzinfo=UTC)
+    archive.write_partition(
+        "audit_log_p2025_01",
+        datetime(2025, 1, 1, tzinfo=UTC),
+        datetime(2025, 2, 1, tzinfo=UTC),
+        [_row(user.org_id, f"request.old{i}", old - timedelta(hours=i)) for i in range(3)]
+        + [_row(other_org.id, "request.other", old)],
+    )
+    monkeypatch.setattr(audit_router, "get_audit_archive", lambda: archive)
+
+    actions: list[str] = []
+    cursor = ""
+    while cursor is not None:
+        body = client.get("/audit", params={"cursor": cursor, "page_size": 2}).json()
+        assert len(body["items"]) <= 2
+        actions += [item["action"] for item in body["items"]]
+        cursor = body["next_cursor"]
+    assert actions == ["request.create", "request.create", "request.old0", "request.old1", "request.old2"]
+
+    filtered = client.get("/audit", params={"cursor": "", "action": "request.old1"}).json()
+    assert [item["action"] for item in filtered["items"]] == ["request.old1"]
+
+    # Offset pages stay on the live table.
+    assert client.get("/audit").json()["total"] == 2
+
+
+def test_archive_reads_only_the_blocks_of_the_org(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(audit_archive, "BLOCK_ROWS", 2)
+    org, other = uuid.uuid4(), uuid.uuid4()
+    old = datetime(2025, 1, 15, tzinfo=UTC)
+    archive = AuditArchive(tmp_path)
+    archive.write_partition(
+        "audit_log_p2025_01",
+        datetime(2025, 1, 1, tzinfo=UTC),
+        datetime(2025, 2, 1, tzinfo=UTC),
+        [_row(org, f"a{i}", old - timedelta(hours=i)) for i in range(5)] + [_row(other, "b", old)],
+    )
+    (partition,) = AuditArchive(tmp_path).partitions()
+    assert [block.rows for block in partition.orgs[str(org)]] == [2, 2, 1]
+
+    audit_archive._load_block.cache_clear()
+    assert archive.scan(uuid.uuid4(), before=None, entity=None, action=None, limit=10) == []
+    assert audit_archive._load_block.cache_info().misses == 0
+
+    page = archive.scan(org, before=None, entity=None, action=None, limit=3)
+    assert [row.action for row in page] == ["a0", "a1", "a2"]
+    after = archive.scan(org, before=(page[-1].created_at, page[-1].id), entity=None, action=None, limit=10)
+    assert [row.action for row in after] == ["a3", "a4"]
+    # The cursor lands in the middle block; the newest block is skipped from the manifest alone.
+    assert audit_archive._load_block.cache_info().misses == 3
+
+    exported = archive.iter_ascending(org, since=old - timedelta(hours=3), until=None, after=None, entity=None, action=None)
+    assert [row["action"] for row in exported] == ["a3", "a2", "a1", "a0"]
@@ -0,0 +1,55 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models import AuditLog
+
+
+def _seed(db: Session, org_id: uuid.UUID, count: int) -> datetime:
+    base = datetime(2026, 3, 1, 12, 0, 0)
+    for i in range(count):
+        db.add(
+            AuditLog(
+                id=uuid.uuid4(),
+                org_id=org_id,
+                actor_user_id=None,
+                action="request.publish" if i % 2 else "request.create",
+                entity="request",
+                entity_id=f"r-{i}",
+                payload={"n": i},
+                created_at=base + timedelta(minutes=i),
+            )
+        )
+    db.commit()
+    return base
+
+
+def test_export_ndjson_filters_and_resumes(client: TestClient, db: Session, login_as) -> None:
+    user = login_as()
+    base = _seed(db, user.org_id, 6)
+
+    res = client.get("/audit/export", params={"since": (base + timedelta(minutes=1)).isoformat()})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert [row["entity_id"] for row in rows] == ["r-1", "r-2", "r-3", "r-4", "r-5"]
+
+    resumed = client.get("/audit/export", params={"after": rows[1]["cursor"], "action": "request.publish"})
+    assert [json.loads(line)["entity_id"] for line in resumed.text.splitlines()] == ["r-3", "r-5"]
+
+
+def test_export_csv_gzip(client: TestClient, db: Session, login_as) -> None:
+    user = login_as()
+    _seed(db, user.org_id, 3)
+
+    res = client.get("/audit/export", params={"format": "csv"}, headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    # httpx undoes the Content-Encoding, so the text is plain CSV.
+    table = list(csv.DictReader(io.StringIO(res.text)))
+    assert [row["entity_id"] for row in table] == ["r-0", "r-1", "r-2"]
+    assert json.loads(table[2]["payload"]) == {"n": 2}
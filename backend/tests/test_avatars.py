@@ -0,0 +1,40 @@
+import base64
+import io
+
+from PIL import Image
+
+from app.avatars import AvatarStore
+from app.models import Role
+
+
+def _png_data_url() -> str:
+    buffer = io.BytesIO()
+    Image.new("RGB", (400, 300), (124, 58, 237)).save(buffer, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+
+def test_profile_avatar_is_stored_by_reference(client, login_as, tmp_path, monkeypatch):
+    store = AvatarStore(tmp_path)
+    monkeypatch.setattr("app.routers.auth.get_avatar_store", lambda: store)
+    monkeypatch.setattr("app.routers.avatars.get_avatar_store", lambda: store)
+    login_as(Role.BUYER)
+
+    avatar_url = client.patch("/auth/profile", json={"avatar_url": _png_data_url()}).json()["avatar_url"]
+    assert avatar_url.startswith("/avatars/") and len(avatar_url) == len("/avatars/") + 64
+    assert client.get("/auth/me").json()["user"]["avatar_url"] == avatar_url
+    assert client.patch("/auth/profile", json={"avatar_url": avatar_url}).status_code == 200
+
+    thumb = client.get(avatar_url, params={"size": "sm"})
+    assert thumb.status_code == 200
+    assert thumb.headers["content-type"] == "image/webp"
+    assert "immutable" in thumb.headers["cache-control"]
+    assert Image.open(io.BytesIO(thumb.content)).size == (64, 48)
+
+    cached = client.get(avatar_url, params={"size": "sm"}, headers={"If-None-Match": thumb.headers["etag"]})
+    assert cached.status_code == 304
+
+
+def test_invalid_image_payload_is_rejected(client, login_as):
+    login_as(Role.BUYER)
+    bogus = "data:image/png;base64," + base64.b64encode(b"not an image").decode()
+    assert client.patch("/auth/profile", json={"avatar_url": bogus}).status_code == 422
@@ -0,0 +1,42 @@
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models import Role
+
+
+def test_conditional_get_answers_304_until_the_entity_changes(client: TestClient, db: Session, login_as) -> None:
+    login_as(Role.BUYER)
+    payload = {"title": "Data platform", "description": "Build a data platform", "budget_cents": 100_000}
+    payload["deadline_date"] = str(date.today() + timedelta(days=30))
+    url = f"/requests/{client.post('/requests', json=payload).json()['id']}"
+
+    first = client.get(url)
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+    cached = client.get(url, headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.content == b"" and cached.headers["etag"] == etag
+    # Strong form of the same tag and lists are matched weakly.
+    assert client.get(url, headers={"If-None-Match": f'"x", {etag.removeprefix("W/")}'}).status_code == 304
+
+    client.post(f"{url}/publish")
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.json()["status"] == "QUOTING"
+    assert changed.headers["etag"] != etag
+
+    # Visibility is checked before the tag: another org's buyer gets a 404, not a 304.
+    login_as(Role.BUYER)
+    assert client.get(url, headers={"If-None-Match": changed.headers["etag"]}).status_code == 404
+
+
+def test_profile_etag_follows_profile_updates(client: TestClient, login_as) -> None:
+    login_as(Role.BUYER)
+    etag = client.get("/auth/profile").headers["etag"]
+    assert client.get("/auth/profile", headers={"If-None-Match": etag}).status_code == 304
+    me = client.get("/auth/me").headers["etag"]
+    assert client.get("/auth/me", headers={"If-None-Match": me}).status_code == 304
+
+    client.patch("/auth/profile", json={"display_name": "Ada"})
+    assert client.get("/auth/profile", headers={"If-None-Match": etag}).status_code == 200
+    assert client.get("/auth/me", headers={"If-None-Match": me}).status_code == 200
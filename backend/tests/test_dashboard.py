@@ -0,0 +1,56 @@
+from datetime import UTC, date, datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models import OrgRollup, Role
+from app.rollups import compute_rollups, read_rollups
+from app.scripts.reconcile_rollups import reconcile
+
+
+def test_dashboard_rollups_follow_the_deal_flow_and_reconcile(client: TestClient, db: Session, login_as) -> None:
+    buyer = login_as(Role.BUYER)
+    payload = {"title": "Data platform", "description": "Build a data platform", "budget_cents": 100_000}
+    payload["deadline_date"] = str(date.today() + timedelta(days=30))
+    req = client.post("/requests", json=payload).json()
+    client.post("/requests", json=payload)
+    client.post(f"/requests/{req['id']}/publish")
+
+    vendor = login_as(Role.VENDOR)
+    quote = {"request_id": req["id"], "terms": "Net 30, fixed price", "timeline_days": 10}
+    first = client.post("/quotes", json={**quote, "amount_cents": 500}).json()
+    client.post("/quotes/batch", json={"items": [{**quote, "amount_cents": 300}, {**quote, "amount_cents": 900}]})
+    client.patch(f"/quotes/{first['id']}", json={"amount_cents": 700})
+    withdrawn = client.post("/quotes", json={**quote, "amount_cents": 50}).json()
+    client.post(f"/quotes/{withdrawn['id']}/withdraw")
+    assert client.get("/dashboard").json()["open_quotes_submitted"] == {"count": 3, "value_cents": 1_900}
+
+    login_as(user=buyer)
+    body = client.get("/dashboard").json()
+    assert body["requests"] == {"DRAFT": 1, "PUBLISHED": 0, "QUOTING": 1, "SHORTLIST": 0, "AWARDED": 0, "CLOSED": 0}
+    assert body["open_quotes_received"] == {"count": 3, "value_cents": 1_900}
+
+    client.post(f"/requests/{req['id']}/shortlist")
+    deal_id = client.post(f"/requests/{req['id']}/award", json={"winning_quote_id": first["id"]}).json()["deal_id"]
+    client.post(f"/deals/{deal_id}/create-invoice")
+    client.post(f"/deals/{deal_id}/mark-paid")
+    month = f"{datetime.now(UTC):%Y-%m}"
+    body = client.get("/dashboard").json()
+    assert body["requests"]["AWARDED"] == 1
+    assert body["deals"]["PAID"] == 1 and body["deals"]["NEGOTIATION"] == 0
+    assert body["open_quotes_received"] == {"count": 0, "value_cents": 0}
+    assert body["invoices_paid_cents"] == {month: 700}
+
+    login_as(user=vendor)
+    assert client.get("/dashboard").json()["invoices_earned_cents"] == {month: 700}
+
+    # Buckets that went back to zero keep their row; everything else matches the source tables.
+    assert +read_rollups(db) == compute_rollups(db)
+    db.execute(update(OrgRollup).where(OrgRollup.org_id == buyer.org_id, OrgRollup.metric == "requests").values(value=42))
+    db.commit()
+    assert reconcile(db, dry_run=True) == 4
+    assert reconcile(db) == 4
+    assert reconcile(db) == 0
+    login_as(user=buyer)
+    assert client.get("/dashboard").json()["requests"]["DRAFT"] == 1
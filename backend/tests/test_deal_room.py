@@ -0,0 +1,64 @@
+import uuid
+
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.websockets import WebSocketDisconnect
+
+from app import deal_room
+from app.deal_room import MessageWriter
+from app.models import Message, Role
+from app.realtime import hub
+from tests.test_messages import _deal
+
+
+@pytest.fixture()
+def room(monkeypatch: pytest.MonkeyPatch, client: TestClient, db: Session):
+    server = fakeredis.FakeServer()
+    published: list[tuple[str, dict]] = []
+    writer = MessageWriter(sessionmaker(bind=db.get_bind()), batch_size=10, queue_size=10)
+    monkeypatch.setattr(deal_room, "get_async_redis_client", lambda: fakeredis.FakeAsyncRedis(server=server, decode_responses=True))
+    monkeypatch.setattr(deal_room, "publish_many", published.extend)
+    monkeypatch.setattr(deal_room, "_writer", writer)
+    yield published
+    client.portal.call(writer.stop)
+
+
+def test_deal_room_persists_acks_and_relays(client: TestClient, db: Session, login_as, room) -> None:
+    buyer = login_as(Role.BUYER)
+    deal = _deal(db, buyer)
+    topic = f"deal:{deal.id}"
+    with client.websocket_connect(f"/deals/{deal.id}/ws") as ws:
+        assert ws.receive_json() == {"type": "presence.snapshot", "data": {"user_ids": [str(buyer.id)]}}
+
+        ws.send_json({"type": "message", "client_id": "c1", "body": "hello"})
+        ack = ws.receive_json()
+        assert ack["type"] == "ack" and ack["client_id"] == "c1"
+        assert db.scalar(select(Message.body).where(Message.id == uuid.UUID(ack["id"]))) == "hello"
+        assert room == [(topic, {"type": "message", "id": ack["id"], "data": ack["data"]})]
+
+        ws.send_json({"type": "message", "client_id": "c2", "body": ""})
+        assert ws.receive_json()["type"] == "error"
+
+        # Own typing echoes are dropped, other members' events are relayed.
+        client.portal.call(hub.dispatch, topic, {"type": "typing", "data": {"user_id": str(buyer.id)}})
+        other = str(uuid.uuid4())
+        client.portal.call(hub.dispatch, topic, {"type": "typing", "data": {"user_id": other}})
+        assert ws.receive_json() == {"type": "typing", "data": {"user_id": other}}
+
+        # A subscriber that fell behind is disconnected and told to resync.
+        client.portal.call(hub._drop_all)
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+        assert closed.value.code == deal_room.CLOSE_TOO_SLOW
+    assert topic not in hub._subs
+
+
+def test_deal_room_rejects_non_party(client: TestClient, db: Session, login_as, room) -> None:
+    deal = _deal(db, login_as(Role.BUYER))
+    login_as(Role.VENDOR)
+    with client.websocket_connect(f"/deals/{deal.id}/ws") as ws, pytest.raises(WebSocketDisconnect) as closed:
+        ws.receive_json()
+    assert closed.value.code == 4404
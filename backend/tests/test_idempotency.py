@@ -0,0 +1,65 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.idempotency import DatabaseIdempotencyStore, IdempotencyMiddleware
+from app.models import IdempotencyKey
+
+
+def _app(db: Session, calls: list[int]) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware, store=DatabaseIdempotencyStore(sessionmaker(bind=db.get_bind())))
+
+    @app.post("/orders")
+    async def create_order(payload: dict[str, int]) -> dict[str, int]:
+        calls.append(payload["qty"])
+        await asyncio.sleep(0.05)
+        return {"order": len(calls), "qty": payload["qty"]}
+
+    @app.post("/boom")
+    async def boom() -> None:
+        calls.append(0)
+        raise RuntimeError("boom")
+
+    return app
+
+
+def test_replays_stored_response_and_coalesces_in_flight_duplicates(db: Session) -> None:
+    calls: list[int] = []
+    transport = httpx.ASGITransport(app=_app(db, calls))
+
+    async def scenario() -> list[httpx.Response]:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            headers = {"Idempotency-Key": "order-1"}
+            storm = await asyncio.gather(*(client.post("/orders", json={"qty": 3}, headers=headers) for _ in range(5)))
+            later = await client.post("/orders", json={"qty": 3}, headers=headers)
+            reused = await client.post("/orders", json={"qty": 4}, headers=headers)
+            plain = await client.post("/orders", json={"qty": 5})
+            return [*storm, later, reused, plain]
+
+    *storm, later, reused, plain = asyncio.run(scenario())
+    assert calls == [3, 5]
+    assert {r.content for r in [*storm, later]} == {b'{"order":1,"qty":3}'}
+    assert sum(r.headers.get("idempotent-replayed") == "true" for r in storm) == 4
+    assert later.headers["idempotent-replayed"] == "true"
+    assert reused.status_code == 422
+    assert plain.json() == {"order": 2, "qty": 5}
+
+    row = db.scalar(select(IdempotencyKey))
+    assert row.key == "ip:127.0.0.1:order-1" and row.status_code == 200
+
+
+def test_failed_requests_release_the_key(db: Session) -> None:
+    calls: list[int] = []
+    transport = httpx.ASGITransport(app=_app(db, calls), raise_app_exceptions=False)
+
+    async def scenario() -> list[int]:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [(await client.post("/boom", headers={"Idempotency-Key": "k"})).status_code for _ in range(2)]
+
+    assert asyncio.run(scenario()) == [500, 500]
+    assert calls == [0, 0]
+    assert db.scalar(select(IdempotencyKey)) is None
@@ -0,0 +1,78 @@
+import uuid
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import (
+    Deal,
+    DealStatus,
+    Invoice,
+    InvoiceStatus,
+    Organization,
+    OutboxJob,
+    Quote,
+    QuoteStatus,
+    Request,
+    Role,
+)
+
+
+def test_request_and_deal_lifecycle_transitions(client: TestClient, db: Session, login_as) -> None:
+    buyer = login_as(Role.BUYER)
+    req = Request(
+        buyer_org_id=buyer.org_id,
+        title="Data platform",
+        description="Build a data platform",
+        budget_cents=100_000,
+        deadline_date=date.today() + timedelta(days=30),
+    )
+    vendors = [Organization(name=f"Vendor {i}") for i in range(3)]
+    db.add_all([req, *vendors])
+    db.flush()
+    quotes = [
+        Quote(request_id=req.id, vendor_org_id=vendor.id, amount_cents=90_000 + i, timeline_days=10, terms="Net 30")
+        for i, vendor in enumerate(vendors)
+    ]
+    db.add_all(quotes)
+    db.commit()
+    base = f"/requests/{req.id}"
+
+    assert client.post(f"{base}/award", json={"winning_quote_id": str(quotes[1].id)}).status_code == 400
+    assert client.post(f"{base}/shortlist").json()["detail"] == "Only quoting requests can be shortlisted"
+    assert client.post(f"{base}/publish").json()["status"] == "QUOTING"
+    assert client.post(f"{base}/publish").json()["status"] == "QUOTING"
+    assert [job.args for job in db.scalars(select(OutboxJob))] == [[str(req.id)]]
+    assert client.post(f"{base}/shortlist").json()["status"] == "SHORTLIST"
+
+    missing = client.post(f"{base}/award", json={"winning_quote_id": str(uuid.uuid4())})
+    assert (missing.status_code, missing.json()["detail"]) == (404, "Winning quote not found")
+
+    res = client.post(f"{base}/award", json={"winning_quote_id": str(quotes[1].id)})
+    assert res.status_code == 200
+    # A second award loses the guarded UPDATE instead of overwriting the first.
+    again = client.post(f"{base}/award", json={"winning_quote_id": str(quotes[2].id)})
+    assert (again.status_code, again.json()["detail"]) == (400, "Only shortlisted requests can be awarded")
+
+    db.expire_all()
+    statuses = {quote.id: quote.status for quote in db.scalars(select(Quote).where(Quote.request_id == req.id))}
+    assert statuses == {
+        quotes[0].id: QuoteStatus.REJECTED,
+        quotes[1].id: QuoteStatus.ACCEPTED,
+        quotes[2].id: QuoteStatus.REJECTED,
+    }
+    deal = db.get(Deal, uuid.UUID(res.json()["deal_id"]))
+    assert deal.vendor_org_id == vendors[1].id
+
+    deal_base = f"/deals/{deal.id}"
+    assert client.post(f"{deal_base}/mark-paid").json()["detail"] == "Invoice does not exist"
+    invoice = client.post(f"{deal_base}/create-invoice").json()
+    assert invoice["amount_cents"] == 90_001
+    assert client.post(f"{deal_base}/create-invoice").json()["id"] == invoice["id"]
+    assert client.post(f"{deal_base}/mark-paid").json()["status"] == "PAID"
+    assert client.post(f"{deal_base}/mark-paid").json()["status"] == "PAID"
+
+    db.expire_all()
+    assert db.get(Deal, deal.id).status == DealStatus.PAID
+    assert db.scalar(select(Invoice.status).where(Invoice.deal_id == deal.id)) == InvoiceStatus.PAID
@@ -0,0 +1,85 @@
+import uuid
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import matching
+from app.matching import MatchingIndex, notify_matches
+from app.models import Listing, Notification, Organization, Request, Role, User, VendorProfile
+
+
+def test_index_scores_rare_capabilities_higher_and_filters_budget() -> None:
+    index = MatchingIndex()
+    orgs = [uuid.uuid4() for _ in range(4)]
+    index.add_profile(orgs[0], ["Logistics"], ["EU"])
+    index.add_profile(orgs[1], ["logistics", "cold-chain"], [])
+    index.add_listing(orgs[2], "cold-chain", ["logistics"], 50_000)
+    index.add_profile(orgs[3], ["Design"], ["eu"])
+
+    ranked = index.match(["Cold-Chain", "logistics", "eu"], budget_cents=10_000, limit=10)
+    assert [org for org, _ in ranked] == [orgs[1], orgs[0], orgs[3]]
+    assert index.match(["cold-chain"], budget_cents=60_000, limit=1)[0][0] in {orgs[1], orgs[2]}
+    assert index.match(["unknown"], budget_cents=60_000, limit=10) == []
+
+
+def test_notify_matches_inserts_notifications_for_matched_vendor_users(db: Session, monkeypatch) -> None:
+    monkeypatch.setattr(matching, "_index", MatchingIndex())
+    buyer_org, hit_org, miss_org = Organization(name="Buyer"), Organization(name="Hit"), Organization(name="Miss")
+    db.add_all([buyer_org, hit_org, miss_org])
+    db.flush()
+    users = [
+        User(org_id=hit_org.id, email="owner@hit.test", password_hash="x", role=Role.ORG_OWNER),
+        User(org_id=hit_org.id, email="viewer@hit.test", password_hash="x", role=Role.VIEWER),
+        User(org_id=miss_org.id, email="owner@miss.test", password_hash="x", role=Role.VENDOR),
+    ]
+    db.add_all(
+        [
+            *users,
+            VendorProfile(org_id=hit_org.id, company_name="Hit", industries=["security"], regions=["eu"]),
+            Listing(vendor_org_id=miss_org.id, title="Audit", category="security", pricing_model="fixed", min_budget_cents=10**9),
+        ]
+    )
+    req = Request(
+        buyer_org_id=buyer_org.id,
+        title="Pen test",
+        description="External pen test",
+        budget_cents=20_000,
+        deadline_date=date.today() + timedelta(days=10),
+        tags=["Security", "EU"],
+    )
+    db.add(req)
+    db.commit()
+
+    assert notify_matches(db, req.id) == 1
+    note = db.scalar(select(Notification))
+    assert note.user_id == users[0].id
+    assert note.type == "request.match"
+    assert note.payload["request_id"] == str(req.id)
+
+    # A requeued job re-inserts nothing for recipients the first attempt reached.
+    assert notify_matches(db, req.id) == 0
+    assert len(db.scalars(select(Notification)).all()) == 1
+
+
+def test_refresh_picks_up_rows_committed_behind_the_watermark(db: Session) -> None:
+    orgs = [Organization(name=f"Vendor {i}") for i in range(3)]
+    db.add_all(orgs)
+    db.flush()
+    stamp = datetime(2026, 3, 1, 12, 0)
+    db.add(VendorProfile(org_id=orgs[0].id, company_name="A", industries=["security"], regions=[], created_at=stamp))
+    db.commit()
+    index = MatchingIndex()
+    index.refresh(db, full_rebuild_seconds=3600)
+
+    # Same timestamp as the watermark, and one stamped earlier but committed later.
+    db.add_all(
+        [
+            VendorProfile(org_id=orgs[1].id, company_name="B", industries=["security"], regions=[], created_at=stamp),
+            VendorProfile(org_id=orgs[2].id, company_name="C", industries=["security"], regions=[], created_at=stamp - timedelta(seconds=1)),
+        ]
+    )
+    db.commit()
+    index.refresh(db, full_rebuild_seconds=3600)
+    assert {org for org, _ in index.match(["security"], 1, 10)} == {org.id for org in orgs}
+    assert len(index) == 3
@@ -0,0 +1,62 @@
+import threading
+import time
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models import Deal, Message, Organization, Request, Role
+from app.realtime import hub
+
+
+def _deal(db: Session, buyer) -> Deal:
+    vendor_org = Organization(name="Vendor")
+    req = Request(
+        buyer_org_id=buyer.org_id,
+        title="Data platform",
+        description="Build a data platform",
+        budget_cents=100_000,
+        deadline_date=date.today() + timedelta(days=30),
+    )
+    db.add_all([vendor_org, req])
+    db.flush()
+    deal = Deal(buyer_org_id=buyer.org_id, vendor_org_id=vendor_org.id, request_id=req.id)
+    db.add(deal)
+    db.commit()
+    return deal
+
+
+def test_message_pages_and_long_poll(client: TestClient, db: Session, login_as) -> None:
+    buyer = login_as(Role.BUYER)
+    deal = _deal(db, buyer)
+    url = f"/deals/{deal.id}/messages"
+    ids = [client.post(url, json={"body": f"m{i}"}).json()["id"] for i in range(5)]
+
+    assert [m["id"] for m in client.get(url).json()] == ids
+    assert [m["id"] for m in client.get(url, params={"limit": 2}).json()] == ids[3:]
+    assert [m["id"] for m in client.get(url, params={"limit": 2, "before": ids[3]}).json()] == ids[1:3]
+    assert [m["id"] for m in client.get(url, params={"limit": 2, "after": ids[1]}).json()] == ids[2:4]
+    assert client.get(url, params={"before": ids[1], "after": ids[0]}).status_code == 400
+    assert client.get(url, params={"wait": 1}).status_code == 400
+    assert client.get(url, params={"after": str(deal.id)}).json()["detail"] == "Unknown message cursor"
+
+    started = time.monotonic()
+    assert client.get(url, params={"after": ids[-1], "wait": 0.2}).json() == []
+    assert time.monotonic() - started >= 0.2
+
+    # A waiting poll wakes on the deal topic and re-reads; nothing is held open while it waits.
+    result: list = []
+    poll = threading.Thread(target=lambda: result.append(client.get(url, params={"after": ids[-1], "wait": 10}).json()))
+    poll.start()
+    while f"deal:{deal.id}" not in hub._subs:
+        time.sleep(0.01)
+    # Room chatter on the same topic does not end the poll.
+    client.portal.call(hub.dispatch, f"deal:{deal.id}", {"type": "typing", "data": {"user_id": str(buyer.id)}})
+    poll.join(timeout=0.2)
+    assert poll.is_alive()
+    with sessionmaker(bind=db.get_bind())() as other:
+        other.add(Message(deal_id=deal.id, sender_user_id=buyer.id, body="late"))
+        other.commit()
+    client.portal.call(hub.dispatch, f"deal:{deal.id}", {"type": "message"})
+    poll.join(timeout=5)
+    assert [m["body"] for m in result[0]] == ["late"]
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.middleware import LogQueue, RequestIDMiddleware, logger, mark_long_poll
+
+
+class _Records(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+@pytest.fixture()
+def records():
+    handler = _Records()
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    yield handler.records
+    logger.removeHandler(handler)
+    logger.setLevel(logging.NOTSET)
+
+
+def _app(sample_rate: float, slow_ms: float = 10_000) -> Starlette:
+    async def ok(_request):
+        return PlainTextResponse("ok")
+
+    async def stream(_request):
+        async def events():
+            yield b"a"
+            await asyncio.sleep(0.1)
+            yield b"b"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    async def poll(request):
+        mark_long_poll(request)
+        await asyncio.sleep(0.1)
+        return PlainTextResponse("[]")
+
+    async def slow(_request):
+        await asyncio.sleep(0.1)
+        return PlainTextResponse("ok")
+
+    async def boom(_request):
+        raise RuntimeError("boom")
+
+    routes = [Route("/ok", ok), Route("/stream", stream), Route("/poll", poll), Route("/slow", slow), Route("/boom", boom)]
+    return RequestIDMiddleware(Starlette(routes=routes), sample_rate=sample_rate, slow_ms=slow_ms)
+
+
+def test_request_id_is_kept_and_errors_bypass_sampling(records) -> None:
+    client = TestClient(_app(sample_rate=0.0), raise_server_exceptions=False)
+    res = client.get("/ok", headers={"X-Request-ID": "abc"})
+    assert res.headers["x-request-id"] == "abc"
+    stream = client.get("/stream")
+    assert stream.text == "ab" and stream.headers["x-request-id"]
+    assert records == []
+
+    assert client.get("/boom").status_code == 500
+    (record,) = records
+    assert (record.path, record.status_code, record.sample_rate) == ("/boom", 500, 1.0)
+
+
+def test_slowness_is_time_to_first_byte_outside_long_polls(records) -> None:
+    client = TestClient(_app(sample_rate=0.0, slow_ms=50))
+    for path in ("/stream", "/poll", "/slow"):
+        assert client.get(path).status_code == 200
+    (record,) = records
+    assert record.path == "/slow" and record.levelno == logging.WARNING and record.ttfb_ms >= 50
+
+
+def test_sampled_records_reach_handlers_through_the_queue(records) -> None:
+    client = TestClient(_app(sample_rate=1.0))
+    queue = LogQueue("b2bak.api")
+    queue.start()
+    try:
+        client.get("/ok", headers={"X-Request-ID": "abc"})
+    finally:
+        queue.stop()
+    assert [(r.request_id, r.status_code, r.levelno) for r in records] == [("abc", 200, logging.INFO)]
+
+
+def test_app_errors_carry_the_request_id(client: TestClient) -> None:
+    res = client.get("/auth/me", headers={"X-Request-ID": "req-1"})
+    assert res.status_code == 401
+    assert res.headers["x-request-id"] == "req-1" and res.json()["request_id"] == "req-1"
@@ -0,0 +1,54 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models import Notification, Role
+from app.realtime import hub, notification_event
+
+
+def _notify(db: Session, user) -> Notification:
+    note = Notification(org_id=user.org_id, user_id=user.id, type="job", payload={"message": "done"})
+    db.add(note)
+    db.commit()
+    return note
+
+
+def _event_ids(body: str) -> list[str]:
+    return [line.removeprefix("id: ") for line in body.splitlines() if line.startswith("id: ")]
+
+
+def test_stream_replays_backlog_dedupes_and_ends_on_overflow(
+    client: TestClient, db: Session, login_as, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(hub, "queue_size", 3)
+    user = login_as(Role.BUYER)
+    first, second, third = (notification_event(_notify(db, user)) for _ in range(3))
+    topic = f"user:{user.id}"
+
+    result: list[str] = []
+    stream = threading.Thread(
+        target=lambda: result.append(
+            client.get("/notifications/stream", headers={"Last-Event-ID": first["id"]}).text
+        )
+    )
+    stream.start()
+    while topic not in hub._subs:
+        time.sleep(0.01)
+    (sub,) = hub._subs[topic]
+    fourth = notification_event(_notify(db, user))
+    # The third notification was already replayed from the backlog; its live copy is skipped.
+    client.portal.call(lambda: [hub.dispatch(topic, event) for event in (third, fourth)])
+    while not sub.queue.empty():
+        time.sleep(0.01)
+
+    # More events than the queue holds in one go: the oldest is dropped and the stream is told to resync.
+    fillers = [{"type": "notification", "id": f"filler-{i}", "data": {}} for i in range(4)]
+    client.portal.call(lambda: [hub.dispatch(topic, event) for event in fillers])
+    stream.join(timeout=5)
+
+    assert not stream.is_alive()
+    assert _event_ids(result[0]) == [second["id"], third["id"], fourth["id"], "filler-1", "filler-2"]
+    assert topic not in hub._subs
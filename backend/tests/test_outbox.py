@@ -0,0 +1,44 @@
+from datetime import UTC, datetime
+
+import fakeredis
+from redis.exceptions import ConnectionError as RedisConnectionError
+from rq import Queue
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import outbox
+from app.models import OutboxJob
+from app.outbox import OutboxRelay, outbox_stats, rq_job_id
+
+
+def test_relay_dispatches_committed_jobs_once_and_backs_off_on_redis_errors(db: Session) -> None:
+    sessions = sessionmaker(bind=db.get_bind())
+    queue = Queue("b2bak", connection=fakeredis.FakeStrictRedis())
+    first = outbox.enqueue(db, "app.queue.publish_notification_job", "r-1")
+    db.commit()
+    outbox.enqueue(db, "app.queue.publish_notification_job", "rolled-back")
+    db.rollback()
+    assert outbox_stats(db)["pending"] == 1
+
+    def unreachable() -> Queue:
+        raise RedisConnectionError("down")
+
+    down = OutboxRelay(sessions, unreachable, batch_size=10, max_backoff_seconds=60).relay_once()
+    assert (down.dispatched, down.failed) == (0, 1)
+    db.expire_all()
+    row = db.get(OutboxJob, first.id)
+    assert row.attempts == 1
+    assert db.scalar(select(OutboxJob.id).where(OutboxJob.available_at > datetime.now(UTC))) == first.id
+    assert OutboxRelay(sessions, lambda: queue, 10, 60).relay_once().dispatched == 0
+
+    row.available_at = datetime.now(UTC)
+    # A job already in RQ (relay died before marking the row) is not enqueued a second time.
+    queue.enqueue("app.queue.publish_notification_job", "r-1", job_id=rq_job_id(first.id))
+    second = outbox.enqueue(db, "app.queue.publish_notification_job", "r-2")
+    db.commit()
+    result = OutboxRelay(sessions, lambda: queue, 10, 60).relay_once()
+    assert result.dispatched == 2
+    assert sorted(job.args[0] for job in queue.get_jobs()) == ["r-1", "r-2"]
+    assert queue.fetch_job(rq_job_id(second.id)).func_name == "app.queue.publish_notification_job"
+    db.expire_all()
+    assert db.scalar(select(OutboxJob).where(OutboxJob.dispatched_at.is_(None))) is None
@@ -0,0 +1,68 @@
+from datetime import date, datetime, timedelta
+from uuid import UUID
+
+from app.models import Request, RequestStatus, Role
+from app.pagination import decode_cursor, encode_cursor
+
+
+def _seed_requests(db, org_id, count):
+    base = datetime(2026, 1, 1)
+    for i in range(count):
+        db.add(
+            Request(
+                buyer_org_id=org_id,
+                title=f"Request {i}",
+                description="Seeded for pagination tests.",
+                budget_cents=1000,
+                deadline_date=date(2026, 12, 31),
+                tags=[],
+                status=RequestStatus.DRAFT,
+                created_at=base + timedelta(minutes=i // 2),
+            )
+        )
+    db.commit()
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 2, 18, 10, 30)
+    row_id = "5f0c6a52-2d1c-4b55-9c1e-1f1f8a0b7a11"
+    assert decode_cursor(encode_cursor(created_at, row_id)) == (created_at, UUID(row_id))
+
+
+def test_invalid_cursor_is_rejected(client, login_as):
+    login_as(Role.BUYER)
+    response = client.get("/requests", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_keyset_pages_cover_every_row_once(client, db, login_as):
+    user = login_as(Role.BUYER)
+    _seed_requests(db, user.org_id, 25)
+
+    seen: list[str] = []
+    cursor = ""
+    while cursor is not None:
+        body = client.get("/requests", params={"cursor": cursor, "page_size": 10}).json()
+        assert body["total"] is None
+        seen.extend(item["id"] for item in body["items"])
+        cursor = body["next_cursor"]
+
+    offset_ids = [
+        item["id"]
+        for page in (1, 2, 3)
+        for item in client.get("/requests", params={"page": page, "page_size": 10}).json()["items"]
+    ]
+    assert len(seen) == 25
+    assert seen == offset_ids
+
+
+def test_offset_mode_keeps_total_and_hands_off_cursor(client, db, login_as):
+    user = login_as(Role.BUYER)
+    _seed_requests(db, user.org_id, 5)
+
+    first = client.get("/requests", params={"page": 1, "page_size": 3}).json()
+    assert first["total"] == 5
+    assert first["page"] == 1
+    rest = client.get("/requests", params={"cursor": first["next_cursor"], "page_size": 3}).json()
+    assert len(rest["items"]) == 2
+    assert rest["next_cursor"] is None
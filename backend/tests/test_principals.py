@@ -0,0 +1,48 @@
+import time
+from uuid import uuid4
+
+from app.models import Organization, Role, User
+from app.principals import Principal, PrincipalCache, principal_cache
+
+
+def _principal(org_id=None):
+    return Principal(user=User(id=uuid4(), org_id=org_id or uuid4(), email="x@test.local", role=Role.BUYER))
+
+
+def test_cache_evicts_least_recently_used():
+    cache = PrincipalCache(max_entries=2, ttl_seconds=60)
+    first, second, third = _principal(), _principal(), _principal()
+    cache.put(first)
+    cache.put(second)
+    assert cache.get(first.user.id) is first
+    cache.put(third)
+    assert cache.get(second.user.id) is None
+    assert cache.get(first.user.id) is first
+
+
+def test_cache_expires_and_invalidates_by_org():
+    cache = PrincipalCache(max_entries=10, ttl_seconds=0.01)
+    entry = _principal()
+    cache.put(entry)
+    time.sleep(0.02)
+    assert cache.get(entry.user.id) is None
+
+    cache.ttl_seconds = 60
+    org_id = uuid4()
+    same_org, other_org = _principal(org_id), _principal()
+    cache.put(same_org)
+    cache.put(other_org)
+    cache.invalidate_org(org_id)
+    assert cache.get(same_org.user.id) is None
+    assert cache.get(other_org.user.id) is other_org
+
+
+def test_profile_update_invalidates_cached_principal(client, login_as):
+    user = login_as(Role.BUYER)
+    assert client.get("/auth/me").json()["organization"]["name"] == "Test Org"
+    cached = principal_cache.get(user.id)
+    assert cached is not None and isinstance(cached.org, Organization)
+
+    assert client.patch("/auth/profile", json={"display_name": "Renamed"}).status_code == 200
+    assert principal_cache.get(user.id) is None
+    assert client.get("/auth/profile").json()["display_name"] == "Renamed"
@@ -0,0 +1,17 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.query_plans import check
+from app.scripts.seed import seed_data
+
+
+def test_router_queries_use_indexes(db: Session) -> None:
+    seed_data(db)
+    conn = db.connection()
+    assert check(conn) == {}
+
+    conn.execute(text("DROP INDEX ix_requests_buyer_org_id_created_at"))
+    conn.execute(text("DROP INDEX ix_messages_deal_id_created_at"))
+    failures = check(conn)
+    assert set(failures) == {"requests.buyer", "messages.deal"}
+    assert failures["requests.buyer"] == ["full scan: SCAN requests", "sort not served by an index: USE TEMP B-TREE FOR ORDER BY"]
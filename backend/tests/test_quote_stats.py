@@ -0,0 +1,50 @@
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models import Request, RequestStatus, Role
+
+
+def test_quote_stats_follow_create_patch_withdraw_and_award(client: TestClient, db: Session, login_as) -> None:
+    buyer = login_as(Role.BUYER)
+    req = Request(
+        buyer_org_id=buyer.org_id,
+        title="Data platform",
+        description="Build a data platform",
+        budget_cents=100_000,
+        deadline_date=date.today() + timedelta(days=30),
+        status=RequestStatus.QUOTING,
+    )
+    db.add(req)
+    db.commit()
+    stats_url = f"/requests/{req.id}/quote-stats"
+    assert client.get(stats_url).json()["quote_count"] == 0
+
+    login_as(Role.VENDOR)
+    quote = {"request_id": str(req.id), "terms": "Net 30, fixed price"}
+    first = client.post("/quotes", json={**quote, "amount_cents": 500, "timeline_days": 20}).json()
+    client.post("/quotes/batch", json={"items": [{**quote, "amount_cents": a, "timeline_days": t} for a, t in [(300, 9), (900, 30), (700, 12)]]})
+    client.patch(f"/quotes/{first['id']}", json={"amount_cents": 100})
+    withdrawn = client.post("/quotes", json={**quote, "amount_cents": 50, "timeline_days": 2}).json()
+    client.post(f"/quotes/{withdrawn['id']}/withdraw")
+    assert client.get(stats_url).status_code == 403
+
+    login_as(user=buyer)
+    body = client.get(stats_url).json()
+    assert body == {
+        "request_id": str(req.id),
+        "quote_count": 4,
+        "min_amount_cents": 100,
+        "median_amount_cents": 500,
+        "max_amount_cents": 900,
+        "fastest_timeline_days": 9,
+        "awarded_amount_cents": None,
+    }
+
+    client.post(f"/requests/{req.id}/shortlist")
+    client.post(f"/requests/{req.id}/award", json={"winning_quote_id": first["id"]})
+    assert client.get(stats_url).json()["awarded_amount_cents"] == 100
+
+    login_as(Role.BUYER)
+    assert client.get(stats_url).status_code == 404
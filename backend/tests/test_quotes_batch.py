@@ -0,0 +1,53 @@
+import uuid
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models import AuditLog, Organization, Quote, Request, RequestStatus, Role
+
+
+def _request(db: Session, org: Organization, status: RequestStatus) -> Request:
+    req = Request(
+        buyer_org_id=org.id,
+        title="Data platform",
+        description="Build a data platform",
+        budget_cents=100_000,
+        deadline_date=date.today() + timedelta(days=30),
+        status=status,
+    )
+    db.add(req)
+    db.flush()
+    return req
+
+
+def test_batch_quotes_report_per_item_outcomes(client: TestClient, db: Session, login_as) -> None:
+    buyer_org = Organization(name="Buyer")
+    db.add(buyer_org)
+    db.flush()
+    open_a = _request(db, buyer_org, RequestStatus.PUBLISHED)
+    open_b = _request(db, buyer_org, RequestStatus.QUOTING)
+    draft = _request(db, buyer_org, RequestStatus.DRAFT)
+    db.commit()
+    vendor = login_as(Role.VENDOR)
+
+    item = {"amount_cents": 90_000, "timeline_days": 14, "terms": "Net 30, fixed price"}
+    missing = uuid.uuid4()
+    res = client.post(
+        "/quotes/batch",
+        json={"items": [{**item, "request_id": str(rid)} for rid in (open_a.id, draft.id, missing, open_b.id)]},
+    )
+    assert res.status_code == 200
+    body = res.json()
+    assert (body["created"], body["failed"]) == (2, 2)
+    outcomes = [(i["index"], i["quote"] is not None, i["error"] and i["error"]["status"]) for i in body["items"]]
+    assert outcomes == [(0, True, None), (1, False, 400), (2, False, 404), (3, True, None)]
+    assert body["items"][0]["quote"]["vendor_org_id"] == str(vendor.org_id)
+
+    # Same outcome as the single-quote path for the rejected item.
+    single = client.post("/quotes", json={**item, "request_id": str(draft.id)})
+    assert (single.status_code, single.json()["detail"]) == (400, body["items"][1]["error"]["detail"])
+
+    assert db.scalar(select(func.count()).select_from(Quote)) == 2
+    assert db.scalar(select(func.count()).where(AuditLog.action == "quote.create")) == 2
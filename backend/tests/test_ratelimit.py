@@ -0,0 +1,49 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.ratelimit import MemoryBucketBackend, RateLimiter, RateLimitMiddleware, Rule
+
+
+class CountingBackend(MemoryBucketBackend):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+
+    async def acquire(self, key, rule, lease):
+        self.calls += 1
+        return await super().acquire(key, rule, lease)
+
+
+def test_local_leases_skip_the_shared_backend_until_the_bucket_runs_low():
+    backend = CountingBackend()
+    limiter = RateLimiter([], backend, local_lease_fraction=0.1)
+    rule = Rule("org", "/", "org", per_minute=60, burst=100)
+
+    decisions = [asyncio.run(limiter.check(rule, "rl:org:a")) for _ in range(100)]
+    assert all(d.allowed for d in decisions)
+    assert backend.calls < 30
+    assert not asyncio.run(limiter.check(rule, "rl:org:a")).allowed
+
+
+def test_middleware_rejects_with_retry_after_and_reports_headers():
+    rule = Rule("auth-login", "/auth/login", "ip", per_minute=60, burst=2, methods=frozenset({"POST"}))
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, limiter=RateLimiter([rule], MemoryBucketBackend(), 0.1))
+
+    @app.post("/auth/login")
+    def login() -> dict[str, str]:
+        return {"status": "ok"}
+
+    with TestClient(app) as client:
+        first = client.post("/auth/login")
+        assert first.status_code == 200
+        assert first.headers["ratelimit-limit"] == "2"
+        assert first.headers["ratelimit-remaining"] == "1"
+        client.post("/auth/login")
+        denied = client.post("/auth/login")
+        assert denied.status_code == 429
+        assert denied.headers["content-type"] == "application/problem+json"
+        assert int(denied.headers["retry-after"]) >= 1
+        assert client.get("/auth/login").status_code == 405
@@ -0,0 +1,70 @@
+import asyncio
+
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+
+from app import redis_pool
+from app.redis_pool import (
+    MeteredConnectionPool,
+    get_and_delete_many,
+    get_redis_client,
+    hdel_and_getall,
+    hset_with_expire,
+    incr_with_expire,
+    pool_stats,
+    set_many_with_ttl,
+)
+
+
+@pytest.fixture
+def fake_pool(monkeypatch: pytest.MonkeyPatch) -> MeteredConnectionPool:
+    server = fakeredis.FakeServer()
+    pool = MeteredConnectionPool(
+        connection_class=fakeredis.FakeConnection, server=server, decode_responses=True, max_connections=2, timeout=1
+    )
+    monkeypatch.setattr(redis_pool, "_pools", {True: pool})
+    return pool
+
+
+def test_pooled_client_helpers_and_stats(fake_pool: MeteredConnectionPool) -> None:
+    client = get_redis_client()
+    assert client.connection_pool is fake_pool
+
+    assert incr_with_expire(client, "hits", 60) == 1
+    assert incr_with_expire(client, "hits", 600) == 2
+    # The TTL is only set by the first increment.
+    assert 0 < client.ttl("hits") <= 60
+
+    assert set_many_with_ttl(client, {"a": "1", "b": "2"}, 30) == [True, True]
+    assert set_many_with_ttl(client, {"a": "x", "c": "3"}, 30, nx=True) == [False, True]
+    assert get_and_delete_many(client, "a", "c", "missing") == ["1", "3", None]
+    assert client.exists("a", "c") == 0
+
+    stats = pool_stats()["text"]
+    # Seven commands and pipelines above, all served by one connection that went back to the pool.
+    assert stats["max_connections"] == 2
+    assert stats["created"] == 1 and stats["in_use"] == 0
+    assert stats["checkouts"] == 7 and stats["checkout_errors"] == 0
+
+
+def test_hash_helpers_pipeline_writes_and_reads() -> None:
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    async def scenario() -> tuple[dict, dict, int]:
+        await hset_with_expire(client, "room", {"u1": "1"}, 30)
+        entries = await hset_with_expire(client, "room", {"u2": "2"}, 30)
+        remaining = await hdel_and_getall(client, "room", "u1")
+        return entries, remaining, await client.ttl("room")
+
+    entries, remaining, ttl = asyncio.run(scenario())
+    assert entries == {"u1": "1", "u2": "2"}
+    assert remaining == {"u2": "2"}
+    assert 0 < ttl <= 30
+
+
+def test_health_redis_reports_pool_stats(client: TestClient, fake_pool: MeteredConnectionPool) -> None:
+    get_redis_client().ping()
+    body = client.get("/health/redis").json()
+    assert set(body) == {"text"}
+    assert body["text"]["checkouts"] == 1 and body["text"]["in_use"] == 0
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import AuditLog, Request, Role
+
+
+def test_import_ndjson_in_batches_with_error_report(client: TestClient, db: Session, login_as) -> None:
+    user = login_as(Role.BUYER)
+    good = {"title": "Kubernetes migration", "description": "Move workloads to managed k8s", "budget_cents": 5000}
+    lines = [
+        json.dumps({**good, "deadline_date": "2026-12-01"}),
+        json.dumps({**good, "budget_cents": -1, "deadline_date": "2026-12-01"}),
+        "{not json",
+        "",
+        json.dumps({**good, "title": "Warehouse audit", "deadline_date": "2026-12-02", "tags": ["ops"]}),
+        json.dumps({**good, "title": "Payroll vendor", "deadline_date": "2026-12-03"}),
+    ]
+    res = client.post(
+        "/requests/import?batch_size=2",
+        content="\n".join(lines).encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert res.status_code == 200
+    body = res.json()
+    assert (body["imported"], body["failed"], body["batches"]) == (3, 2, 2)
+    assert [error["row"] for error in body["errors"]] == [2, 3]
+    assert body["errors"][0]["errors"][0].startswith("budget_cents")
+
+    assert db.scalar(select(func.count()).select_from(Request).where(Request.buyer_org_id == user.org_id)) == 3
+    audits = db.scalars(select(AuditLog).where(AuditLog.action == "request.import")).all()
+    assert sorted(a.payload["count"] for a in audits) == [1, 2]
+    found = client.get("/requests", params={"search": "warehouse"}).json()["items"]
+    assert [item["title"] for item in found] == ["Warehouse audit"]
+
+
+def test_import_csv_with_quoted_newlines(client: TestClient, login_as) -> None:
+    login_as(Role.BUYER)
+    csv_body = (
+        "title,description,budget_cents,deadline_date,tags,currency\r\n"
+        'Office fit-out,"Line one\nline two, with comma",120000,2026-11-01,design;build,\r\n'
+        "Bad row,too short,1,2026-11-01,,\r\n"
+    )
+    res = client.post("/requests/import", content=csv_body.encode(), headers={"Content-Type": "text/csv"})
+    body = res.json()
+    assert (body["imported"], body["failed"]) == (1, 1)
+    assert body["errors"][0]["row"] == 2
+
+    item = client.get("/requests").json()["items"][0]
+    assert item["description"] == "Line one\nline two, with comma"
+    assert item["tags"] == ["design", "build"]
+    assert item["currency"] == "USD"
+
+
+def test_import_stops_at_an_overlong_record(client: TestClient, login_as, monkeypatch: pytest.MonkeyPatch) -> None:
+    login_as(Role.BUYER)
+    monkeypatch.setattr(get_settings(), "request_import_max_record_chars", 200)
+    good = "Kubernetes migration,Move workloads to managed k8s,5000,2026-12-01\r\n"
+    # A stray quote keeps the record open; the import stops once it passes the limit.
+    csv_body = "title,description,budget_cents,deadline_date\r\n" + good + 'Bad "row,x,1,2026-12-01\r\n' + good * 50
+    body = client.post("/requests/import", content=csv_body.encode(), headers={"Content-Type": "text/csv"}).json()
+    assert (body["imported"], body["failed"]) == (1, 1)
+    assert body["errors"][0]["row"] == 2 and "import stopped" in body["errors"][0]["errors"][0]
+
+    ndjson = b'{"title": "' + b"x" * 1000
+    body = client.post("/requests/import", content=ndjson, headers={"Content-Type": "application/x-ndjson"}).json()
+    assert (body["imported"], body["failed"]) == (0, 1)
@@ -0,0 +1,76 @@
+from datetime import date
+from uuid import uuid4
+
+from app import search
+from app.models import Request, RequestStatus, Role
+from app.search import InvertedIndex, tokenize
+
+
+def test_tokenize_drops_punctuation_and_single_letters():
+    assert tokenize("SOC2 audit, a Q3 review!") == ["soc2", "audit", "q3", "review"]
+
+
+def test_index_ranks_title_hits_above_description_hits():
+    index = InvertedIndex()
+    title_hit, body_hit, miss = uuid4(), uuid4(), uuid4()
+    index.add(title_hit, "Cloud migration", "Move workloads to a new provider.")
+    index.add(body_hit, "Infrastructure project", "Includes a cloud migration phase.")
+    index.add(miss, "Office furniture", "Desks and chairs.")
+
+    assert [doc_id for doc_id, _ in index.search("cloud migr")] == [title_hit, body_hit]
+    index.remove(title_hit)
+    assert [doc_id for doc_id, _ in index.search("cloud")] == [body_hit]
+
+
+def test_marketplace_search_is_ranked(client, db, login_as):
+    user = login_as(Role.BUYER)
+    for title, description in [
+        ("Payroll outsourcing", "Need a partner for payroll and a security review of the process."),
+        ("Security audit", "Quarterly security audit with security training for staff."),
+        ("Office move", "Logistics support for relocating our office."),
+    ]:
+        db.add(
+            Request(
+                buyer_org_id=user.org_id,
+                title=title,
+                description=description,
+                budget_cents=1000,
+                deadline_date=date(2026, 12, 31),
+                tags=[],
+                status=RequestStatus.DRAFT,
+            )
+        )
+    db.commit()
+
+    body = client.get("/requests", params={"search": "security"}).json()
+    assert body["total"] == 2
+    assert [item["title"] for item in body["items"]] == ["Security audit", "Payroll outsourcing"]
+
+
+def test_fallback_index_skips_rolled_back_rows(client, db, login_as):
+    user = login_as(Role.BUYER)
+
+    def add(title: str) -> Request:
+        req = Request(
+            buyer_org_id=user.org_id,
+            title=title,
+            description="Quarterly review.",
+            budget_cents=1000,
+            deadline_date=date(2026, 12, 31),
+            tags=[],
+            status=RequestStatus.DRAFT,
+        )
+        db.add(req)
+        db.flush()
+        return req
+
+    # Builds the index, so later changes reach it through the session hooks.
+    assert client.get("/requests", params={"search": "penetration"}).json()["total"] == 0
+    rolled_back = add("Penetration test").id
+    db.rollback()
+    add("Penetration retest")
+    db.commit()
+
+    body = client.get("/requests", params={"search": "penetration"}).json()
+    assert [item["title"] for item in body["items"]] == ["Penetration retest"]
+    assert rolled_back not in dict(search._fallback_index(db).search("penetration"))
@@ -0,0 +1,43 @@
+from datetime import UTC, datetime
+
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import unread
+from app.models import Role
+
+
+@pytest.fixture
+def redis_client(monkeypatch: pytest.MonkeyPatch) -> fakeredis.FakeRedis:
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(unread, "get_redis_client", lambda: client)
+    return client
+
+
+def test_unread_counter_follows_inserts_and_reads(
+    client: TestClient, db: Session, login_as, redis_client: fakeredis.FakeRedis
+) -> None:
+    user = login_as(Role.BUYER)
+    ids = [client.post("/notifications/emit-job").json()["notification_id"] for _ in range(2)]
+    # Inserts before the first read leave the counter unseeded; the read counts the table.
+    assert redis_client.get(unread.counter_key(user.id)) is None
+    assert client.get("/notifications/unread-count").json() == {"unread": 2}
+
+    ids.append(client.post("/notifications/emit-job").json()["notification_id"])
+    assert redis_client.get(unread.counter_key(user.id)) == "3"
+
+    assert client.post(f"/notifications/{ids[0]}/read").json()["read_at"] is not None
+    client.post(f"/notifications/{ids[0]}/read")
+    assert client.get("/notifications/unread-count").json() == {"unread": 2}
+
+    assert client.post("/notifications/read", json={"ids": ids[:2]}).json() == {"updated": 1}
+    assert client.post("/notifications/read", json={"before": datetime.now(UTC).isoformat()}).json() == {"updated": 1}
+    assert client.get("/notifications/unread-count").json() == {"unread": 0}
+    assert client.post("/notifications/read", json={}).status_code == 422
+
+    redis_client.set(unread.counter_key(user.id), 9)
+    assert unread.reconcile(db) == 1
+    assert unread.reconcile(db) == 0
+    assert client.get("/notifications/unread-count").json() == {"unread": 0}
@@ -1,7 +1,7 @@
 "use client";
 
 import { useParams } from "next/navigation";
-import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
+import { useInfiniteQuery, useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
 import { useState } from "react";
 import { toast } from "sonner";
 
@@ -12,6 +12,9 @@ import { Input } from "@/components/ui/input";
 import { apiClient } from "@/lib/api";
 import { money } from "@/lib/utils";
 
+// Matches the API's default page size; a shorter page means the start of the thread was reached.
+const MESSAGE_PAGE_SIZE = 50;
+
 export default function DealDetailsPage() {
   const { id } = useParams<{ id: string }>();
   const [message, setMessage] = useState("");
@@ -19,7 +22,14 @@ export default function DealDetailsPage() {
   const queryClient = useQueryClient();
 
   const deal = useQuery({ queryKey: ["deal", id], queryFn: () => apiClient.deal(id) });
-  const messages = useQuery({ queryKey: ["deal-messages", id], queryFn: () => apiClient.messages(id) });
+  const messages = useInfiniteQuery({
+    queryKey: ["deal-messages", id],
+    queryFn: ({ pageParam }) => apiClient.messages(id, pageParam ? `?before=${pageParam}` : ""),
+    initialPageParam: "",
+    // Pages come newest first and each is oldest-to-newest, so the next one ends before this page's first message.
+    getNextPageParam: (lastPage) => (lastPage.length === MESSAGE_PAGE_SIZE ? lastPage[0].id : undefined)
+  });
+  const thread = messages.data ? [...messages.data.pages].reverse().flat() : [];
   const invoice = useMutation({
     mutationFn: () => apiClient.createInvoice(id),
     onSuccess: (data) => {
@@ -76,13 +86,18 @@ export default function DealDetailsPage() {
         <div className="mb-3 max-h-72 space-y-2 overflow-auto">
           {messages.isLoading && <p className="text-sm text-slate-300">Loading messages...</p>}
           {messages.isError && <p className="text-sm text-red-300">Failed to load messages.</p>}
-          {messages.data?.map((m) => (
+          {messages.hasNextPage && (
+            <Button variant="outline" disabled={messages.isFetchingNextPage} onClick={() => messages.fetchNextPage()}>
+              {messages.isFetchingNextPage ? "Loading..." : "Load older messages"}
+            </Button>
+          )}
+          {thread.map((m) => (
             <div key={m.id} className="rounded-xl border border-border p-3">
               <p className="text-sm">{m.body}</p>
               <p className="text-xs text-slate-300">{new Date(m.created_at).toLocaleString()}</p>
             </div>
           ))}
-          {messages.data?.length === 0 && <p className="text-sm text-slate-300">No messages yet.</p>}
+          {messages.isSuccess && thread.length === 0 && <p className="text-sm text-slate-300">No messages yet.</p>}
         </div>
         <div className="flex gap-2">
           <Input value={message} onChange={(e) => setMessage(e.target.value)} placeholder="Send message..." />
@@ -1,6 +1,6 @@
 import type { DealItem, InvoiceItem, QuoteItem, RequestItem } from "@/lib/types";
 
-type Paginated<T> = { items: T[]; page: number; page_size: number; total: number };
+type Paginated<T> = { items: T[]; page: number; page_size: number; total: number; next_cursor?: string | null };
 
 const API_BASE = process.env.NEXT_PUBLIC_API_BASE_URL ?? "http://localhost:8000";
 const API_TIMEOUT_MS = 12000;
@@ -103,7 +103,8 @@ export const apiClient = {
   deal: (id: string) => api<DealItem>(`/deals/${id}`),
   createInvoice: (id: string) => api<InvoiceItem>(`/deals/${id}/create-invoice`, { method: "POST" }),
   markPaid: (id: string) => api<DealItem>(`/deals/${id}/mark-paid`, { method: "POST" }),
-  messages: (dealId: string) => api<Array<{ id: string; body: string; sender_user_id: string; created_at: string }>>(`/deals/${dealId}/messages`),
+  messages: (dealId: string, params = "") =>
+    api<Array<{ id: string; body: string; sender_user_id: string; created_at: string }>>(`/deals/${dealId}/messages${params}`),
   postMessage: (dealId: string, body: string) =>
     api<{ id: string; body: string; sender_user_id: string; created_at: string }>(`/deals/${dealId}/messages`, { method: "POST", body: JSON.stringify({ body }) }),
   audit: (params = "") => api<Paginated<{ id: string; action: string; entity: string; entity_id: string; created_at: string }>>(`/audit${params}`)
@@ -237,7 +237,7 @@ export default function ProfilePage() {
                     height: 72,
                     borderRadius: "50%",
                     border: "1px solid #334155",
-                    background: avatarUrl ? `url(${avatarUrl}) center/cover no-repeat` : "linear-gradient(120deg,#7c3aed,#2563eb)"
+                    background: avatarUrl ? `url(${avatarUrl.startsWith("/") ? `${API_BASE}${avatarUrl}?size=md` : avatarUrl}) center/cover no-repeat` : "linear-gradient(120deg,#7c3aed,#2563eb)"
                   }}
                 />
                 <div>